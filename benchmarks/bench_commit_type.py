@@ -0,0 +1,129 @@
+# benchmarks/bench_commit_type.py
+"""
+Fallback commit type detection on a large synthetic staged diff: the legacy
+per-line substring scanner vs the single-pass scanner vs numstat only.
+
+    python -m benchmarks.bench_commit_type --mb 50 --rounds 3
+"""
+
+import argparse
+import random
+import statistics
+import time
+from collections import Counter
+
+from core.commit_type import detect_commit_type, detect_commit_type_from_numstat
+from core.staged_diff import NumStat
+
+# (path template, line templates) mixed into the synthetic diff
+FILE_KINDS = [
+    ("src/module_{i}.py", ["    value_{n} = compute({n})", "def handler_{n}(event):", "    # fix off-by-one in {n}"]),
+    ("web/styles/page_{i}.css", [".card-{n} {{ margin: {n}px; }}"]),
+    ("docs/guide_{i}.md", ["Step {n}: run the build and check the output."]),
+    ("config/service_{i}.yml", ["  timeout_{n}: {n}"]),
+    ("tests/test_module_{i}.py", ["    assert compute({n}) == {n}"]),
+]
+
+
+def legacy_detect_commit_type_from_diff(diff_content: str) -> str:
+    # Verbatim copy of the pre-single-pass implementation, kept as the baseline.
+    def is_comment_line(line: str) -> bool:
+        stripped = line.lstrip()
+        return (
+            stripped.startswith("#")
+            or stripped.startswith("//")
+            or stripped.startswith("/*")
+            or stripped.startswith("*")
+        )
+
+    if not diff_content:
+        return "chore"
+
+    diff_lines = diff_content.lower().splitlines()
+    type_counter = Counter()
+
+    for line in diff_lines:
+        if not (line.startswith("+") or line.startswith("-")):
+            continue
+
+        if is_comment_line(line):
+            if "fix" in line or "bug" in line or "error" in line or "typo" in line:
+                type_counter["fix"] += 0.5
+            if "refactor" in line:
+                type_counter["refactor"] += 0.5
+            continue
+
+        if "fix" in line or "bug" in line or "error" in line or "typo" in line:
+            type_counter["fix"] += 1
+        if "function" in line or "def " in line or "class " in line:
+            type_counter["feat"] += 2
+        if "refactor" in line or ("remove" in line and len(line) > 30):
+            type_counter["refactor"] += 1
+        if ".md" in line or "documentation" in line:
+            type_counter["docs"] += 1
+        if ".css" in line or ".scss" in line or ".html" in line:
+            type_counter["style"] += 1
+        if ".json" in line or ".yml" in line or "config" in line or "build" in line:
+            type_counter["chore"] += 1
+
+    if not type_counter:
+        return "chore"
+
+    selected_type, _ = type_counter.most_common(1)[0]
+    return selected_type
+
+
+def make_diff(target_bytes: int, seed: int) -> tuple[str, list[NumStat]]:
+    rng = random.Random(seed)
+    parts: list[str] = []
+    stats: list[NumStat] = []
+    size = 0
+    i = 0
+    while size < target_bytes:
+        template, lines = FILE_KINDS[i % len(FILE_KINDS)]
+        path = template.format(i=i)
+        count = rng.randint(50, 400)
+        body = [f"{rng.choice('+-')}{rng.choice(lines).format(n=n)}" for n in range(count)]
+        added = sum(1 for line in body if line[0] == "+")
+        section = "\n".join([f"diff --git a/{path} b/{path}", f"--- a/{path}", f"+++ b/{path}", f"@@ -1,{count} +1,{count} @@", *body])
+        parts.append(section)
+        stats.append(NumStat(path, added, count - added))
+        size += len(section) + 1
+        i += 1
+    return "\n".join(parts), stats
+
+
+def timed(fn, rounds: int) -> tuple[float, str]:
+    samples = []
+    result = ""
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark fallback commit type detection")
+    parser.add_argument("--mb", type=float, default=50.0)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    diff, stats = make_diff(int(args.mb * 1024 * 1024), args.seed)
+    mb = len(diff) / (1024 * 1024)
+    print(f"Synthetic diff: {mb:.1f} MB, {len(stats)} files\n")
+
+    rows = [
+        ("legacy", lambda: legacy_detect_commit_type_from_diff(diff)),
+        ("single-pass", lambda: detect_commit_type(diff)),
+        ("numstat only", lambda: detect_commit_type_from_numstat(stats)),
+    ]
+    print(f"{'detector':<14} {'median ms':>10} {'MB/s':>8}  type")
+    for label, fn in rows:
+        seconds, result = timed(fn, args.rounds)
+        print(f"{label:<14} {seconds * 1000:>10.1f} {mb / seconds:>8.1f}  {result}")
+
+
+if __name__ == "__main__":
+    main()
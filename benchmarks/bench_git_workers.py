@@ -0,0 +1,84 @@
+# benchmarks/bench_git_workers.py
+"""
+Read-only git queries through run_command: one subprocess per query vs the
+long-lived helper pool (DEVTOOLS_GIT_BACKEND=pool / run.py --git-pool).
+
+    python -m benchmarks.bench_git_workers --repos 20 --rounds 10
+"""
+
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+
+from utils import common
+from utils.git_workers import get_pool
+
+QUERIES = [
+    ["git", "rev-parse", "HEAD"],
+    ["git", "rev-parse", "origin/main"],
+    ["git", "show-ref", "--verify", "--quiet", "refs/heads/main"],
+    ["git", "symbolic-ref", "refs/remotes/origin/HEAD"],
+    ["git", "tag", "--list", "v*.*.*", "--sort=-v:refname"],
+    ["git", "tag", "--sort=-creatordate"],
+]
+
+
+def make_repo(path: str, tags: int) -> None:
+    def git(*args: str) -> None:
+        subprocess.run(
+            ["git", "-c", "user.name=bench", "-c", "user.email=bench@example.com", *args],
+            cwd=path,
+            check=True,
+            capture_output=True,
+        )
+
+    os.makedirs(path)
+    git("init", "-q", "-b", "main")
+    git("commit", "-q", "--allow-empty", "-m", "init")
+    for i in range(tags):
+        git("tag", f"v1.{i}.0")
+    git("update-ref", "refs/remotes/origin/main", "HEAD")
+    git("symbolic-ref", "refs/remotes/origin/HEAD", "refs/remotes/origin/main")
+
+
+def run_queries(repos: list[str], rounds: int) -> tuple[float, int]:
+    start = time.perf_counter()
+    calls = 0
+    for _ in range(rounds):
+        for repo in repos:
+            for query in QUERIES:
+                common.run_command(query, cwd=repo, silent=True)
+                calls += 1
+    return time.perf_counter() - start, calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the git helper pool")
+    parser.add_argument("--repos", type=int, default=20)
+    parser.add_argument("--tags", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="devtools-bench-") as tmp:
+        repos = [os.path.join(tmp, f"repo-{i}") for i in range(args.repos)]
+        for repo in repos:
+            make_repo(repo, args.tags)
+
+        common.set_command_backend("subprocess")
+        spawn_seconds, calls = run_queries(repos, args.rounds)
+
+        common.set_command_backend("pool")
+        pool_seconds, _ = run_queries(repos, args.rounds)
+        stats = get_pool().stats()
+        get_pool().close()
+
+    print(f"{'backend':<12} {'seconds':>9} {'git spawns':>11}")
+    print(f"{'subprocess':<12} {spawn_seconds:>9.2f} {calls:>11}")
+    print(f"{'pool':<12} {pool_seconds:>9.2f} {stats['helpers_spawned'] + stats['fallback']:>11}")
+    print(f"\nqueries: {calls}, served by pool: {stats['served']}, fallbacks: {stats['fallback']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# benchmarks/bench_llm.py
+"""
+End-to-end commit / PR generation against the fake Ollama server: latency and
+model calls per generation for staged diffs of growing size, streamed and not.
+
+    python -m benchmarks.bench_llm --rounds 10 --tokens-per-second 60 --malformed-rate 0.1
+"""
+
+import argparse
+import os
+import statistics
+import time
+from unittest import mock
+
+from benchmarks.fake_ollama import FakeOllama, FakeOllamaConfig
+from core import generation, llm_cache
+from core.commit import generate_commit_message_with_ollama
+from core.merge import generate_pr_text_with_ollama
+from core.ollama import OllamaClient, set_default_client
+from core.staged_diff import StagedChange
+
+# (label, files, changed lines per file)
+DIFF_SIZES = [
+    ("small", 2, 10),
+    ("medium", 10, 80),
+    ("large", 40, 400),
+]
+
+
+def make_diff(files: int, lines: int) -> tuple[list[str], str]:
+    paths = [f"src/module_{i}.py" for i in range(files)]
+    parts = []
+    for path in paths:
+        parts.append(f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n@@ -1,{lines} +1,{lines} @@")
+        parts.extend(f"-    value_{n} = compute_old({n})\n+    value_{n} = compute_new({n}, cache=True)" for n in range(lines))
+    return paths, "\n".join(parts)
+
+
+def _p95(samples: list[float]) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+def run_case(fake: FakeOllama, generate, rounds: int) -> tuple[list[float], float]:
+    before = fake.requests["/api/chat"]
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        generate()
+        samples.append(time.perf_counter() - start)
+    return samples, (fake.requests["/api/chat"] - before) / rounds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark commit/PR generation on a fake Ollama")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    config = FakeOllamaConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        malformed_rate=args.malformed_rate,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    llm_cache.set_llm_cache(False)
+
+    with FakeOllama(config) as fake, mock.patch("builtins.print"):
+        client = OllamaClient(host=fake.host, model="fake")
+        previous = set_default_client(client)
+        rows = []
+        try:
+            for stream in ("1", "0"):
+                os.environ["OLLAMA_STREAM"] = stream
+                for label, files, lines in DIFF_SIZES:
+                    paths, diff = make_diff(files, lines)
+                    change = StagedChange.from_patch(diff)
+                    summary = "\n".join(f"- feat: change {path}" for path in paths)
+                    cases = [
+                        ("commit", lambda: generate_commit_message_with_ollama("bench", change, show_status=False)),
+                        ("pr", lambda: generate_pr_text_with_ollama("bench", summary)),
+                    ]
+                    for kind, generate in cases:
+                        samples, calls = run_case(fake, generate, args.rounds)
+                        rows.append((kind, label, len(diff), stream == "1", samples, calls))
+        finally:
+            set_default_client(previous)
+            client.close()
+            os.environ.pop("OLLAMA_STREAM", None)
+
+    print(f"{'kind':<7} {'diff':<7} {'chars':>8} {'stream':>7} {'mean ms':>9} {'p95 ms':>8} {'calls':>6}")
+    for kind, label, chars, stream, samples, calls in rows:
+        mean_ms = statistics.mean(samples) * 1000
+        p95_ms = _p95(samples) * 1000
+        print(f"{kind:<7} {label:<7} {chars:>8} {'yes' if stream else 'no':>7} {mean_ms:>9.1f} {p95_ms:>8.1f} {calls:>6.2f}")
+    print(f"\nrungs: {generation.format_rung_stats() or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# benchmarks/bench_repositories.py
+"""
+Repository discovery benchmark: legacy one-level listdir scan vs the scandir engine.
+
+    python -m benchmarks.bench_repositories --roots 3 --groups 20 --repos 25
+
+The scandir variants run without the on-disk index except for the last row, which
+measures a warm index (the state every stage after the first one sees).
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from unittest import mock
+
+from core.repositories import ScanOptions, discover_git_repositories, iter_repositories_by_root
+
+
+def legacy_iter_git_repositories(root_dir: str):
+    # Verbatim copy of the pre-scandir implementation, kept as the baseline.
+    if not os.path.isdir(root_dir):
+        return
+    for repo_name in sorted(os.listdir(root_dir)):
+        repo_path = os.path.join(root_dir, repo_name)
+        if os.path.isdir(repo_path):
+            git_entry = os.path.join(repo_path, ".git")
+            if os.path.isdir(git_entry) or os.path.isfile(git_entry):
+                yield repo_name, repo_path
+
+
+def build_tree(base: str, groups: int, repos: int, files: int) -> None:
+    """
+    <base>/repo-<n>                 flat repos (what the legacy scan sees)
+    <base>/group-<g>/repo-<n>       nested groups
+    <base>/group-<g>/repo-0/node_modules/...   pruned noise
+    """
+    for r in range(repos):
+        _make_repo(os.path.join(base, f"repo-{r}"), files)
+    for g in range(groups):
+        group = os.path.join(base, f"group-{g}")
+        for r in range(repos):
+            _make_repo(os.path.join(group, f"repo-{r}"), files)
+        noise = os.path.join(group, "node_modules", "pkg", "lib")
+        os.makedirs(noise, exist_ok=True)
+
+
+def _make_repo(path: str, files: int) -> None:
+    os.makedirs(os.path.join(path, ".git"), exist_ok=True)
+    for i in range(files):
+        with open(os.path.join(path, f"file-{i}.txt"), "w", encoding="utf-8") as fh:
+            fh.write("x")
+
+
+def timed(fn, rounds: int) -> tuple[float, int]:
+    samples = []
+    count = 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        count = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark repository discovery")
+    parser.add_argument("--roots", type=int, default=3)
+    parser.add_argument("--groups", type=int, default=20)
+    parser.add_argument("--repos", type=int, default=25)
+    parser.add_argument("--files", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="devtools-bench-") as tmp:
+        os.environ["DEVTOOLS_CACHE_DIR"] = os.path.join(tmp, "cache")
+        roots = []
+        for i in range(args.roots):
+            root = os.path.join(tmp, f"root-{i}")
+            build_tree(root, args.groups, args.repos, args.files)
+            roots.append(root)
+
+        def legacy() -> int:
+            return sum(1 for root in roots for _ in legacy_iter_git_repositories(root))
+
+        def scandir_flat() -> int:
+            opts = ScanOptions(max_depth=1)
+            return sum(1 for root in roots for _ in discover_git_repositories(root, opts, use_index=False))
+
+        def scandir_recursive() -> int:
+            return sum(1 for root in roots for _ in discover_git_repositories(root, use_index=False))
+
+        def scandir_concurrent() -> int:
+            with mock.patch("core.repositories.REPO_INDEX_ENABLED", False):
+                return sum(1 for _, repos in iter_repositories_by_root(roots) for _ in repos)
+
+        def indexed_warm() -> int:
+            return sum(1 for root in roots for _ in discover_git_repositories(root, use_index=True))
+
+        rows = [
+            ("legacy listdir (depth 1)", *timed(legacy, args.rounds)),
+            ("scandir (depth 1)", *timed(scandir_flat, args.rounds)),
+            ("scandir recursive", *timed(scandir_recursive, args.rounds)),
+            ("scandir recursive, roots concurrent", *timed(scandir_concurrent, args.rounds)),
+        ]
+        indexed_warm()  # cold pass writes the index
+        rows.append(("recursive, warm on-disk index", *timed(indexed_warm, args.rounds)))
+
+    print(f"{'variant':<40} {'median ms':>10} {'repos':>7}")
+    for label, seconds, count in rows:
+        print(f"{label:<40} {seconds * 1000:>10.2f} {count:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+# benchmarks/fake_ollama.py
+"""
+Local stand-in for the Ollama HTTP API, for benchmarks and tests of the LLM path.
+
+Serves /api/chat (stream and non-stream), plus /api/ps, /api/show and
+/api/generate for the warm-up. Answers are canned commit / PR texts shaped after
+the request (JSON schema, "json" format or plain prompt). Latency, token rate,
+malformed-JSON rate and HTTP error rate are configurable; `script` forces the
+outcome of the next requests in order ("ok", "malformed", "error").
+
+    python -m benchmarks.fake_ollama --port 11435 --tokens-per-second 40
+    OLLAMA_HOST=http://127.0.0.1:11435 python run.py --dry-run
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COMMIT_ANSWER = {
+    "commit": {
+        "type": "feat",
+        "scope": "core",
+        "subject": "add generated change summary",
+        "body": "- update generated modules\n- adjust callers",
+        "breaking": False,
+    }
+}
+PR_ANSWER = {
+    "mr": {
+        "title": "Release latest changes",
+        "description": "## What\n- Latest commits\n\n## Why\n- Release\n\n## Testing\n- Not provided\n\n## Notes\n- N/A",
+    }
+}
+COMMIT_PLAIN = "feat(core): add generated change summary\n\n- update generated modules"
+PR_PLAIN = "TITLE: Release latest changes\n## What\n- Latest commits\n## Why\n- Release\n## Testing\n- Not provided\n## Notes\n- N/A"
+
+
+@dataclass
+class FakeOllamaConfig:
+    latency: float = 0.0  # seconds before the first byte of every answer
+    tokens_per_second: float = 0.0  # 0 = whole answer at once
+    malformed_rate: float = 0.0  # share of JSON answers cut mid-object
+    error_rate: float = 0.0  # share of chat requests answered with error_status
+    error_status: int = 500
+    loaded: bool = False  # reported by /api/ps
+    seed: int | None = None
+    script: list[str] = field(default_factory=list)
+
+
+def _tokens(text: str, size: int = 4) -> list[str]:
+    return [text[i : i + size] for i in range(0, len(text), size)] or [""]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_FakeHTTPServer"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _send_json(self, status: int, data: dict) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self) -> None:
+        fake = self.server.fake
+        fake.count(self.path)
+        if self.path == "/api/ps":
+            models = [{"name": "fake:latest", "model": "fake:latest"}] if fake.config.loaded else []
+            self._send_json(200, {"models": models})
+            return
+        self._send_json(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        fake = self.server.fake
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        fake.count(self.path, payload)
+        if self.path == "/api/show":
+            self._send_json(200, {"details": {"family": "fake"}})
+        elif self.path == "/api/generate":
+            time.sleep(fake.config.latency)
+            fake.config.loaded = True
+            self._send_json(200, {"model": payload.get("model"), "done": True, "done_reason": "load"})
+        elif self.path == "/api/chat":
+            self._chat(payload)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def _chat(self, payload: dict) -> None:
+        fake = self.server.fake
+        outcome = fake.next_outcome()
+        time.sleep(fake.config.latency)
+        if outcome == "error":
+            self._send_json(fake.config.error_status, {"error": "fake failure"})
+            return
+
+        content = fake.answer(payload, malformed=outcome == "malformed")
+        tokens = _tokens(content)
+        delay = 1.0 / fake.config.tokens_per_second if fake.config.tokens_per_second > 0 else 0.0
+        model = payload.get("model", "fake")
+
+        if not payload.get("stream", True):
+            time.sleep(delay * len(tokens))
+            self._send_json(200, {"model": model, "message": {"role": "assistant", "content": content}, "done": True})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for token in tokens:
+                time.sleep(delay)
+                line = {"model": model, "message": {"role": "assistant", "content": token}, "done": False}
+                self._write_chunk(json.dumps(line).encode("utf-8") + b"\n")
+            done = {"model": model, "message": {"role": "assistant", "content": ""}, "done": True}
+            self._write_chunk(json.dumps(done).encode("utf-8") + b"\n")
+            self._write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stops reading once it has a complete object.
+            self.close_connection = True
+
+
+class _FakeHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    fake: "FakeOllama"
+
+
+class FakeOllama:
+    """
+    with FakeOllama(FakeOllamaConfig(malformed_rate=0.2)) as fake:
+        client = OllamaClient(host=fake.host, model="fake")
+    """
+
+    def __init__(self, config: FakeOllamaConfig | None = None, port: int = 0) -> None:
+        self.config = config or FakeOllamaConfig()
+        self._random = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self.requests: Counter = Counter()
+        self.payloads: list[dict] = []
+        self._server = _FakeHTTPServer(("127.0.0.1", port), _Handler)
+        self._server.fake = self
+        self._thread: threading.Thread | None = None
+
+    @property
+    def host(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self) -> "FakeOllama":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Foreground mode (CLI): blocks until interrupted."""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeOllama":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def count(self, path: str, payload: dict | None = None) -> None:
+        with self._lock:
+            self.requests[path] += 1
+            if payload is not None and path == "/api/chat":
+                self.payloads.append(payload)
+
+    def next_outcome(self) -> str:
+        with self._lock:
+            if self.config.script:
+                return self.config.script.pop(0)
+            roll = self._random.random()
+            if roll < self.config.error_rate:
+                return "error"
+            if self._random.random() < self.config.malformed_rate:
+                return "malformed"
+            return "ok"
+
+    @staticmethod
+    def answer(payload: dict, malformed: bool = False) -> str:
+        fmt = payload.get("format")
+        messages = payload.get("messages") or []
+        system = messages[0].get("content", "") if messages else ""
+        is_pr = "mr" in (fmt.get("properties") or {}) if isinstance(fmt, dict) else ('"mr"' in system or "TITLE:" in system)
+
+        if not fmt:
+            return PR_PLAIN if is_pr else COMMIT_PLAIN
+        text = json.dumps(PR_ANSWER if is_pr else COMMIT_ANSWER)
+        # Broken JSON with no plain-text commit/PR to recover either
+        return text[: len(text) // 2] if malformed else text
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake Ollama server")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    args = parser.parse_args()
+
+    config = FakeOllamaConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        malformed_rate=args.malformed_rate,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+    )
+    fake = FakeOllama(config, port=args.port)
+    print(f"Fake Ollama listening on {fake.host} (Ctrl+C to stop)")
+    fake.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
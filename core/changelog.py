@@ -1,4 +1,5 @@
 import os
+from contextlib import nullcontext
 from datetime import datetime
 from collections import defaultdict
 
@@ -8,7 +9,9 @@ from rich.console import Console
 
 from core.config import CHANGELOG_FILENAME, DEFAULT_REMOTE, ROOT_DIRS
 from core.conventional_commits import parse_conventional_commit
-from core.repositories import iter_git_repositories
+from core.refs import RefsUnavailable, current_branch, list_refs
+from core.repositories import iter_repositories_by_root
+from core.staged_diff import read_staged_change
 from utils.common import prepend_text_file, run_command, run_command_checked
 from utils.console import ask_yes_no
 
@@ -40,15 +43,21 @@ def run_git_command(path: str, args: list[str]) -> str:
 
 
 def get_current_branch(path: str) -> str:
-    return run_git_command(path, ["branch", "--show-current"])
-
-
-def get_staged_files(path: str) -> list[str]:
-    output = run_git_command(path, ["diff", "--cached", "--name-only"])
-    return [line.strip() for line in output.splitlines() if line.strip()]
+    try:
+        return current_branch(path)
+    except RefsUnavailable:
+        return run_git_command(path, ["branch", "--show-current"])
 
 
 def get_last_tag(path: str) -> str | None:
+    # Ordering by creator date needs the tag objects, so only the 0/1 tag cases skip git.
+    try:
+        tag_refs = list_refs(path, "refs/tags/")
+        if len(tag_refs) <= 1:
+            return next(iter(tag_refs))[len("refs/tags/"):] if tag_refs else None
+    except RefsUnavailable:
+        pass
+
     tags = run_git_command(path, ["tag", "--sort=-creatordate"]).splitlines()
     return tags[0] if tags else None
 
@@ -105,25 +114,31 @@ def update_changelog(repo_path: str, changelog_content: str) -> bool:
     return prepend_text_file(changelog_path, changelog_content)
 
 
-def commit_and_push_changelog(repo_path: str) -> bool:
+def commit_and_push_changelog(repo_path: str, show_status: bool = True) -> bool:
     branch = get_current_branch(repo_path)
     if not branch:
         print("❌ Could not resolve the current branch. Changelog push skipped.")
         return False
 
-    with console.status("[bold green]Committing and pushing changelog...", spinner="dots"):
+    status = (
+        console.status("[bold green]Committing and pushing changelog...", spinner="dots")
+        if show_status
+        else nullcontext()
+    )
+    with status:
         try:
             run_command_checked(
                 ["git", "add", "--", CHANGELOG_FILENAME],
                 cwd=repo_path,
                 context=f"stage {CHANGELOG_FILENAME}",
             )
-            staged_files = set(get_staged_files(repo_path))
-            if not staged_files:
+            # numstat only: the guard needs paths, not the patch
+            staged = read_staged_change(repo_path, max_bytes=0)
+            if not staged.files:
                 print("⚪ No changelog changes staged.")
                 return False
-            if staged_files != {CHANGELOG_FILENAME}:
-                extras = ", ".join(sorted(staged_files - {CHANGELOG_FILENAME}))
+            if not staged.only(CHANGELOG_FILENAME):
+                extras = ", ".join(sorted(set(staged.paths) - {CHANGELOG_FILENAME}))
                 print(f"⚠️ Other staged files detected ({extras}). Commit aborted to avoid bundling unrelated changes.")
                 return False
 
@@ -149,14 +164,14 @@ def commit_and_push_changelog(repo_path: str) -> bool:
 def update_all_repos_interactive(root_dirs: list[str]) -> None:
     print("\n🔄 Scanning repos for changelog updates\n")
 
-    for root_dir in root_dirs:
+    for root_dir, repos in iter_repositories_by_root(root_dirs):
         print(f"\n📂 Scanning root directory: {root_dir}\n")
         if not os.path.isdir(root_dir):
             print(f"⚠️ Root directory not found: {root_dir}")
             continue
 
         found_repos = False
-        for repo, repo_path in iter_git_repositories(root_dir):
+        for repo, repo_path in repos:
             found_repos = True
 
             last_tag = get_last_tag(repo_path)
@@ -0,0 +1,205 @@
+# core/classifier.py
+"""
+Rule-based commit messages for trivially classifiable diffs (lockfiles, version
+bumps, docs, CI, build files, Unity assets), served without calling the model.
+"""
+
+import os
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+
+from core.diff_budget import DOC_SUFFIXES, LOCKFILE_NAMES, FileDiff, parse_diff
+
+MIN_CONFIDENCE = 0.9
+
+MANIFEST_NAMES = frozenset({
+    "package.json", "pyproject.toml", "Pipfile", "Cargo.toml", "go.mod", "Gemfile", "composer.json",
+    "setup.cfg", "manifest.json",  # Unity Packages/manifest.json
+})
+VERSION_FILE_NAMES = frozenset({"VERSION", "version.txt", "version.py", "_version.py", "ProjectSettings.asset"})
+BUILD_NAMES = frozenset({
+    "Dockerfile", "Makefile", "CMakeLists.txt", "docker-compose.yml", "docker-compose.yaml", ".dockerignore",
+    "build.gradle", "settings.gradle", "build.gradle.kts", "setup.py", "Directory.Build.props",
+})
+UNITY_ASSET_SUFFIXES = (
+    ".meta", ".asset", ".prefab", ".unity", ".mat", ".anim", ".controller", ".physicmaterial",
+    ".shadergraph", ".overridecontroller", ".mask", ".lighting", ".spriteatlas",
+)
+CI_PREFIXES = (".github/workflows/", ".gitlab/", ".circleci/", ".buildkite/")
+CI_NAMES = frozenset({".gitlab-ci.yml", "azure-pipelines.yml", "Jenkinsfile", ".travis.yml", "bitbucket-pipelines.yml"})
+
+_DIFF_PATH_RE = re.compile(r"^diff --git a/.* b/(.*)$", re.MULTILINE)
+VERSION_LINE_RE = re.compile(
+    r"""^\s*(?:
+        "version"\s*:\s*"(?P<json>[^"]+)",?
+        | version\s*=\s*["'](?P<toml>[^"']+)["']
+        | __version__\s*=\s*["'](?P<py>[^"']+)["']
+        | <Version>(?P<xml>[^<]+)</Version>
+        | bundleVersion:\s*(?P<unity>\S+)
+        | v?(?P<bare>\d+\.\d+\.\d+[\w.+-]*)
+    )\s*$""",
+    re.IGNORECASE | re.VERBOSE,
+)
+DEPENDENCY_LINE_RE = re.compile(
+    r"""^\s*(?:
+        "(?!(?:name|version|description|main|license|author|homepage|type|private)")
+        [@\w./-]+"\s*:\s*"[^"]*",?                        # package.json / composer.json
+        | "[\w.\-\[\]]+\s*(?:[<>=!~^]=?\s*[\w.*+-]+\s*,?\s*)*",?  # pyproject dependency arrays
+        | [\w.\-\[\],]+\s*(?:==|>=|<=|~=|!=|=|>|<|\^)\s*["']?[^\s"']+["']?,?  # requirements / toml pins
+        | [\w.-]+\s*=\s*\{[^}]*\},?                          # toml tables
+        | (?:require\s+)?[\w.-]+/[\w./-]+\s+v\S+             # go.mod
+        | gem\s+["'][\w.-]+["'](?:\s*,\s*["'][^"']*["'])*    # Gemfile
+        | [}\]{\[],?                                          # surrounding brackets
+    )\s*$""",
+    re.VERBOSE,
+)
+
+
+@dataclass(frozen=True)
+class Classification:
+    rule: str  # "deps", "release", "docs", "ci", "build", "assets"
+    message: str
+    confidence: float
+
+
+def category(path: str) -> str:
+    name = os.path.basename(path)
+    lowered = path.lower()
+    if name in LOCKFILE_NAMES:
+        return "lockfile"
+    if name in MANIFEST_NAMES or re.fullmatch(r"requirements[\w.-]*\.(txt|in)", name):
+        return "manifest"
+    if name in VERSION_FILE_NAMES:
+        return "version"
+    if lowered.startswith(CI_PREFIXES) or name in CI_NAMES:
+        return "ci"
+    if lowered.endswith(DOC_SUFFIXES) or lowered.startswith("docs/") or name in ("LICENSE", "CHANGELOG"):
+        return "docs"
+    if lowered.endswith(UNITY_ASSET_SUFFIXES):
+        return "asset"
+    if name in BUILD_NAMES or lowered.endswith((".gradle", ".cmake")):
+        return "build"
+    return "other"
+
+
+def _changed_lines(file: FileDiff) -> list[str]:
+    return [line[1:] for hunk in file.hunks for line in hunk[1:] if line[:1] in "+-" and line[1:].strip()]
+
+
+def _describe(files: list[FileDiff], noun: str) -> str:
+    names = [f.path for f in files]
+    if len(names) == 1:
+        text = names[0]
+    elif len(names) == 2:
+        text = f"{names[0]} and {names[1]}"
+    else:
+        text = f"{len(names)} {noun}"
+    return text if len(text) <= 56 else f"{len(names)} {noun}"
+
+
+def _message(header: str, files: list[FileDiff]) -> str:
+    body = [f"- {f.summary}" for f in files[:6]]
+    if len(files) > 6:
+        body.append(f"- ... (+{len(files) - 6} more)")
+    return f"{header}\n\n" + "\n".join(body)
+
+
+def _new_version(files: list[FileDiff]) -> str | None:
+    """
+    Version from the first added version line, when every changed line of the
+    manifests / version files / assets is one (docs and lockfiles may change freely).
+    """
+    found = None
+    for file in files:
+        if category(file.path) in ("docs", "lockfile"):
+            continue
+        for hunk in file.hunks:
+            for line in hunk[1:]:
+                if line[:1] not in "+-" or not line[1:].strip():
+                    continue
+                match = VERSION_LINE_RE.match(line[1:])
+                if match is None:
+                    return None
+                if line[0] == "+" and found is None:
+                    found = next(value for value in match.groupdict().values() if value)
+    return found
+
+
+def classify_files(files: list[FileDiff]) -> Classification | None:
+    if not files:
+        return None
+    categories = {category(f.path) for f in files}
+    if "other" in categories:
+        return None
+    # The deps / release rules read changed lines: an omitted manifest cannot be checked.
+    if any(f.omitted and category(f.path) in ("manifest", "version") for f in files):
+        return None
+
+    # Before deps: a bumped "version" key also looks like a dependency pin.
+    if categories <= {"lockfile", "manifest", "version", "docs", "asset"} and categories & {"manifest", "version", "asset"}:
+        version = _new_version(files)
+        if version:
+            return Classification("release", _message(f"chore(release): bump version to {version}", files), 0.95)
+
+    if categories <= {"lockfile", "manifest"}:
+        manifests = [f for f in files if category(f.path) == "manifest"]
+        if all(DEPENDENCY_LINE_RE.match(line) for f in manifests for line in _changed_lines(f)):
+            subject = "update dependencies" if manifests else f"update {_describe(files, 'lockfiles')}"
+            return Classification("deps", _message(f"chore(deps): {subject}", files), 0.95 if manifests else 0.99)
+
+    if categories == {"docs"}:
+        return Classification("docs", _message(f"docs: update {_describe(files, 'documentation files')}", files), 0.95)
+    if categories == {"ci"}:
+        return Classification("ci", _message(f"ci: update {_describe(files, 'CI workflows')}", files), 0.95)
+    if categories == {"build"}:
+        return Classification("build", _message(f"build: update {_describe(files, 'build files')}", files), 0.9)
+    if categories == {"asset"}:
+        only_new_meta = all(f.path.endswith(".meta") and f.deleted == 0 for f in files)
+        subject = "add Unity meta files" if only_new_meta else f"update {_describe(files, 'Unity assets')}"
+        return Classification("assets", _message(f"chore(assets): {subject}", files), 0.9)
+    return None
+
+
+def classify_diff(diff: str) -> Classification | None:
+    # Paths first: any source file rules the fast path out without parsing hunks.
+    paths = _DIFF_PATH_RE.findall(diff)
+    if not paths or any(category(path) == "other" for path in paths):
+        return None
+    return classify_files(parse_diff(diff))
+
+
+# repo -> rule that served it (a repo regenerated after a re-stage counts once)
+_SERVED: dict[str, str] = {}
+_SERVED_LOCK = threading.Lock()
+
+
+def fast_path_commit_message(repo: str, files: list[FileDiff]) -> Classification | None:
+    """Classification confident enough to skip the model (recorded for repo), else None."""
+    result = classify_files(files)
+    if result is None or result.confidence < MIN_CONFIDENCE:
+        return None
+    with _SERVED_LOCK:
+        _SERVED[repo] = result.rule
+    return result
+
+
+def fast_path_stats() -> dict[str, int]:
+    with _SERVED_LOCK:
+        return dict(Counter(_SERVED.values()))
+
+
+def reset_fast_path_stats() -> None:
+    with _SERVED_LOCK:
+        _SERVED.clear()
+
+
+def format_fast_path_stats() -> str:
+    """e.g. "3 repos (deps 2, docs 1)"; empty when the fast path was never taken."""
+    stats = fast_path_stats()
+    total = sum(stats.values())
+    if not total:
+        return ""
+    detail = ", ".join(f"{rule} {count}" for rule, count in sorted(stats.items()))
+    return f"{total} repo{'s' if total > 1 else ''} ({detail})"
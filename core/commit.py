@@ -1,19 +1,49 @@
 import os
 import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import nullcontext
+from dataclasses import dataclass
 from datetime import datetime
-from collections import Counter
+from typing import Iterator
 from rich.console import Console
 
-from utils.common import env_int, run_command, trim_text_middle
-from utils.console import ask_yes_no
-from core.config import DEFAULT_HEAD_BRANCH, ROOT_DIRS
-from core.repositories import iter_git_repositories
-from core.ollama import chat_json, OllamaError
-from core.prompts import COMMIT_SYSTEM, COMMIT_USER_TEMPLATE
-from core.formatters import safe_parse_json, build_conventional_commit
+from utils.common import env_int, run_command
+from utils.profiling import profile_repo
+from utils.console import ask_yes_no, collect_notices, notice
+from utils.daemon_pool import DaemonPool
+from core.config import COMMIT_PREFETCH_DEPTH, COMMIT_PREFETCH_WORKERS, DEFAULT_HEAD_BRANCH, ROOT_DIRS
+from core.repositories import iter_repositories_by_root
+from core.snapshot import collect_snapshot
+from core.staged_diff import StagedChange, read_staged_change
+from core.staging import fast_git_config, stage_interactively
+from core import llm_cache
+from core.classifier import fast_path_commit_message
+from core.commit_type import detect_commit_type_from_files, detect_commit_type_from_numstat
+from core.diff_budget import compact_diff, estimate_tokens
+from core.diff_summary import map_reduce_threshold, summarize_diff
+from core.generation import GenerationTask, generate, resolve_deadline
+from core.ollama import (
+    GenerationCancelled,
+    OllamaClient,
+    OllamaError,
+    estimate_prompt_tokens,
+    get_default_client,
+    pick_num_ctx,
+)
+from core.prompts import COMMIT_PLAIN_SYSTEM, COMMIT_REDUCE_TEMPLATE, COMMIT_SYSTEM, COMMIT_USER_TEMPLATE
+from core.formatters import COMMIT_SCHEMA, safe_parse_json, build_conventional_commit
 
 console = Console()
 
+# (root_dir, None) when a root starts, then (root_dir, (repo, repo_path)) per repo found
+_Discovered = tuple[str, tuple[str, str] | None]
+
+# Token cap for a commit answer: the JSON object with a subject and a few bullets.
+COMMIT_NUM_PREDICT = 320
+
 COMMIT_HEADER_RE = re.compile(
     r"^(feat|fix|refactor|docs|test|chore|perf|ci|build|style|ui)(\([^)]+\))?(!)?: .+$",
     re.IGNORECASE,
@@ -73,196 +103,170 @@ def extract_plain_commit(raw: str) -> str | None:
         return f"{header}\n\n" + "\n".join(body_lines)
     return header
 
-def is_comment_line(line: str) -> bool:
-    stripped = line.lstrip()
-    return (
-        stripped.startswith("#")
-        or stripped.startswith("//")
-        or stripped.startswith("/*")
-        or stripped.startswith("*")
-    )
-
-
-def git_status_porcelain(path: str) -> list[str]:
-    """
-    Returns lines like:
-      ' M file.txt' (unstaged)
-      'M  file.txt' (staged)
-      '?? file.txt' (untracked)
-    """
-    out = run_command(["git", "status", "--porcelain"], cwd=path).stdout or ""
-    lines = [l.rstrip("\n") for l in out.splitlines() if l.strip()]
-    return lines
-
 
-def has_staged_changes(status_lines: list[str]) -> bool:
-    # XY format. If X != ' ' then staged changes exist.
-    for line in status_lines:
-        if line.startswith("??"):
-            continue
-        if len(line) >= 2 and line[0] != " ":
-            return True
-    return False
-
-
-def has_unstaged_changes(status_lines: list[str]) -> bool:
-    # If Y != ' ' then unstaged changes exist (including untracked handled below)
-    for line in status_lines:
-        if line.startswith("??"):
-            return True
-        if len(line) >= 2 and line[1] != " ":
-            return True
-    return False
-
-
-def get_diff_content_cached(path: str) -> str:
-    return (run_command(["git", "diff", "--cached"], cwd=path).stdout or "").strip()
-
-
-def get_modified_files_names_cached(path: str) -> list[str]:
-    out = (run_command(["git", "diff", "--cached", "--name-only"], cwd=path).stdout or "").strip()
-    return out.splitlines() if out else []
+def _parse_and_build_commit(raw: str) -> str | None:
+    data = safe_parse_json(raw)
+    if not data:
+        return None
+    try:
+        return build_conventional_commit(data)
+    except Exception:
+        return None
 
 
-def detect_commit_type_from_diff(diff_content: str) -> str:
-    if not diff_content:
-        return "chore"
+def _max_diff_tokens() -> int:
+    return env_int("OLLAMA_MAX_DIFF_TOKENS", 1200, minimum=200)
 
-    diff_lines = diff_content.lower().splitlines()
-    type_counter = Counter()
 
-    for line in diff_lines:
-        if not (line.startswith("+") or line.startswith("-")):
-            continue
+def commit_context_size(client: OllamaClient) -> int:
+    """
+    num_ctx a commit prompt with a full diff budget asks for; the warm-up loads the
+    model with it so the first generation does not trigger a reload.
+    """
+    template = [
+        {"role": "system", "content": COMMIT_SYSTEM},
+        {"role": "user", "content": COMMIT_USER_TEMPLATE},
+    ]
+    prompt_tokens = estimate_prompt_tokens(template) + _max_diff_tokens()
+    return pick_num_ctx(prompt_tokens, COMMIT_NUM_PREDICT, client.max_num_ctx)
+
+
+def _commit_task(messages) -> GenerationTask:
+    return GenerationTask(
+        kind="commit",
+        messages=messages,
+        schema=COMMIT_SCHEMA,
+        parse=_parse_and_build_commit,
+        recover=extract_plain_commit,
+        plain_system=COMMIT_PLAIN_SYSTEM,
+        num_predict=COMMIT_NUM_PREDICT,
+        labels=(
+            "[bold cyan]🤖 Generating commit message...[/]",
+            "[bold cyan]🤖 Retrying commit message generation...[/]",
+            "[bold cyan]🤖 Recovering commit message (plain mode)...[/]",
+        ),
+    )
 
-        if is_comment_line(line):
-            if "fix" in line or "bug" in line or "error" in line or "typo" in line:
-                type_counter["fix"] += 0.5
-            if "refactor" in line:
-                type_counter["refactor"] += 0.5
-            continue
 
-        if "fix" in line or "bug" in line or "error" in line or "typo" in line:
-            type_counter["fix"] += 1
-        if "function" in line or "def " in line or "class " in line:
-            type_counter["feat"] += 2
-        if "refactor" in line or ("remove" in line and len(line) > 30):
-            type_counter["refactor"] += 1
-        if ".md" in line or "documentation" in line:
-            type_counter["docs"] += 1
-        if ".css" in line or ".scss" in line or ".html" in line:
-            type_counter["style"] += 1
-        if ".json" in line or ".yml" in line or "config" in line or "build" in line:
-            type_counter["chore"] += 1
+def _map_reduce_commit_message(
+    repo: str,
+    files_block: str,
+    change: StagedChange,
+    show_status: bool,
+    cancel: threading.Event | None,
+) -> str | None:
+    """
+    Large diffs: summarize chunks concurrently (map), then generate the commit
+    from the summaries (reduce), both phases within one OLLAMA_DEADLINE.
+    """
+    deadline = resolve_deadline()
+    spinner = console.status("[bold cyan]🧩 Summarizing large diff...[/]", spinner="dots") if show_status else nullcontext()
+    with spinner:
+        summary = summarize_diff(repo, change.file_diffs(), cancel=cancel, deadline=deadline)
+
+    user_prompt = COMMIT_REDUCE_TEMPLATE.format(repo=repo, files=files_block, summaries=summary.render())
+    messages = [
+        {"role": "system", "content": COMMIT_SYSTEM},
+        {"role": "user", "content": user_prompt},
+    ]
+    reduce_started = time.perf_counter()
+    message = generate(
+        _commit_task(messages),
+        show_status=show_status,
+        cancel=cancel,
+        deadline=max(deadline - summary.map_seconds, 1.0),
+    )
+    notice(
+        f"🧩 Large diff: {len(summary.chunks)} parts summarized in {summary.map_seconds:.1f}s, "
+        f"reduced in {time.perf_counter() - reduce_started:.1f}s."
+    )
+    return message
 
-    if not type_counter:
-        return "chore"
 
-    selected_type, _ = type_counter.most_common(1)[0]
-    return selected_type
+def _files_block(change: StagedChange) -> str:
+    max_files = env_int("OLLAMA_MAX_FILES", 80, minimum=1)
+    lines = [f"- {f.summary}" for f in change.files[:max_files]]
+    if len(change.files) > max_files:
+        lines.append(f"- ... (+{len(change.files) - max_files} more)")
+    return "\n".join(lines) or "- (unknown)"
 
 
-def generate_commit_message_with_ollama(repo: str, files: list[str], diff_content: str) -> str | None:
+def generate_commit_message_with_ollama(
+    repo: str,
+    change: StagedChange,
+    show_status: bool = True,
+    cancel: threading.Event | None = None,
+) -> str | None:
     """
-    Returns full commit message (header + body) or None if Ollama fails / bad JSON.
+    Returns full commit message (header + body) or None if Ollama fails / bad JSON
+    or cancel gets set. Trivially classifiable diffs (lockfiles, docs, CI, version
+    bumps... see core/classifier.py) get a rule-based message without any model
+    call. Diffs above OLLAMA_MAP_REDUCE_TOKENS go through the
+    map-reduce path. Validated messages are reused from the LLM cache for
+    identical prompts. show_status=False drops the spinner (rich allows only one
+    live display, so callers generating from worker threads must disable it);
+    their messages go through notice(), held with collect_notices().
     """
-    def parse_and_build(raw: str) -> str | None:
-        data = safe_parse_json(raw)
-        if not data:
-            return None
-        try:
-            return build_conventional_commit(data)
-        except Exception:
-            return None
-
     try:
-        max_files = env_int("OLLAMA_MAX_FILES", 80, minimum=1)
-        files_for_prompt = files[:max_files]
-        files_block = "\n".join(f"- {f}" for f in files_for_prompt) or "- (unknown)"
-        if len(files) > max_files:
-            files_block += f"\n- ... (+{len(files) - max_files} more)"
-
-        max_diff_chars = env_int("OLLAMA_MAX_DIFF_CHARS", 4500, minimum=800)
-        trimmed_diff = trim_text_middle(diff_content, max_diff_chars)
+        diff_content = change.text
+        fast = fast_path_commit_message(repo, change.file_diffs())
+        if fast is not None:
+            notice(f"⚡ {repo}: {fast.rule} change, message from rules (no model call).")
+            return fast.message
+
+        files_block = _files_block(change)
+        client = get_default_client()
+        if estimate_tokens(diff_content) > map_reduce_threshold():
+            # The whole diff is the cache input: a hit skips the map phase too.
+            return llm_cache.cached_generation(
+                "commit",
+                client.model,
+                COMMIT_SYSTEM,
+                f"{repo}\n{files_block}\n{diff_content}",
+                {"map_reduce": True, "num_predict": COMMIT_NUM_PREDICT},
+                lambda: _map_reduce_commit_message(repo, files_block, change, show_status, cancel),
+            )
 
         user_prompt = COMMIT_USER_TEMPLATE.format(
             repo=repo,
             files=files_block,
-            diff=trimmed_diff,
+            diff=compact_diff(diff_content, _max_diff_tokens(), change.file_diffs()),
         )
         messages = [
             {"role": "system", "content": COMMIT_SYSTEM},
             {"role": "user", "content": user_prompt},
         ]
-
-        with console.status("[bold cyan]🤖 Generating commit message...[/]", spinner="dots"):
-            raw = chat_json(
-                messages,
-                temperature=0.2,
-                json_mode=True,
-            )
-        if os.getenv("OLLAMA_DEBUG", "0") == "1":
-            print("\n[DEBUG] Raw Ollama output (attempt 1):\n", raw, "\n")
-
-        built = parse_and_build(raw)
-        if built:
-            return built
-        plain = extract_plain_commit(raw)
-        if plain:
-            print("⚠️ Ollama JSON invalid, using plain-text commit from model output.")
-            return plain
-
-        print("⚠️ Ollama output is not valid commit JSON, retrying once.")
-        with console.status("[bold cyan]🤖 Retrying commit message generation...[/]", spinner="dots"):
-            raw_retry = chat_json(
-                messages,
-                temperature=0.0,
-                json_mode=True,
-            )
-        if os.getenv("OLLAMA_DEBUG", "0") == "1":
-            print("\n[DEBUG] Raw Ollama output (attempt 2):\n", raw_retry, "\n")
-
-        built_retry = parse_and_build(raw_retry)
-        if built_retry:
-            return built_retry
-        plain_retry = extract_plain_commit(raw_retry)
-        if plain_retry:
-            print("⚠️ Ollama JSON invalid on retry, using plain-text commit from model output.")
-            return plain_retry
-
-        plain_system = (
-            "Return ONLY a Conventional Commit message in plain text.\n"
-            "First line format: type(scope optional): subject\n"
-            "Allowed types: feat, fix, refactor, docs, test, chore, perf, ci, build, style.\n"
-            "Optional body lines must be bullets prefixed by '- '."
+        return llm_cache.cached_generation(
+            "commit",
+            client.model,
+            COMMIT_SYSTEM,
+            user_prompt,
+            {"num_ctx": client.context_size(messages, COMMIT_NUM_PREDICT), "num_predict": COMMIT_NUM_PREDICT},
+            lambda: generate(_commit_task(messages), show_status=show_status, cancel=cancel),
         )
-        with console.status("[bold cyan]🤖 Recovering commit message (plain mode)...[/]", spinner="dots"):
-            raw_plain = chat_json(
-                [
-                    {"role": "system", "content": plain_system},
-                    {"role": "user", "content": user_prompt},
-                ],
-                temperature=0.1,
-                json_mode=False,
-            )
-        if os.getenv("OLLAMA_DEBUG", "0") == "1":
-            print("\n[DEBUG] Raw Ollama output (plain recovery):\n", raw_plain, "\n")
-
-        plain_recovery = extract_plain_commit(raw_plain)
-        if plain_recovery:
-            print("⚠️ Ollama JSON invalid, plain recovery mode used.")
-            return plain_recovery
-
-        print("⚠️ Ollama returned unusable output, fallback used.")
+    except GenerationCancelled:
         return None
     except OllamaError as e:
-        print(f"⚠️ Ollama unavailable, fallback used. Reason: {e}")
+        notice(f"⚠️ Ollama unavailable, fallback used. Reason: {e}")
         return None
     except Exception as e:
-        print(f"⚠️ Ollama output invalid, fallback used. Reason: {e}")
+        notice(f"⚠️ Ollama output invalid, fallback used. Reason: {e}")
         return None
 
 
+def fallback_commit_message(change: StagedChange) -> str:
+    # Nothing of the patch kept (all generated or over budget): numstat alone
+    if change.patch_bytes == 0 and change.files:
+        commit_type = detect_commit_type_from_numstat(change.files)
+    else:
+        commit_type = detect_commit_type_from_files(change.files)
+    date_str = datetime.now().strftime("%Y-%m-%d %H:%M")
+    if change.files:
+        title_keywords = " and ".join(change.paths[:2])
+        return f"{commit_type}: update {title_keywords} ({date_str})"
+    return f"{commit_type}: auto commit based on diff analysis ({date_str})"
+
+
 def commit_with_message(repo_path: str, full_message: str) -> bool:
     """
     Commits with header + body without losing formatting.
@@ -287,104 +291,227 @@ def commit_with_message(repo_path: str, full_message: str) -> bool:
     return True
 
 
-def auto_commit_all_repos(root_dirs: list[str]):
-    print(f"\n🔄 Scanning repos in: {', '.join(root_dirs)}\n")
-    results = {"committed": 0, "pushed": 0}
+def push_head_branch(repo_path: str) -> bool:
+    res = run_command(["git", "push", "origin", DEFAULT_HEAD_BRANCH], cwd=repo_path)
+    if res.returncode != 0:
+        print(f"❌ git push failed:\n{(res.stderr or '').strip()}")
+        return False
+    return True
 
-    for root_dir in root_dirs:
-        console.print(f"\n📂 [bold yellow]Scanning root directory:[/] {root_dir}\n")
-        found_repos = False
 
-        if not os.path.isdir(root_dir):
-            print(f"⚠️ Root directory not found: {root_dir}")
-            continue
+@dataclass
+class _PrefetchJob:
+    future: Future
+    cancel: threading.Event
 
-        for repo, repo_path in iter_git_repositories(root_dir):
-            found_repos = True
 
-            # 1) Status first (key fix)
-            status_lines = git_status_porcelain(repo_path)
+def _prefetch_commit_message(
+    repo: str, repo_path: str, cancel: threading.Event
+) -> tuple[str, str | None, list[str]] | None:
+    """
+    Background half of the pipeline: (staged diff, generated message, held
+    notices), or None when the repo has nothing staged yet (the user may still
+    stage it interactively).
+    """
+    snapshot = collect_snapshot(repo_path)
+    if snapshot is None or not snapshot.has_staged_changes or cancel.is_set():
+        return None
+    change = read_staged_change(repo_path)
+    if not change.files or cancel.is_set():
+        return None
+    with profile_repo(repo), collect_notices() as notices:
+        message = generate_commit_message_with_ollama(repo, change, show_status=False, cancel=cancel)
+    return change.text, message, notices
 
-            if not status_lines:
-                print(f"⚪ {repo}: Clean working tree")
-                continue
 
-            staged = has_staged_changes(status_lines)
-            unstaged = has_unstaged_changes(status_lines)
-
-            console.print(f"\n📦 Repo: [bold green]{repo}[/]")
-            if unstaged and not staged:
-                print("🟡 Changes detected but nothing staged yet.")
-                print("   Tip: we need staged changes to build commit message from --cached.")
-
-                choice = ask_yes_no("➕ Stage ALL changes (git add -A) ?", default="n")
-                if choice:
-                    add_result = run_command(["git", "add", "-A"], cwd=repo_path)
-                    if add_result.returncode != 0:
-                        print(f"❌ git add failed:\n{(add_result.stderr or '').strip()}")
-                        continue
-                    staged = True
-                else:
-                    print("⏭️ Skipped (nothing staged).")
-                    continue
+class CommitMessagePrefetcher:
+    """
+    Generates commit messages for the current repo and the next `depth` ones in
+    background threads, while the user answers prompts. A prefetched message is
+    only used if the staged diff is still the one it was generated from; repos
+    left behind (skipped, failed, quit) get their pending work cancelled.
+    """
 
-            if not staged:
-                print("⏭️ Skipped (no staged changes).")
+    def __init__(self, depth: int = COMMIT_PREFETCH_DEPTH, workers: int = COMMIT_PREFETCH_WORKERS):
+        self.depth = depth
+        # Daemon workers: quitting never waits for a generation still in flight
+        self._pool = DaemonPool(workers, "prefetch") if depth > 0 else None
+        self._jobs: dict[str, _PrefetchJob] = {}
+
+    def schedule(self, upcoming: list[tuple[str, str]]) -> None:
+        """upcoming starts with the repo about to be processed."""
+        if self._pool is None:
+            return
+        for repo, repo_path in upcoming[: self.depth + 1]:
+            if repo_path in self._jobs:
                 continue
+            cancel = threading.Event()
+            future = self._pool.submit(_prefetch_commit_message, repo, repo_path, cancel)
+            self._jobs[repo_path] = _PrefetchJob(future, cancel)
+
+    def take(self, repo_path: str, diff_content: str) -> tuple[bool, str | None]:
+        """
+        (True, message) when a prefetch for exactly this diff exists (message may be
+        None if generation failed), else (False, None) and the caller generates inline.
+        Notices held by the prefetch are printed here, when the repo comes up.
+        """
+        job = self._jobs.pop(repo_path, None)
+        if job is None:
+            return False, None
+        try:
+            if job.future.done():
+                result = job.future.result()
+            else:
+                with console.status("[bold cyan]🤖 Generating commit message...[/]", spinner="dots"):
+                    result = job.future.result()
+        except Exception:
+            return False, None
+        if result is None or result[0] != diff_content:
+            return False, None
+        for message in result[2]:
+            print(message)
+        return True, result[1]
+
+    def discard(self, repo_path: str) -> None:
+        job = self._jobs.pop(repo_path, None)
+        if job is not None:
+            job.cancel.set()
+            job.future.cancel()
+
+    def close(self) -> None:
+        for repo_path in list(self._jobs):
+            self.discard(repo_path)
+        if self._pool is not None:
+            self._pool.shutdown()
+
+
+def _auto_commit_repo(repo: str, repo_path: str, results: dict[str, int], prefetcher: CommitMessagePrefetcher) -> None:
+    # 1) Status first (key fix)
+    snapshot = collect_snapshot(repo_path)
+    if snapshot is None:
+        print(f"❌ {repo}: git status failed, skipped.")
+        return
+
+    if not snapshot.is_dirty:
+        print(f"⚪ {repo}: Clean working tree")
+        return
+
+    staged = snapshot.has_staged_changes
+    unstaged = snapshot.has_unstaged_changes
+
+    console.print(f"\n📦 Repo: [bold green]{repo}[/]")
+    if unstaged and not staged:
+        print("🟡 Changes detected but nothing staged yet.")
+        print("   Tip: we need staged changes to build commit message from --cached.")
+
+        if not stage_interactively(repo_path, snapshot.entries):
+            print("⏭️ Skipped (nothing staged).")
+            return
+        staged = True
+
+    if not staged:
+        print("⏭️ Skipped (no staged changes).")
+        return
+
+    # 2) Now we can read the staged change (files, counts, capped patch: one git call)
+    change = read_staged_change(repo_path)
+    if not change.files:
+        print(f"⚪ {repo}: No staged diff to commit")
+        return
+
+    # 3) Generate message (prefetched or Ollama now, fallback second)
+    prefetched, commit_message = prefetcher.take(repo_path, change.text)
+    if not prefetched:
+        with profile_repo(repo):
+            commit_message = generate_commit_message_with_ollama(repo, change)
+
+    if not commit_message:
+        # fallback heuristic
+        commit_message = fallback_commit_message(change)
+
+    # 4) Preview
+    print("\n--- Preview of commit message ---\n")
+    print(commit_message)
+    print("\n--- End preview ---\n")
+
+    user_input = ask_yes_no("✍️ Do you want to commit this change?", default="n")
+    if not user_input:
+        print("⏹️ Skipped commit.")
+        return
+
+    with console.status("[bold green]Committing changes...[/]", spinner="dots"):
+        ok = commit_with_message(repo_path, commit_message)
+        if not ok:
+            return
+        results["committed"] += 1
+
+    print("✅ Commit done.\n")
+
+    push_input = ask_yes_no(f"📤 Do you want to push to {DEFAULT_HEAD_BRANCH} ?", default="n")
+    if push_input:
+        with console.status("[bold cyan]Pushing...[/]", spinner="dots"):
+            if push_head_branch(repo_path):
+                results["pushed"] += 1
+                print(f"🚀 Pushed to {DEFAULT_HEAD_BRANCH}\n")
+    else:
+        print("⏭️ Skipped git push")
+
+
+def _discovered_repos(root_dirs: list[str]) -> Iterator[_Discovered]:
+    for root_dir, repos in iter_repositories_by_root(root_dirs):
+        yield root_dir, None
+        for repo in repos:
+            yield root_dir, repo
+
+
+def _lookahead(items: Iterator[_Discovered], depth: int) -> Iterator[tuple[_Discovered, list[_Discovered]]]:
+    """
+    Each item with the ones read after it: at least one, and up to `depth` repos
+    ahead, so discovery is consumed no further than the prefetcher needs.
+    """
+    buffer: deque[_Discovered] = deque()
 
-            # 2) Now we can read cached diff
-            diff_content = get_diff_content_cached(repo_path)
-            if not diff_content:
-                print(f"⚪ {repo}: No staged diff to commit")
-                continue
+    def fill() -> None:
+        while not buffer or sum(entry is not None for _, entry in buffer) < depth:
+            item = next(items, None)
+            if item is None:
+                return
+            buffer.append(item)
 
-            files = get_modified_files_names_cached(repo_path)
-
-            # 3) Generate message (Ollama first, fallback second)
-            commit_message = generate_commit_message_with_ollama(repo, files, diff_content)
-
-            if not commit_message:
-                # fallback heuristic
-                commit_type = detect_commit_type_from_diff(diff_content)
-                date_str = datetime.now().strftime("%Y-%m-%d %H:%M")
-                if files:
-                    title_keywords = " and ".join(files[:2])
-                    commit_message = f"{commit_type}: update {title_keywords} ({date_str})"
-                else:
-                    commit_message = f"{commit_type}: auto commit based on diff analysis ({date_str})"
-
-            # 4) Preview
-            print("\n--- Preview of commit message ---\n")
-            print(commit_message)
-            print("\n--- End preview ---\n")
-
-            user_input = ask_yes_no("✍️ Do you want to commit this change?", default="n")
-            if not user_input:
-                print("⏹️ Skipped commit.")
-                continue
+    fill()
+    while buffer:
+        item = buffer.popleft()
+        fill()
+        yield item, list(buffer)
+
+
+def auto_commit_all_repos(root_dirs: list[str]):
+    print(f"\n🔄 Scanning repos in: {', '.join(root_dirs)}\n")
+    results = {"committed": 0, "pushed": 0}
 
-            with console.status("[bold green]Committing changes...[/]", spinner="dots"):
-                ok = commit_with_message(repo_path, commit_message)
-                if not ok:
+    prefetcher = CommitMessagePrefetcher()
+    # Discovery streams: only the repos the prefetcher runs ahead on are read early.
+    stream = _lookahead(_discovered_repos(root_dirs), prefetcher.depth)
+    # Untracked cache + preloaded index for every git call of the run (status, add, diff)
+    with fast_git_config():
+        try:
+            for (root_dir, repo_entry), ahead in stream:
+                if repo_entry is None:
+                    console.print(f"\n📂 [bold yellow]Scanning root directory:[/] {root_dir}\n")
+                    if not os.path.isdir(root_dir):
+                        print(f"⚠️ Root directory not found: {root_dir}")
+                    elif not ahead or ahead[0][1] is None:
+                        print(f"⚠️ No repositories found in {root_dir}")
                     continue
-                results["committed"] += 1
-
-            print("✅ Commit done.\n")
-
-            push_input = ask_yes_no(f"📤 Do you want to push to {DEFAULT_HEAD_BRANCH} ?", default="n")
-            if push_input:
-                with console.status("[bold cyan]Pushing...[/]", spinner="dots"):
-                    res = run_command(["git", "push", "origin", DEFAULT_HEAD_BRANCH], cwd=repo_path)
-                    if res.returncode != 0:
-                        print(f"❌ git push failed:\n{(res.stderr or '').strip()}")
-                    else:
-                        results["pushed"] += 1
-                        print(f"🚀 Pushed to {DEFAULT_HEAD_BRANCH}\n")
-            else:
-                print("⏭️ Skipped git push")
 
-        if not found_repos:
-            print(f"⚠️ No repositories found in {root_dir}")
+                repo, repo_path = repo_entry
+                prefetcher.schedule([repo_entry, *(entry for _, entry in ahead if entry is not None)])
+                try:
+                    _auto_commit_repo(repo, repo_path, results, prefetcher)
+                finally:
+                    prefetcher.discard(repo_path)
+        finally:
+            prefetcher.close()
 
     return results
 
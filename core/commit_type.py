@@ -0,0 +1,175 @@
+# core/commit_type.py
+"""
+Conventional Commit type guess for the fallback message: keyword hits weighted by
+file significance plus a vote from each file's path.
+"""
+
+import os
+import re
+from collections import Counter
+from typing import Iterable
+
+from core.classifier import category
+from core.diff_budget import file_weight
+from core.staged_diff import NumStat, StagedFile
+
+KEYWORD_POINTS = {"fix": 1.0, "feat": 2.0, "refactor": 1.0}
+COMMENT_POINTS = {"fix": 0.5, "feat": 0.0, "refactor": 0.5}
+PATH_POINTS = 0.1
+
+STYLE_SUFFIXES = (".css", ".scss", ".sass", ".less", ".html")
+_CATEGORY_TYPES = {
+    "docs": "docs",
+    "ci": "ci",
+    "build": "build",
+    "lockfile": "chore",
+    "manifest": "chore",
+    "version": "chore",
+    "asset": "chore",
+}
+_CONFIG_SUFFIXES = (".json", ".yml", ".yaml", ".toml", ".ini", ".cfg", ".env")
+
+KEYWORD_TYPES = {
+    b"fix": "fix", b"bug": "fix", b"error": "fix", b"typo": "fix",
+    b"function": "feat", b"def ": "feat", b"class ": "feat",
+    b"refactor": "refactor", b"remove": "refactor",
+}
+# One flat alternation over the lowercased bytes: re finds these several times
+# faster than the same alternation split into named groups or anchored per line.
+_SCAN_RE = re.compile(b"\\ndiff |" + b"|".join(re.escape(k) for k in KEYWORD_TYPES))
+_KEYWORD_RE = re.compile(b"|".join(re.escape(k) for k in KEYWORD_TYPES))
+_COMMENT_RE = re.compile(rb"[ \t]*(?:#|//|/\*|\*)")
+_OMITTED_RE = re.compile(r"^Diff (?:excluded|truncated) \([^)]*\): (?:\+(\d+) -(\d+)|binary)$")
+
+
+def path_type(path: str) -> str | None:
+    """Type a file's path alone implies, None for plain source files."""
+    kind = category(path)
+    if kind in _CATEGORY_TYPES:
+        return _CATEGORY_TYPES[kind]
+    lowered = path.lower()
+    if "test" in os.path.basename(lowered) or "/tests/" in f"/{lowered}":
+        return "test"
+    if lowered.endswith(STYLE_SUFFIXES):
+        return "style"
+    if lowered.endswith(_CONFIG_SUFFIXES):
+        return "chore"
+    return None
+
+
+def _vote_path(scores: Counter, path: str, changed: int) -> None:
+    kind = path_type(path)
+    if kind is not None:
+        scores[kind] += PATH_POINTS * max(changed, 1)
+
+
+def _changed_lines(section: bytes) -> int:
+    # "\n+++ " / "\n--- " are the file's own header lines, not changes
+    plus = section.count(b"\n+") - section.count(b"\n+++ ")
+    minus = section.count(b"\n-") - section.count(b"\n--- ")
+    return plus + minus
+
+
+def _keyword_hits(lowered: bytes) -> Counter:
+    """(type, in comment) -> changed lines holding a keyword, in one lowercased patch."""
+    hits: Counter = Counter()
+    pos = 0
+    for match in _KEYWORD_RE.finditer(lowered):
+        at = match.start()
+        if at < pos:
+            continue
+        line_start = lowered.rfind(b"\n", 0, at) + 1
+        pos = lowered.find(b"\n", at)
+        if lowered[line_start] in b"+-" and not lowered.startswith((b"+++ ", b"--- "), line_start):
+            hits[KEYWORD_TYPES[match.group()], _COMMENT_RE.match(lowered, line_start + 1) is not None] += 1
+        if pos < 0:
+            break
+    return hits
+
+
+def _best(scores: Counter) -> str:
+    if not scores:
+        return "chore"
+    return scores.most_common(1)[0][0]
+
+
+def detect_commit_type(diff: str) -> str:
+    if not diff:
+        return "chore"
+
+    # bytes.lower() only touches ASCII, so offsets match the original text
+    raw = b"\n" + diff.encode("utf-8", errors="replace")
+    lowered = raw.lower()
+    find, rfind, startswith = lowered.find, lowered.rfind, lowered.startswith
+    comment_match = _COMMENT_RE.match
+
+    scores: Counter = Counter()
+    hits: Counter = Counter()  # (type, in comment) -> keyword lines of the current file
+    path: str | None = None
+    start = 0
+    counted: int | None = None  # complete counts from a staged_diff stat line
+
+    def close(end: int) -> None:
+        weight = file_weight(path) if path is not None else 1.0
+        for (kind, comment), count in hits.items():
+            scores[kind] += (COMMENT_POINTS if comment else KEYWORD_POINTS)[kind] * weight * count
+        hits.clear()
+        if path is not None:
+            _vote_path(scores, path, counted if counted is not None else _changed_lines(lowered[start:end]))
+
+    pos = 0
+    for match in _SCAN_RE.finditer(lowered):
+        at = match.start()
+        if at < pos:
+            continue  # the rest of a line already handled
+        token = match.group()
+        if token == b"\ndiff ":
+            pos = find(b"\n", at + 1)
+            line = raw[at + 1:pos if pos >= 0 else None].decode("utf-8", errors="replace")
+            if line.startswith("diff --git "):
+                close(at)
+                path, start, counted = line.rsplit(" b/", 1)[-1], at, None
+            elif omitted := _OMITTED_RE.match(line):
+                counted = int(omitted[1]) + int(omitted[2]) if omitted[1] else 1
+        else:
+            line_start = rfind(b"\n", 0, at) + 1
+            pos = find(b"\n", at)
+            if lowered[line_start] in b"+-" and not startswith((b"+++ ", b"--- "), line_start):
+                hits[KEYWORD_TYPES[token], comment_match(lowered, line_start + 1) is not None] += 1
+        if pos < 0:
+            break
+    close(len(lowered))
+    return _best(scores)
+
+
+def detect_commit_type_from_files(files: Iterable[StagedFile]) -> str:
+    """
+    detect_commit_type over a StagedChange: paths and complete counts come from
+    numstat, keywords from each file's kept patch.
+    """
+    scores: Counter = Counter()
+    for file in files:
+        if file.patch:
+            weight = file_weight(file.path)
+            for (kind, comment), count in _keyword_hits(file.patch.encode("utf-8", errors="replace").lower()).items():
+                scores[kind] += (COMMENT_POINTS if comment else KEYWORD_POINTS)[kind] * weight * count
+        _vote_path(scores, file.path, 0 if file.binary else file.added + file.deleted)
+    return _best(scores)
+
+
+def detect_commit_type_from_numstat(stats: Iterable[NumStat | StagedFile]) -> str:
+    """
+    Path votes only; plain source files vote feat when they mostly add lines and
+    refactor otherwise (keywords are not available without the patch). Binary
+    files have no line counts and do not vote.
+    """
+    scores: Counter = Counter()
+    for stat in stats:
+        if stat.binary:
+            continue
+        added, deleted = stat.added, stat.deleted
+        if path_type(stat.path) is None:
+            scores["feat" if added >= 2 * deleted else "refactor"] += PATH_POINTS * max(added + deleted, 1)
+        else:
+            _vote_path(scores, stat.path, added + deleted)
+    return _best(scores)
@@ -1,5 +1,7 @@
 import os
 
+from utils.common import env_int
+
 
 def _resolve_root_dirs() -> list[str]:
     raw = os.getenv("DEVTOOLS_ROOT_DIRS", "").strip()
@@ -17,8 +19,28 @@ def _resolve_root_dirs() -> list[str]:
     ]
 
 
+def _resolve_scan_prune() -> frozenset[str]:
+    # Directory names that never contain repos worth visiting (dependencies, venvs, Unity caches).
+    names = {"node_modules", ".venv", "venv", "__pycache__", "Library", "Temp"}
+    raw = os.getenv("DEVTOOLS_SCAN_PRUNE", "").strip()
+    if raw:
+        names.update(part.strip() for part in raw.split(",") if part.strip())
+    return frozenset(names)
+
+
 ROOT_DIRS = _resolve_root_dirs()
 DEFAULT_REMOTE = os.getenv("DEVTOOLS_REMOTE", "origin")
 DEFAULT_BASE_BRANCH = os.getenv("DEVTOOLS_BASE_BRANCH", "master")
 DEFAULT_HEAD_BRANCH = os.getenv("DEVTOOLS_HEAD_BRANCH", "staging")
 CHANGELOG_FILENAME = "CHANGELOG.md"
+
+REPO_SCAN_MAX_DEPTH = env_int("DEVTOOLS_SCAN_DEPTH", 3, minimum=1)
+REPO_SCAN_PRUNE = _resolve_scan_prune()
+REPO_SCAN_SUBMODULES = os.getenv("DEVTOOLS_SCAN_SUBMODULES", "1") == "1"
+REPO_INDEX_ENABLED = os.getenv("DEVTOOLS_REPO_INDEX", "1") == "1"
+
+LLM_CACHE_ENABLED = os.getenv("DEVTOOLS_LLM_CACHE", "1") == "1"
+LLM_CACHE_MAX_ENTRIES = env_int("DEVTOOLS_LLM_CACHE_MAX_ENTRIES", 2000, minimum=1)
+
+COMMIT_PREFETCH_DEPTH = env_int("DEVTOOLS_PREFETCH_DEPTH", 2, minimum=0)
+COMMIT_PREFETCH_WORKERS = env_int("DEVTOOLS_PREFETCH_WORKERS", 2, minimum=1)
@@ -0,0 +1,256 @@
+# core/diff_budget.py
+"""
+Token-budgeted view of a staged diff for LLM prompts: every file keeps a summary
+line, whole hunks are shared out by file significance.
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+
+_TOKEN_RE = re.compile(r"[A-Za-z]+|\d+|\n|[^\sA-Za-z\d]")
+
+LOCKFILE_NAMES = frozenset({
+    "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock", "Pipfile.lock", "uv.lock",
+    "Cargo.lock", "Gemfile.lock", "composer.lock", "go.sum", "packages.lock.json", "flake.lock",
+})
+GENERATED_DIRS = ("dist/", "build/", "vendor/", "node_modules/", "__generated__/", "Library/", "obj/", "bin/")
+GENERATED_SUFFIXES = (
+    ".min.js", ".min.css", ".map", ".snap", ".svg", ".pb.go", "_pb2.py", ".g.cs", ".designer.cs",
+    # Unity serialized assets
+    ".meta", ".asset", ".prefab", ".unity", ".mat", ".anim", ".controller",
+)
+DOC_SUFFIXES = (".md", ".rst", ".txt", ".adoc")
+CONFIG_SUFFIXES = (".json", ".yml", ".yaml", ".toml", ".ini", ".cfg", ".xml", ".env", ".lock")
+
+WEIGHT_SOURCE = 1.0
+WEIGHT_TEST = 0.7
+WEIGHT_DOCS = 0.5
+WEIGHT_CONFIG = 0.4
+WEIGHT_GENERATED = 0.05
+WEIGHT_LOCKFILE = 0.02
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    BPE-like estimate: ~4 letters or ~3 digits per token, one token per symbol and
+    per newline, other whitespace merged into the next word.
+    """
+    count = 0
+    for m in _TOKEN_RE.finditer(text):
+        piece = m.group()
+        first = piece[0]
+        if first.isalpha():
+            count += (len(piece) + 3) // 4
+        elif first.isdigit():
+            count += (len(piece) + 2) // 3
+        else:
+            count += 1
+    return count
+
+
+def file_weight(path: str) -> float:
+    name = os.path.basename(path)
+    lowered = path.lower()
+    if name in LOCKFILE_NAMES:
+        return WEIGHT_LOCKFILE
+    if any(part in f"/{path}" for part in (f"/{d}" for d in GENERATED_DIRS)) or lowered.endswith(GENERATED_SUFFIXES):
+        return WEIGHT_GENERATED
+    if lowered.endswith(DOC_SUFFIXES):
+        return WEIGHT_DOCS
+    if lowered.endswith(CONFIG_SUFFIXES):
+        return WEIGHT_CONFIG
+    if "test" in lowered.split("/")[-1] or "/tests/" in f"/{lowered}":
+        return WEIGHT_TEST
+    return WEIGHT_SOURCE
+
+
+@dataclass
+class FileDiff:
+    path: str
+    header: list[str] = field(default_factory=list)  # diff --git, mode/rename lines
+    hunks: list[list[str]] = field(default_factory=list)  # each starts with its @@ line
+    added: int = 0
+    deleted: int = 0
+    binary: bool = False
+    omitted: str = ""  # why the patch is missing or cut ("generated", "size limit"), see core/staged_diff.py
+
+    @property
+    def summary(self) -> str:
+        if self.binary:
+            return f"{self.path} (binary)"
+        return f"{self.path} (+{self.added} -{self.deleted})"
+
+
+# Written by core/staged_diff.py in place of (or after) a file's hunks
+_OMITTED_RE = re.compile(r"^Diff (?:excluded|truncated) \((?P<reason>[^)]+)\): (?:\+(?P<added>\d+) -(?P<deleted>\d+)|binary)$")
+
+_KEPT_HEADER_PREFIXES = ("new file mode", "deleted file mode", "rename from", "rename to", "copy from", "copy to")
+
+
+def _path_from_git_line(line: str) -> str:
+    # "diff --git a/x b/x": the b/ side, good enough until +++ gives the exact path
+    rest = line[len("diff --git "):]
+    if " b/" in rest:
+        return rest.rsplit(" b/", 1)[1]
+    return rest
+
+
+def parse_diff(diff: str) -> list[FileDiff]:
+    files: list[FileDiff] = []
+    current: FileDiff | None = None
+    hunk: list[str] | None = None
+
+    for line in diff.splitlines():
+        if line.startswith("diff --git "):
+            current = FileDiff(_path_from_git_line(line), header=[line])
+            files.append(current)
+            hunk = None
+            continue
+        if current is None:
+            continue
+        if line.startswith("Diff ") and (omitted := _OMITTED_RE.match(line)):
+            # Complete counts: they replace whatever the kept hunks added up to.
+            current.omitted = omitted["reason"]
+            if omitted["added"] is None:
+                current.binary = True
+            else:
+                current.added, current.deleted = int(omitted["added"]), int(omitted["deleted"])
+            continue
+        if line.startswith("@@"):
+            hunk = [line]
+            current.hunks.append(hunk)
+            continue
+        if hunk is None:
+            if line.startswith("+++ ") and line[4:] != "/dev/null":
+                current.path = line[4:].removeprefix("b/")
+            elif line.startswith("Binary files"):
+                current.binary = True
+            elif line.startswith(_KEPT_HEADER_PREFIXES):
+                current.header.append(line)
+            continue
+        hunk.append(line)
+        if line.startswith("+"):
+            current.added += 1
+        elif line.startswith("-"):
+            current.deleted += 1
+    return files
+
+
+def _allocate(budget: int, demands: list[int], weights: list[float]) -> list[int]:
+    """
+    Water-filling: split budget proportionally to weights, cap each file at its
+    demand and hand the surplus back to the files that still need more.
+    """
+    alloc = [0] * len(demands)
+    active = {i for i, demand in enumerate(demands) if demand > 0 and weights[i] > 0}
+    left = budget
+    while active and left > 0:
+        total_weight = sum(weights[i] for i in active)
+        shares = {i: int(left * weights[i] / total_weight) for i in active}
+        satisfied = {i for i in active if demands[i] - alloc[i] <= shares[i]}
+        if not satisfied:
+            for i in active:
+                alloc[i] += shares[i]
+            break
+        for i in satisfied:
+            alloc[i] = demands[i]
+        active -= satisfied
+        left = budget - sum(alloc)
+    return alloc
+
+
+def _line_cost(line: str) -> int:
+    return estimate_tokens(line) + 1
+
+
+# ", partial" / ", omitted" appended to a file header when hunks were cut
+_CUT_MARK_COST = 3
+
+
+def _header_cost(file: FileDiff) -> int:
+    return sum(_line_cost(line) for line in file.header) + _line_cost(f"# {file.summary}") + _CUT_MARK_COST
+
+
+def _render_file(file: FileDiff, budget: int) -> list[str]:
+    body: list[str] = []
+    left = budget
+    cut = False
+    for hunk in file.hunks:
+        costs = [_line_cost(line) for line in hunk]
+        if sum(costs) <= left:
+            body.extend(hunk)
+            left -= sum(costs)
+            continue
+        cut = True
+        # A hunk header alone says nothing: keep it only with at least one line.
+        if len(hunk) > 1 and costs[0] + costs[1] <= left:
+            kept = 0
+            while kept < len(hunk) and costs[kept] <= left:
+                left -= costs[kept]
+                kept += 1
+            body.extend(hunk[:kept])
+        break
+
+    summary = file.summary
+    if cut or file.omitted:
+        summary = summary[:-1] + (", partial)" if body else ", omitted)")
+    return [*file.header, f"# {summary}", *body]
+
+
+def compact_diff(diff: str, budget_tokens: int, files: list[FileDiff] | None = None) -> str:
+    """
+    Returns diff unchanged when it fits budget_tokens, else compact_files: every
+    file's summary line, then whole hunks by file significance. files is diff
+    already parsed (StagedChange.file_diffs()).
+    """
+    if estimate_tokens(diff) <= budget_tokens:
+        return diff
+
+    if files is None:
+        files = parse_diff(diff)
+    if not files:
+        # Not a git diff: keep whole lines from the top
+        out: list[str] = []
+        left = budget_tokens
+        for line in diff.splitlines():
+            left -= _line_cost(line)
+            if left < 0:
+                out.append("... (truncated)")
+                break
+            out.append(line)
+        return "\n".join(out)
+    return compact_files(files, budget_tokens)
+
+
+def file_tokens(file: FileDiff) -> int:
+    """Cost of a file rendered in full by compact_files (header included)."""
+    return _header_cost(file) + sum(_line_cost(line) for hunk in file.hunks for line in hunk)
+
+
+def compact_files(files: list[FileDiff], budget_tokens: int) -> str:
+    weights = [file_weight(f.path) for f in files]
+    header_costs = [_header_cost(f) for f in files]
+
+    if sum(header_costs) >= budget_tokens:
+        # Even the headers do not fit: list the most significant files only.
+        ranked = sorted(range(len(files)), key=lambda i: (-weights[i], -(files[i].added + files[i].deleted)))
+        keep: set[int] = set()
+        left = budget_tokens
+        for i in ranked:
+            cost = _line_cost(files[i].summary)
+            if cost > left:
+                break
+            keep.add(i)
+            left -= cost
+        lines = [files[i].summary for i in range(len(files)) if i in keep]
+        lines.append(f"... ({len(files) - len(keep)} more files omitted)")
+        return "\n".join(lines)
+
+    demands = [0 if f.binary else sum(_line_cost(line) for hunk in f.hunks for line in hunk) for f in files]
+    alloc = _allocate(budget_tokens - sum(header_costs), demands, weights)
+
+    out = []
+    for file, budget in zip(files, alloc):
+        out.extend(_render_file(file, budget))
+    return "\n".join(out)
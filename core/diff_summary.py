@@ -0,0 +1,158 @@
+# core/diff_summary.py
+"""
+Map phase for staged diffs too large for one commit prompt: related files are
+packed into chunks, each summarized concurrently.
+"""
+
+import contextvars
+import threading
+import time
+from dataclasses import dataclass
+
+from core.diff_budget import FileDiff, compact_files, file_tokens, file_weight
+from core.ollama import GenerationCancelled, OllamaError, chat_json, get_default_client
+from core.prompts import DIFF_MAP_SYSTEM, DIFF_MAP_USER_TEMPLATE
+from utils.common import env_int
+from utils.daemon_pool import DaemonPool
+
+MAP_NUM_PREDICT = 160
+# Below this significance (see diff_budget.file_weight) a file is only listed
+SUMMARY_MIN_WEIGHT = 0.1
+_LISTED_PATHS = 5
+
+
+def map_reduce_threshold() -> int:
+    return env_int("OLLAMA_MAP_REDUCE_TOKENS", 8000, minimum=1000)
+
+
+@dataclass(frozen=True)
+class DiffChunk:
+    files: tuple[FileDiff, ...]
+    text: str
+
+    @property
+    def label(self) -> str:
+        paths = [f.path for f in self.files[:_LISTED_PATHS]]
+        more = len(self.files) - len(paths)
+        return ", ".join(paths) + (f" +{more} more" if more else "")
+
+
+@dataclass(frozen=True)
+class DiffSummary:
+    chunks: tuple[DiffChunk, ...]
+    summaries: tuple[str | None, ...]
+    unsummarized: tuple[FileDiff, ...]
+    map_seconds: float
+
+    def render(self) -> str:
+        parts = []
+        for index, (chunk, summary) in enumerate(zip(self.chunks, self.summaries), 1):
+            parts.append(f"Part {index} ({chunk.label}):\n{summary or '- (no summary available)'}")
+        if self.unsummarized:
+            listed = ", ".join(f.summary for f in self.unsummarized[:20])
+            more = len(self.unsummarized) - 20
+            parts.append(f"Not summarized (lockfiles, generated, overflow): {listed}" + (f" +{more} more" if more > 0 else ""))
+        return "\n\n".join(parts)
+
+
+def _group(path: str) -> str:
+    return path.split("/", 1)[0] if "/" in path else "."
+
+
+def plan_chunks(files: list[FileDiff], chunk_tokens: int, max_chunks: int) -> tuple[list[DiffChunk], list[FileDiff]]:
+    """Returns (chunks to summarize, files only listed)."""
+    def listed_only(f: FileDiff) -> bool:
+        return f.binary or not f.hunks or file_weight(f.path) < SUMMARY_MIN_WEIGHT
+
+    summarized = [f for f in files if not listed_only(f)]
+    listed = [f for f in files if listed_only(f)]
+    summarized.sort(key=lambda f: (_group(f.path), f.path))
+
+    costs = {id(f): min(file_tokens(f), chunk_tokens) for f in summarized}
+    group_costs: dict[str, int] = {}
+    for file in summarized:
+        group_costs[_group(file.path)] = group_costs.get(_group(file.path), 0) + costs[id(file)]
+
+    packs: list[list[FileDiff]] = []
+    current: list[FileDiff] = []
+    used = 0
+    for file in summarized:
+        cost = costs[id(file)]
+        group = _group(file.path)
+        full = used + cost > chunk_tokens
+        # A directory that fits one chunk starts a new one rather than being split.
+        new_group = bool(current) and _group(current[-1].path) != group
+        keep_together = new_group and group_costs[group] <= chunk_tokens < used + group_costs[group]
+        if current and (full or keep_together):
+            packs.append(current)
+            current, used = [], 0
+        current.append(file)
+        used += cost
+    if current:
+        packs.append(current)
+
+    for pack in packs[max_chunks:]:
+        listed.extend(pack)
+    chunks = [DiffChunk(tuple(pack), compact_files(pack, chunk_tokens)) for pack in packs[:max_chunks]]
+    return chunks, listed
+
+
+def summarize_diff(
+    repo: str,
+    files: list[FileDiff],
+    cancel: threading.Event | None = None,
+    deadline: float | None = None,
+) -> DiffSummary:
+    """
+    Map phase: one concurrent plain-text summary per chunk (at most
+    OLLAMA_MAX_CONNECTIONS in flight). A failed chunk keeps a None summary;
+    raises OllamaError when none succeeded and GenerationCancelled on cancel.
+    """
+    started = time.perf_counter()
+    expires = time.monotonic() + deadline if deadline else None
+    chunks, listed = plan_chunks(
+        files,
+        env_int("OLLAMA_MAP_CHUNK_TOKENS", 1500, minimum=300),
+        env_int("OLLAMA_MAP_MAX_CHUNKS", 12, minimum=1),
+    )
+
+    def summarize(index: int, chunk: DiffChunk) -> str | None:
+        if cancel is not None and cancel.is_set():
+            raise GenerationCancelled("commit message generation cancelled")
+        timeout = None
+        if expires is not None:
+            timeout = expires - time.monotonic()
+            if timeout <= 0:
+                return None
+        messages = [
+            {"role": "system", "content": DIFF_MAP_SYSTEM},
+            {
+                "role": "user",
+                "content": DIFF_MAP_USER_TEMPLATE.format(repo=repo, index=index, total=len(chunks), diff=chunk.text),
+            },
+        ]
+        try:
+            return chat_json(messages, temperature=0.1, num_predict=MAP_NUM_PREDICT, timeout=timeout).strip() or None
+        except GenerationCancelled:
+            raise
+        except OllamaError:
+            return None
+
+    summaries: list[str | None] = []
+    if chunks:
+        workers = min(len(chunks), get_default_client().max_connections)
+        # Daemon workers: a prefetch abandoned on quit does not hold the exit (see DaemonPool)
+        pool = DaemonPool(workers, "diff-map")
+        try:
+            # Each part runs in a copy of the caller's context (profile_repo, held notices)
+            futures = [
+                pool.submit(contextvars.copy_context().run, summarize, index, chunk)
+                for index, chunk in enumerate(chunks, start=1)
+            ]
+            summaries = [future.result() for future in futures]
+        finally:
+            pool.shutdown()
+        if not any(summaries):
+            raise OllamaError("no part of the staged diff could be summarized")
+
+    return DiffSummary(tuple(chunks), tuple(summaries), tuple(listed), time.perf_counter() - started)
@@ -3,6 +3,42 @@
 import json
 from typing import Any, Dict, Optional, Tuple
 
+COMMIT_TYPES = ["feat", "fix", "refactor", "docs", "test", "chore", "perf", "ci", "build", "style"]
+
+# JSON schemas passed as Ollama "format": decoding is constrained to these shapes.
+COMMIT_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "commit": {
+            "type": "object",
+            "properties": {
+                "type": {"type": "string", "enum": COMMIT_TYPES},
+                "scope": {"type": "string"},
+                "subject": {"type": "string", "minLength": 1, "maxLength": 72},
+                "body": {"type": "string"},
+                "breaking": {"type": "boolean"},
+            },
+            "required": ["type", "scope", "subject", "body", "breaking"],
+        }
+    },
+    "required": ["commit"],
+}
+
+PR_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "mr": {
+            "type": "object",
+            "properties": {
+                "title": {"type": "string", "minLength": 1, "maxLength": 80},
+                "description": {"type": "string", "minLength": 1},
+            },
+            "required": ["title", "description"],
+        }
+    },
+    "required": ["mr"],
+}
+
 
 def safe_parse_json(raw: str) -> Optional[Dict[str, Any]]:
     """
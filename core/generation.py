@@ -0,0 +1,201 @@
+# core/generation.py
+"""
+Structured generation shared by commit messages and PR texts: schema call,
+recovery, retry and plain prompt, all within one OLLAMA_DEADLINE.
+"""
+
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from rich.console import Console
+
+from core.ollama import GenerationCancelled, OllamaError, chat_json, chat_json_stream, is_streaming_enabled
+from utils.console import notice, status_preview
+
+console = Console()
+
+DEFAULT_DEADLINE = 90.0
+RUNGS = ("schema", "recovered", "retry", "plain", "fallback", "deadline", "error")
+
+
+class GenerationDeadline(OllamaError):
+    """The overall generation deadline passed."""
+
+
+@dataclass(frozen=True)
+class GenerationTask:
+    kind: str  # stats key and message noun: "commit", "PR"
+    messages: list[dict]
+    schema: dict
+    parse: Callable[[str], Any]  # schema answer -> result, None when invalid
+    recover: Callable[[str], Any]  # any answer text -> result via plain extraction, or None
+    plain_system: str  # system prompt of the plain-text rung
+    num_predict: int
+    labels: tuple[str, str, str] = ("", "", "")  # spinner texts (first, retry, plain); "" = no spinner
+
+
+_STATS: Counter = Counter()
+_STATS_LOCK = threading.Lock()
+
+
+def _count(kind: str, rung: str) -> None:
+    with _STATS_LOCK:
+        _STATS[(kind, rung)] += 1
+
+
+def rung_stats() -> dict[str, dict[str, int]]:
+    stats: dict[str, dict[str, int]] = {}
+    with _STATS_LOCK:
+        for (kind, rung), count in _STATS.items():
+            stats.setdefault(kind, {})[rung] = count
+    return stats
+
+
+def reset_rung_stats() -> None:
+    with _STATS_LOCK:
+        _STATS.clear()
+
+
+def format_rung_stats() -> str:
+    """One line, e.g. "commit: schema 12, retry 1 | PR: schema 2"; empty when nothing ran."""
+    parts = []
+    for kind, rungs in sorted(rung_stats().items()):
+        counts = ", ".join(f"{rung} {rungs[rung]}" for rung in RUNGS if rung in rungs)
+        parts.append(f"{kind}: {counts}")
+    return " | ".join(parts)
+
+
+def resolve_deadline() -> float:
+    try:
+        value = float(os.getenv("OLLAMA_DEADLINE", str(DEFAULT_DEADLINE)))
+    except ValueError:
+        return DEFAULT_DEADLINE
+    return value if value > 0 else DEFAULT_DEADLINE
+
+
+def _debug(kind: str, rung: str, raw: str) -> None:
+    if os.getenv("OLLAMA_DEBUG", "0") == "1":
+        print(f"\n[DEBUG] Raw Ollama {kind} output ({rung}):\n", raw, "\n")
+
+
+class _Run:
+    def __init__(self, task: GenerationTask, deadline: float, show_status: bool, cancel: threading.Event | None):
+        self.task = task
+        self.deadline = deadline
+        self.expires = time.monotonic() + deadline
+        self.show_status = show_status
+        self.cancel = cancel
+
+    def expired(self) -> bool:
+        # Socket timeouts fire at (not after) the remaining time: allow for timer slack.
+        return time.monotonic() >= self.expires - 0.05
+
+    def check(self) -> float:
+        """Raises when cancelled or out of time; returns the seconds left."""
+        if self.cancel is not None and self.cancel.is_set():
+            raise GenerationCancelled(f"{self.task.kind} generation cancelled")
+        left = self.expires - time.monotonic()
+        if left <= 0:
+            raise GenerationDeadline(f"{self.task.kind} generation exceeded {self.deadline:.0f}s")
+        return left
+
+    def ask(self, messages, temperature: float, schema: dict | None, label: str) -> str:
+        timeout = self.check()
+        task = self.task
+        spinner = console.status(label, spinner="dots") if self.show_status and label else nullcontext()
+        with spinner as status:
+            if schema is None or not is_streaming_enabled():
+                return chat_json(
+                    messages,
+                    temperature=temperature,
+                    num_predict=task.num_predict,
+                    schema=schema,
+                    timeout=timeout,
+                )
+
+            preview = status_preview(status, label) if status is not None else None
+
+            def on_token(token: str) -> None:
+                self.check()
+                if preview is not None:
+                    preview(token)
+
+            return chat_json_stream(
+                messages,
+                temperature=temperature,
+                accept=lambda raw: task.parse(raw) is not None,
+                on_token=on_token,
+                num_predict=task.num_predict,
+                schema=schema,
+                timeout=timeout,
+            )
+
+
+def _ladder(run: _Run) -> tuple[Any, str]:
+    task = run.task
+    first_label, retry_label, plain_label = task.labels
+
+    raw = run.ask(task.messages, 0.2, task.schema, first_label)
+    _debug(task.kind, "schema", raw)
+    result = task.parse(raw)
+    if result is not None:
+        return result, "schema"
+    result = task.recover(raw)
+    if result is not None:
+        notice(f"⚠️ Ollama {task.kind} JSON invalid, using plain-text {task.kind} from model output.")
+        return result, "recovered"
+
+    notice(f"⚠️ Ollama {task.kind} output invalid, retrying once.")
+    raw = run.ask(task.messages, 0.0, task.schema, retry_label)
+    _debug(task.kind, "retry", raw)
+    result = task.parse(raw)
+    if result is None:
+        result = task.recover(raw)
+    if result is not None:
+        return result, "retry"
+
+    plain_messages = [
+        {"role": "system", "content": task.plain_system},
+        {"role": "user", "content": task.messages[-1]["content"]},
+    ]
+    raw = run.ask(plain_messages, 0.1, None, plain_label)
+    _debug(task.kind, "plain", raw)
+    result = task.recover(raw)
+    if result is not None:
+        notice(f"⚠️ Ollama {task.kind} JSON invalid, plain recovery mode used.")
+        return result, "plain"
+
+    notice(f"⚠️ Ollama {task.kind} output unusable, fallback used.")
+    return None, "fallback"
+
+
+def generate(
+    task: GenerationTask,
+    show_status: bool = True,
+    cancel: threading.Event | None = None,
+    deadline: float | None = None,
+) -> Any:
+    """
+    Runs the ladder for task; None when every rung failed or the deadline passed.
+    OllamaError (server unreachable, HTTP errors) and GenerationCancelled propagate.
+    show_status=False drops spinners (required off the main thread).
+    """
+    run = _Run(task, resolve_deadline() if deadline is None else deadline, show_status, cancel)
+    try:
+        result, rung = _ladder(run)
+    except GenerationCancelled:
+        raise
+    except OllamaError as e:
+        if isinstance(e, GenerationDeadline) or run.expired():
+            notice(f"⚠️ Ollama {task.kind} generation hit its {run.deadline:.0f}s deadline, fallback used.")
+            _count(task.kind, "deadline")
+            return None
+        _count(task.kind, "error")
+        raise
+    _count(task.kind, rung)
+    return result
@@ -0,0 +1,138 @@
+# core/llm_cache.py
+"""
+Persistent SQLite cache of validated LLM generations (commit messages, PR
+texts), keyed by model, prompts and options.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Callable
+
+from core.config import LLM_CACHE_ENABLED, LLM_CACHE_MAX_ENTRIES
+from utils.common import user_cache_dir
+from utils.console import notice
+
+_ENABLED = LLM_CACHE_ENABLED
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS generations (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+)
+"""
+
+_conn: sqlite3.Connection | None = None
+_conn_path: str | None = None
+_lock = threading.Lock()
+
+
+def set_llm_cache(state: bool) -> None:
+    global _ENABLED
+    _ENABLED = state
+
+
+def is_enabled() -> bool:
+    return _ENABLED
+
+
+def cache_path() -> str:
+    return str(user_cache_dir() / "llm-cache.sqlite3")
+
+
+def cache_key(kind: str, model: str, system: str, user: str, options: dict[str, Any]) -> str:
+    material = json.dumps(
+        {"kind": kind, "model": model, "system": system, "user": user, "options": options},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _connection() -> sqlite3.Connection:
+    """One shared connection per cache file; callers hold _lock."""
+    global _conn, _conn_path
+    path = cache_path()
+    if _conn is None or _conn_path != path:
+        if _conn is not None:
+            _conn.close()
+        _conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute(_SCHEMA)
+        _conn_path = path
+    return _conn
+
+
+def close() -> None:
+    global _conn, _conn_path
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+        _conn = None
+        _conn_path = None
+
+
+def lookup(key: str) -> str | None:
+    if not _ENABLED:
+        return None
+    try:
+        with _lock:
+            conn = _connection()
+            row = conn.execute("SELECT value FROM generations WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            with conn:
+                conn.execute("UPDATE generations SET last_used = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+    except sqlite3.Error:
+        return None
+
+
+def store(key: str, kind: str, value: str, max_entries: int | None = None) -> None:
+    if not _ENABLED:
+        return
+    limit = max_entries or LLM_CACHE_MAX_ENTRIES
+    now = time.time()
+    try:
+        with _lock:
+            conn = _connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO generations (key, kind, value, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                    (key, kind, value, now, now),
+                )
+                conn.execute(
+                    "DELETE FROM generations WHERE key IN ("
+                    "SELECT key FROM generations ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (limit,),
+                )
+    except sqlite3.Error:
+        pass
+
+
+def cached_generation(
+    kind: str,
+    model: str,
+    system: str,
+    user: str,
+    options: dict[str, Any],
+    generate: Callable[[], str | None],
+) -> str | None:
+    """
+    Returns the cached value for these inputs, or runs generate() and stores a
+    non-empty result.
+    """
+    key = cache_key(kind, model, system, user, options)
+    hit = lookup(key)
+    if hit is not None:
+        notice(f"♻️  {kind.capitalize()} text reused from LLM cache.")
+        return hit
+
+    value = generate()
+    if value:
+        store(key, kind, value)
+    return value
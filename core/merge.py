@@ -1,3 +1,4 @@
+import json
 import os
 import time
 from datetime import datetime
@@ -6,12 +7,17 @@ from rich import print
 from rich.console import Console
 
 from core.config import DEFAULT_BASE_BRANCH, DEFAULT_HEAD_BRANCH, DEFAULT_REMOTE, ROOT_DIRS
-from core.repositories import iter_git_repositories
+from core.refs import RefsUnavailable, current_branch, resolve_git_dirs
+from core.repositories import iter_repositories_by_root
+from core.snapshot import is_worktree_dirty
 from utils.common import env_int, run_command, run_command_checked, trim_text_middle
 from utils.console import ask_yes_no
-from core.ollama import chat_json, OllamaError
-from core.prompts import PR_SYSTEM, PR_USER_TEMPLATE
-from core.formatters import safe_parse_json, build_pr
+from utils.profiling import profile_repo
+from core import llm_cache
+from core.generation import GenerationTask, generate
+from core.ollama import get_default_client, OllamaError
+from core.prompts import PR_PLAIN_SYSTEM, PR_SYSTEM, PR_USER_TEMPLATE
+from core.formatters import PR_SCHEMA, safe_parse_json, build_pr
 from core.versioning import (
     compute_next_version,
     determine_bump_from_commits,
@@ -21,6 +27,9 @@ from core.versioning import (
 
 console = Console()
 
+# Token cap for a PR answer: title plus the four short body sections.
+PR_NUM_PREDICT = 768
+
 
 # ---------------- Git helpers ----------------
 
@@ -35,18 +44,23 @@ def run_git_command(path: str, args: list[str]) -> str:
 
 
 def get_current_branch(path: str) -> str:
-    return run_git_command(path, ["branch", "--show-current"])
+    try:
+        return current_branch(path)
+    except RefsUnavailable:
+        return run_git_command(path, ["branch", "--show-current"])
 
 
 def ensure_clean_worktree(path: str) -> None:
     """
     Ensure no pending changes and no merge in progress (avoid undefined state).
     """
-    status = run_git_command(path, ["status", "--porcelain"])
-    if status.strip():
+    if is_worktree_dirty(path):
         raise RuntimeError("Working tree is not clean (uncommitted changes detected).")
 
-    merge_head = run_git_command(path, ["rev-parse", "--git-path", "MERGE_HEAD"])
+    try:
+        merge_head = os.path.join(resolve_git_dirs(path).git_dir, "MERGE_HEAD")
+    except RefsUnavailable:
+        merge_head = run_git_command(path, ["rev-parse", "--git-path", "MERGE_HEAD"])
     if merge_head:
         merge_head_path = merge_head if os.path.isabs(merge_head) else os.path.join(path, merge_head)
     else:
@@ -283,6 +297,9 @@ def extract_plain_pr(raw: str) -> tuple[str | None, str | None]:
         s = line.strip()
         if not s:
             continue
+        if s.startswith(("{", "[")):
+            # Truncated / invalid JSON answer: nothing to recover
+            return None, None
         if s.lower().startswith("title:"):
             title = s.split(":", 1)[1].strip()
             title_idx = idx
@@ -315,9 +332,27 @@ def extract_plain_pr(raw: str) -> tuple[str | None, str | None]:
     return title, body
 
 
+def _parse_pr(raw: str) -> tuple[str, str] | None:
+    data = safe_parse_json(raw)
+    if not data:
+        return None
+    try:
+        return build_pr(data)
+    except Exception:
+        return None
+
+
+def _recover_pr(raw: str) -> tuple[str, str] | None:
+    title, body = extract_plain_pr(raw)
+    if title and body:
+        return title, body
+    return None
+
+
 def generate_pr_text_with_ollama(repo_name: str, commit_summary: str) -> tuple[str | None, str | None]:
     """
     Returns (title, body) if success, else (None, None).
+    Validated texts are reused from the LLM cache for identical prompts.
     """
     if not is_ollama_enabled():
         return None, None
@@ -336,95 +371,50 @@ def generate_pr_text_with_ollama(repo_name: str, commit_summary: str) -> tuple[s
         {"role": "user", "content": pr_user},
     ]
 
-    raw = chat_json(messages, temperature=0.2, json_mode=True)
-    if os.getenv("OLLAMA_DEBUG", "0") == "1":
-        print("\n[DEBUG] Raw Ollama PR output (attempt 1):\n", raw, "\n")
-
-    data = safe_parse_json(raw)
-    if data:
-        try:
-            return build_pr(data)
-        except Exception:
-            pass
-    plain_title, plain_body = extract_plain_pr(raw)
-    if plain_title and plain_body:
-        print("⚠️ Ollama PR JSON invalid, using plain-text PR from model output.")
-        return plain_title, plain_body
-
-    print("⚠️ Ollama PR output invalid, retrying once.")
-    raw_retry = chat_json(messages, temperature=0.0, json_mode=True)
-    if os.getenv("OLLAMA_DEBUG", "0") == "1":
-        print("\n[DEBUG] Raw Ollama PR output (attempt 2):\n", raw_retry, "\n")
-
-    data_retry = safe_parse_json(raw_retry)
-    if data_retry:
-        try:
-            return build_pr(data_retry)
-        except Exception:
-            pass
-    plain_retry_title, plain_retry_body = extract_plain_pr(raw_retry)
-    if plain_retry_title and plain_retry_body:
-        print("⚠️ Ollama PR JSON invalid on retry, using plain-text PR from model output.")
-        return plain_retry_title, plain_retry_body
-
-    plain_system = (
-        "Return plain text only with this exact structure:\n"
-        "TITLE: <max 80 chars>\n"
-        "## What\n"
-        "...\n"
-        "## Why\n"
-        "...\n"
-        "## Testing\n"
-        "...\n"
-        "## Notes\n"
-        "...\n"
-        "Do not invent tests; if unknown write that testing evidence is not provided."
-    )
-    raw_plain = chat_json(
-        [
-            {"role": "system", "content": plain_system},
-            {"role": "user", "content": pr_user},
-        ],
-        temperature=0.1,
-        json_mode=False,
+    task = GenerationTask(
+        kind="PR",
+        messages=messages,
+        schema=PR_SCHEMA,
+        parse=_parse_pr,
+        recover=_recover_pr,
+        plain_system=PR_PLAIN_SYSTEM,
+        num_predict=PR_NUM_PREDICT,
     )
-    if os.getenv("OLLAMA_DEBUG", "0") == "1":
-        print("\n[DEBUG] Raw Ollama PR output (plain recovery):\n", raw_plain, "\n")
 
-    plain_recovery_title, plain_recovery_body = extract_plain_pr(raw_plain)
-    if plain_recovery_title and plain_recovery_body:
-        print("⚠️ Ollama PR JSON invalid, plain recovery mode used.")
-        return plain_recovery_title, plain_recovery_body
+    client = get_default_client()
+    cached = llm_cache.cached_generation(
+        "pr",
+        client.model,
+        PR_SYSTEM,
+        pr_user,
+        {"num_ctx": client.context_size(messages, PR_NUM_PREDICT), "num_predict": PR_NUM_PREDICT},
+        lambda: _encode_pr(*(generate(task, show_status=False) or (None, None))),
+    )
+    return _decode_pr(cached)
 
-    print("⚠️ Ollama PR output unusable, fallback used.")
-    return None, None
 
+def _encode_pr(title: str | None, body: str | None) -> str | None:
+    if not (title and body):
+        return None
+    return json.dumps({"title": title, "body": body}, ensure_ascii=False)
 
-# ---------------- Main PR flow ----------------
 
-def create_and_merge_pr(path: str, repo_name: str) -> None:
-    # Safety first
+def _decode_pr(raw: str | None) -> tuple[str | None, str | None]:
     try:
-        ensure_clean_worktree(path)
-    except Exception as e:
-        print(f"❌ {repo_name}: {e}")
-        return
-
-    # Debug: show current branch (we *do not* depend on it anymore)
-    current = get_current_branch(path)
-    if current:
-        print(f"🔎 Current branch (info only): [bold]{current}[/]")
+        data = json.loads(raw) if raw else {}
+    except ValueError:
+        return None, None
+    if not isinstance(data, dict):
+        return None, None
+    return data.get("title") or None, data.get("body") or None
 
-    date_str = datetime.now().strftime("%Y-%m-%d %H:%M")
-    commit_summary = get_commit_summary(path)
 
-    if not commit_summary:
-        print("⚠️  No new commits found to merge.")
-        return
+# ---------------- Main PR flow ----------------
 
-    # Fallback PR text
-    fallback_title = f"🔀 chore: merge {DEFAULT_HEAD_BRANCH} into {DEFAULT_BASE_BRANCH} ({date_str})"
-    fallback_body = f"""## 📦 Merge Summary
+def fallback_pr_text(commit_summary: str) -> tuple[str, str]:
+    date_str = datetime.now().strftime("%Y-%m-%d %H:%M")
+    title = f"🔀 chore: merge {DEFAULT_HEAD_BRANCH} into {DEFAULT_BASE_BRANCH} ({date_str})"
+    body = f"""## 📦 Merge Summary
 
 This pull request merges the latest validated commits from `{DEFAULT_HEAD_BRANCH}` into `{DEFAULT_BASE_BRANCH}`.
 
@@ -438,20 +428,88 @@ This pull request merges the latest validated commits from `{DEFAULT_HEAD_BRANCH
 
 _Auto-generated on {date_str}_
 """
+    return title, body
 
-    # Try Ollama
+
+def generate_pr_text(repo_name: str, commit_summary: str) -> tuple[str, str]:
+    """
+    PR (title, body) from Ollama, each falling back to the static template.
+    """
     title, body = None, None
     try:
-        title, body = generate_pr_text_with_ollama(repo_name, commit_summary)
+        with profile_repo(repo_name):
+            title, body = generate_pr_text_with_ollama(repo_name, commit_summary)
     except OllamaError as e:
         print(f"⚠️  Ollama unavailable for PR text, fallback used. Reason: {e}")
 
-    title = title or fallback_title
-    body = body or fallback_body
+    fallback_title, fallback_body = fallback_pr_text(commit_summary)
+    return title or fallback_title, body or fallback_body
+
+
+def open_pull_request(path: str, repo_name: str, title: str, body: str) -> str | None:
+    """
+    Creates the head -> base PR and returns its number, or None on failure.
+    """
+    result = run_command(
+        [
+            "gh", "pr", "create",
+            "--base", DEFAULT_BASE_BRANCH,
+            "--head", DEFAULT_HEAD_BRANCH,
+            "--title", title,
+            "--body", body,
+        ],
+        cwd=path,
+    )
+
+    if result.returncode != 0:
+        stderr = (result.stderr or "").strip()
+        print(f"❌ Failed to create Pull Request for {repo_name}. Reason:\n{stderr}")
+        return None
+
+    # Extract URL from output
+    created_pr_url = None
+    for line in (result.stdout or "").strip().splitlines():
+        if line.startswith("https://github.com/"):
+            created_pr_url = line.strip()
+            break
+
+    if not created_pr_url:
+        print("❌ Pull Request URL not found")
+        return None
+
+    print(f"🔗 Pull Request created: {created_pr_url}")
+
+    # Resolve PR number reliably
+    pr_number = get_pr_number_from_url(path, created_pr_url)
+    if not pr_number:
+        print("❌ Could not resolve PR number from URL.")
+        return None
+    return pr_number
+
+
+def create_and_merge_pr(path: str, repo_name: str) -> None:
+    # Safety first
+    try:
+        ensure_clean_worktree(path)
+    except Exception as e:
+        print(f"❌ {repo_name}: {e}")
+        return
+
+    # Debug: show current branch (we *do not* depend on it anymore)
+    current = get_current_branch(path)
+    if current:
+        print(f"🔎 Current branch (info only): [bold]{current}[/]")
+
+    commit_summary = get_commit_summary(path)
+
+    if not commit_summary:
+        print("⚠️  No new commits found to merge.")
+        return
+
+    title, body = generate_pr_text(repo_name, commit_summary)
 
     # Check existing PR
     pr_number = existing_pr_number(path)
-    created_pr_url = None
 
     if pr_number:
         print(f"🔗 Existing Pull Request detected: #{pr_number}")
@@ -464,38 +522,8 @@ _Auto-generated on {date_str}_
             return
 
         with console.status("[bold green]Creating pull request...", spinner="dots"):
-            result = run_command(
-                [
-                    "gh", "pr", "create",
-                    "--base", DEFAULT_BASE_BRANCH,
-                    "--head", DEFAULT_HEAD_BRANCH,
-                    "--title", title,
-                    "--body", body,
-                ],
-                cwd=path,
-            )
-
-        if result.returncode != 0:
-            stderr = (result.stderr or "").strip()
-            print(f"❌ Failed to create Pull Request for {repo_name}. Reason:\n{stderr}")
-            return
-
-        # Extract URL from output
-        for line in (result.stdout or "").strip().splitlines():
-            if line.startswith("https://github.com/"):
-                created_pr_url = line.strip()
-                break
-
-        if not created_pr_url:
-            print("❌ Pull Request URL not found")
-            return
-
-        print(f"🔗 Pull Request created: {created_pr_url}")
-
-        # Resolve PR number reliably
-        pr_number = get_pr_number_from_url(path, created_pr_url)
+            pr_number = open_pull_request(path, repo_name, title, body)
         if not pr_number:
-            print("❌ Could not resolve PR number from URL.")
             return
 
     # Merge the PR (existing or newly created) - ALWAYS target by PR number
@@ -524,7 +552,7 @@ _Auto-generated on {date_str}_
 def main(root_dirs: list[str] = ROOT_DIRS) -> None:
     print(f"\n🔄 Scanning for repos with pending {DEFAULT_HEAD_BRANCH} → {DEFAULT_BASE_BRANCH} merges\n")
 
-    for root_dir in root_dirs:
+    for root_dir, repos in iter_repositories_by_root(root_dirs):
         console.print(f"\n📂 [bold yellow]Scanning root directory:[/] {root_dir}\n")
 
         if not os.path.isdir(root_dir):
@@ -532,7 +560,7 @@ def main(root_dirs: list[str] = ROOT_DIRS) -> None:
             continue
 
         found_repos = False
-        for repo, path in iter_git_repositories(root_dir):
+        for repo, path in repos:
             found_repos = True
             if repo_has_branch_diff(path):
                 print(f"📦 [bold green]Found pending merge for {repo}[/]")
@@ -1,16 +1,38 @@
 # core/ollama.py
+import http.client
 import json
 import os
-import urllib.request
-import urllib.error
+import threading
+import time
+import urllib.parse
+from typing import Callable
+
+from core.diff_budget import estimate_tokens
+from utils import profiling
+from utils.common import env_int
 
 DEFAULT_HOST = "http://localhost:11434"
 DEFAULT_MODEL = "llama3.2"
 DEFAULT_TIMEOUT = 60.0
+DEFAULT_MAX_CONNECTIONS = 4
+DEFAULT_KEEP_ALIVE = "30m"
+DEFAULT_NUM_PREDICT = 512
+
+# Few distinct context sizes: Ollama reloads the model whenever num_ctx changes.
+NUM_CTX_BUCKETS = (2048, 4096, 8192, 16384, 32768)
+# Chat template tokens per message, and headroom for the estimate being low.
+_MESSAGE_OVERHEAD_TOKENS = 8
+_PROMPT_ESTIMATE_MARGIN = 1.2
+
+# How a pooled connection the server closed while idle fails: before any response byte
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
 
 class OllamaError(RuntimeError):
     pass
 
+class GenerationCancelled(OllamaError):
+    """Raised from an on_token callback to abandon a streaming generation."""
+
 def _resolve_timeout(raw_timeout: str) -> float:
     try:
         return float(raw_timeout)
@@ -30,62 +52,473 @@ def _resolve_optional_int(raw_value: str | None, minimum: int = 1) -> int | None
     return value
 
 
+def _resolve_keep_alive(raw_value: str | None) -> str | int | None:
+    """
+    OLLAMA_KEEP_ALIVE: duration string ("30m"), seconds ("-1" keeps the model
+    loaded forever) or empty to leave the server default.
+    """
+    if raw_value is None:
+        return DEFAULT_KEEP_ALIVE
+    raw_value = raw_value.strip()
+    if not raw_value:
+        return None
+    try:
+        return int(raw_value)
+    except ValueError:
+        return raw_value
+
+
+def _with_tag(model: str) -> str:
+    # /api/ps reports "llama3.2:latest" for a model requested as "llama3.2"
+    return model if ":" in model.rsplit("/", 1)[-1] else f"{model}:latest"
+
+
+def estimate_prompt_tokens(messages) -> int:
+    return sum(estimate_tokens(m.get("content") or "") + _MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def pick_num_ctx(prompt_tokens: int, num_predict: int | None, cap: int | None = None) -> int:
+    """
+    Smallest bucket holding prompt + answer, never above cap (OLLAMA_NUM_CTX).
+    """
+    needed = int(prompt_tokens * _PROMPT_ESTIMATE_MARGIN) + (num_predict or DEFAULT_NUM_PREDICT)
+    limit = cap or NUM_CTX_BUCKETS[-1]
+    for bucket in NUM_CTX_BUCKETS:
+        if bucket >= needed:
+            return min(bucket, limit)
+    return limit
+
+
+def is_streaming_enabled() -> bool:
+    return os.getenv("OLLAMA_STREAM", "1") == "1"
+
+
+class JsonObjectScanner:
+    """
+    Incremental brace matcher over streamed text: feed() returns every top-level
+    {...} block completed by the new chunk (quotes and escapes inside objects are
+    honoured, text around objects is ignored).
+    """
+
+    def __init__(self) -> None:
+        self.text = ""
+        self._pos = 0
+        self._depth = 0
+        self._start = -1
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> list[str]:
+        self.text += chunk
+        found: list[str] = []
+        for i in range(self._pos, len(self.text)):
+            ch = self.text[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = self._depth > 0
+            elif ch == "{":
+                if self._depth == 0:
+                    self._start = i
+                self._depth += 1
+            elif ch == "}" and self._depth:
+                self._depth -= 1
+                if self._depth == 0:
+                    found.append(self.text[self._start : i + 1])
+        self._pos = len(self.text)
+        return found
+
+
+def _complete_object(candidate: str, accept: Callable[[str], bool] | None) -> bool:
+    try:
+        parsed = json.loads(candidate)
+    except ValueError:
+        return False
+    return isinstance(parsed, dict) and (accept is None or accept(candidate))
+
+
+class OllamaClient:
+    """
+    Ollama HTTP client keeping persistent keep-alive connections.
+
+    Host, model, timeout, max_num_ctx and keep_alive are resolved once (arguments,
+    else OLLAMA_HOST, OLLAMA_MODEL, OLLAMA_TIMEOUT, OLLAMA_NUM_CTX, OLLAMA_KEEP_ALIVE).
+    Idle connections are pooled (up to max_connections, OLLAMA_MAX_CONNECTIONS) and
+    shared by threads; a pooled connection the server has dropped is replaced once,
+    transparently.
+
+    num_ctx is sized per request from the prompt estimate and num_predict (see
+    pick_num_ctx), with max_num_ctx as the upper bound. It never shrinks below the
+    largest size already sent: a smaller num_ctx would make Ollama reload the model.
+    """
+
+    def __init__(
+        self,
+        host: str | None = None,
+        model: str | None = None,
+        timeout: float | None = None,
+        max_num_ctx: int | None = None,
+        max_connections: int | None = None,
+        keep_alive: str | int | None = None,
+    ):
+        self.host = (host or os.getenv("OLLAMA_HOST", DEFAULT_HOST)).rstrip("/")
+        self.model = model or os.getenv("OLLAMA_MODEL", DEFAULT_MODEL)
+        self.timeout = timeout if timeout is not None else _resolve_timeout(os.getenv("OLLAMA_TIMEOUT", str(DEFAULT_TIMEOUT)))
+        self.max_num_ctx = (
+            max_num_ctx if max_num_ctx is not None else _resolve_optional_int(os.getenv("OLLAMA_NUM_CTX"), minimum=512)
+        )
+        self.max_connections = max_connections or env_int("OLLAMA_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS, minimum=1)
+        self.keep_alive = keep_alive if keep_alive is not None else _resolve_keep_alive(os.getenv("OLLAMA_KEEP_ALIVE"))
+
+        parsed = urllib.parse.urlsplit(self.host if "://" in self.host else f"http://{self.host}")
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise OllamaError(f"Invalid OLLAMA_HOST: {self.host}")
+        self._scheme = parsed.scheme
+        self._netloc = parsed.netloc
+        self._base_path = parsed.path.rstrip("/")
+
+        self._idle: list[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+        self._sent_num_ctx = 0
+
+    # ---------------- connections ----------------
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        if self._scheme == "https":
+            return http.client.HTTPSConnection(self._netloc, timeout=self.timeout)
+        return http.client.HTTPConnection(self._netloc, timeout=self.timeout)
+
+    def _acquire(self) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._new_connection(), False
+
+    def _release(self, conn: http.client.HTTPConnection, resp: http.client.HTTPResponse) -> None:
+        """Pool a connection whose response was fully read; close it otherwise."""
+        if resp.will_close or not resp.isclosed():
+            conn.close()
+            return
+        with self._lock:
+            if len(self._idle) < self.max_connections:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def _send(
+        self,
+        method: str,
+        path: str,
+        payload: dict | None = None,
+        timeout: float | None = None,
+    ) -> tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        """
+        timeout overrides the client timeout for this call (socket level). A pooled
+        connection the server already closed fails before any response byte
+        (RemoteDisconnected, broken pipe, reset): only then is the request retried,
+        on another connection and with the time already spent taken off the timeout.
+        Any other failure may come after Ollama started generating and is raised.
+        """
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        call_timeout = self.timeout if timeout is None else timeout
+        expires = time.monotonic() + call_timeout
+        while True:
+            conn, reused = self._acquire()
+            conn.timeout = call_timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(call_timeout)
+            try:
+                conn.request(method, f"{self._base_path}{path}", body=body, headers=headers)
+                return conn, conn.getresponse()
+            except (http.client.HTTPException, OSError) as e:
+                conn.close()
+                if not (reused and isinstance(e, _STALE_CONNECTION_ERRORS)):
+                    raise OllamaError(f"Ollama unreachable: {e}") from e
+                call_timeout = expires - time.monotonic()
+                if call_timeout <= 0:
+                    raise OllamaError(f"Ollama unreachable: {e}") from e
+
+    def _check_status(self, conn: http.client.HTTPConnection, resp: http.client.HTTPResponse) -> None:
+        if resp.status < 400:
+            return
+        try:
+            details = resp.read().decode("utf-8", errors="replace").strip()
+            self._release(conn, resp)
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            details = ""
+        raise OllamaError(f"Ollama HTTP {resp.status}: {details or resp.reason}")
+
+    def _request_json(
+        self,
+        method: str,
+        path: str,
+        payload: dict | None,
+        label: list[str],
+        timeout: float | None = None,
+    ) -> dict:
+        """One non-streaming call; label names it in the --profile report ([endpoint, model, ...])."""
+        target = label[1] if len(label) > 1 else self.host
+        started = profiling.now()
+        body = b""
+        status: int | None = None
+        try:
+            conn, resp = self._send(method, path, payload, timeout)
+            status = resp.status
+            self._check_status(conn, resp)
+            try:
+                body = resp.read()
+            except BaseException:
+                conn.close()
+                raise
+            self._release(conn, resp)
+            data = json.loads(body.decode("utf-8") or "{}")
+        except OllamaError:
+            raise
+        except Exception as e:
+            raise OllamaError(f"Ollama error: {e}") from e
+        finally:
+            profiling.record_call(
+                ["ollama", *label],
+                started,
+                0 if status == 200 else (status or -1),
+                body,
+                tool="ollama",
+                prefix=f"ollama {label[0]} ({target})",
+            )
+        if not isinstance(data, dict):
+            raise OllamaError(f"Unexpected Ollama response shape: {data}")
+        return data
+
+    # ---------------- API ----------------
+
+    def is_loaded(self, model: str | None = None) -> bool:
+        """True when /api/ps lists the model as resident."""
+        name = _with_tag(model or self.model)
+        data = self._request_json("GET", "/api/ps", None, ["ps"])
+        return any(_with_tag(m.get("name") or m.get("model") or "") == name for m in data.get("models") or [])
+
+    def show_model(self, model: str | None = None) -> dict:
+        """Model details from /api/show; raises OllamaError (HTTP 404) when it is not pulled."""
+        name = model or self.model
+        return self._request_json("POST", "/api/show", {"model": name}, ["show", name])
+
+    def load_model(self, model: str | None = None, num_ctx: int | None = None) -> None:
+        """Empty /api/generate: loads the model into memory without generating anything."""
+        name = model or self.model
+        payload: dict = {"model": name, "stream": False}
+        if num_ctx is not None:
+            payload["options"] = {"num_ctx": self._sticky_num_ctx(num_ctx)}
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        self._request_json("POST", "/api/generate", payload, ["generate", name, "--load"])
+
+    def context_size(self, messages, num_predict: int | None = None) -> int:
+        return pick_num_ctx(estimate_prompt_tokens(messages), num_predict, self.max_num_ctx)
+
+    def _sticky_num_ctx(self, num_ctx: int) -> int:
+        with self._lock:
+            self._sent_num_ctx = max(self._sent_num_ctx, num_ctx)
+            return self._sent_num_ctx
+
+    def _chat_payload(
+        self,
+        messages,
+        model: str,
+        temperature: float,
+        json_mode: bool,
+        stream: bool,
+        num_predict: int | None,
+        schema: dict | None = None,
+    ) -> dict:
+        payload = {
+            "model": model,
+            "messages": messages,
+            "stream": stream,
+            "options": {
+                "temperature": temperature,
+                "num_ctx": self._sticky_num_ctx(self.context_size(messages, num_predict)),
+            },
+        }
+        if num_predict is not None:
+            payload["options"]["num_predict"] = num_predict
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        if schema is not None:
+            payload["format"] = schema
+        elif json_mode:
+            payload["format"] = "json"
+        return payload
+
+    def chat(
+        self,
+        messages,
+        model: str | None = None,
+        temperature: float = 0.2,
+        json_mode: bool = False,
+        num_predict: int | None = None,
+        schema: dict | None = None,
+        timeout: float | None = None,
+    ) -> str:
+        """
+        Calls /api/chat and returns assistant content (string).
+        If json_mode=True, requests strict JSON output via Ollama "format":"json";
+        a JSON schema passed as schema constrains the output to that shape instead.
+        num_predict caps the answer length (and sizes num_ctx).
+        """
+        model_name = model or self.model
+        payload = self._chat_payload(messages, model_name, temperature, json_mode, False, num_predict, schema)
+
+        data = self._request_json("POST", "/api/chat", payload, ["chat", model_name], timeout)
+        msg = (data.get("message") or {}).get("content")
+        if not msg:
+            raise OllamaError(f"Unexpected Ollama response shape: {data}")
+        return msg
+
+    def chat_stream(
+        self,
+        messages,
+        model: str | None = None,
+        temperature: float = 0.2,
+        json_mode: bool = False,
+        accept: Callable[[str], bool] | None = None,
+        on_token: Callable[[str], None] | None = None,
+        num_predict: int | None = None,
+        schema: dict | None = None,
+        timeout: float | None = None,
+    ) -> str:
+        """
+        Streaming /api/chat. Returns the first complete JSON object that parses (and
+        passes accept) as soon as it has arrived, dropping the connection instead of
+        waiting for the model to stop; otherwise the whole content at end of stream.
+        on_token receives every content chunk (live preview).
+        """
+        model_name = model or self.model
+        payload = self._chat_payload(messages, model_name, temperature, json_mode, True, num_predict, schema)
+
+        started = profiling.now()
+        scanner = JsonObjectScanner()
+        status: int | None = None
+        try:
+            conn, resp = self._send("POST", "/api/chat", payload, timeout)
+            status = resp.status
+            self._check_status(conn, resp)
+            finished = False
+            try:
+                for raw_line in resp:
+                    if not raw_line.strip():
+                        continue
+                    chunk = json.loads(raw_line.decode("utf-8"))
+                    if chunk.get("error"):
+                        raise OllamaError(f"Ollama error: {chunk['error']}")
+
+                    token = (chunk.get("message") or {}).get("content") or ""
+                    if token:
+                        if on_token is not None:
+                            on_token(token)
+                        for candidate in scanner.feed(token):
+                            if _complete_object(candidate, accept):
+                                return candidate
+                    if chunk.get("done"):
+                        resp.read()  # drain the end of the chunked body so the connection can be reused
+                        finished = True
+                        break
+            finally:
+                if finished:
+                    self._release(conn, resp)
+                else:
+                    conn.close()
+        except OllamaError:
+            raise
+        except Exception as e:
+            raise OllamaError(f"Ollama error: {e}") from e
+        finally:
+            profiling.record_call(
+                ["ollama", "chat", model_name, "--stream"],
+                started,
+                0 if status == 200 else (status or -1),
+                scanner.text,
+                tool="ollama",
+                prefix=f"ollama chat ({model_name})",
+            )
+
+        if not scanner.text:
+            raise OllamaError("Unexpected Ollama response: empty stream")
+        return scanner.text
+
+
+_DEFAULT_CLIENT: OllamaClient | None = None
+_DEFAULT_CLIENT_LOCK = threading.Lock()
+
+
+def get_default_client() -> OllamaClient:
+    """Process-wide client shared by commit and merge generation."""
+    global _DEFAULT_CLIENT
+    with _DEFAULT_CLIENT_LOCK:
+        if _DEFAULT_CLIENT is None:
+            _DEFAULT_CLIENT = OllamaClient()
+        return _DEFAULT_CLIENT
+
+
+def set_default_client(client: OllamaClient | None) -> OllamaClient | None:
+    """Swaps the shared client (benchmarks, tests); None rebuilds it from env on next use."""
+    global _DEFAULT_CLIENT
+    with _DEFAULT_CLIENT_LOCK:
+        previous, _DEFAULT_CLIENT = _DEFAULT_CLIENT, client
+    return previous
+
+
 def chat_json(
     messages,
     model: str | None = None,
     temperature: float = 0.2,
     json_mode: bool = False,
+    num_predict: int | None = None,
+    schema: dict | None = None,
+    timeout: float | None = None,
 ) -> str:
-    """
-    Calls Ollama /api/chat and returns assistant content (string).
-    If json_mode=True, requests strict JSON output via Ollama "format":"json".
-    """
-    host = os.getenv("OLLAMA_HOST", DEFAULT_HOST)
-    model_name = model or os.getenv("OLLAMA_MODEL", DEFAULT_MODEL)
-    timeout = _resolve_timeout(os.getenv("OLLAMA_TIMEOUT", str(DEFAULT_TIMEOUT)))
-
-    payload = {
-        "model": model_name,
-        "messages": messages,
-        "stream": False,
-        "options": {
-            "temperature": temperature,
-        },
-    }
-
-    num_ctx = _resolve_optional_int(os.getenv("OLLAMA_NUM_CTX"), minimum=512)
-    if num_ctx is not None:
-        payload["options"]["num_ctx"] = num_ctx
-
-    if json_mode:
-        payload["format"] = "json"
-
-    url = f"{host}/api/chat"
-    req = urllib.request.Request(
-        url,
-        data=json.dumps(payload).encode("utf-8"),
-        headers={"Content-Type": "application/json"},
-        method="POST",
+    return get_default_client().chat(
+        messages,
+        model=model,
+        temperature=temperature,
+        json_mode=json_mode,
+        num_predict=num_predict,
+        schema=schema,
+        timeout=timeout,
     )
 
-    try:
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            data = json.loads(resp.read().decode("utf-8"))
-    except urllib.error.HTTPError as e:
-        details = ""
-        try:
-            details = e.read().decode("utf-8", errors="replace").strip()
-        except Exception:
-            details = ""
-        if details:
-            raise OllamaError(f"Ollama HTTP {e.code}: {details}") from e
-        raise OllamaError(f"Ollama HTTP {e.code}: {e.reason}") from e
-    except urllib.error.URLError as e:
-        raise OllamaError(f"Ollama unreachable: {e}") from e
-    except Exception as e:
-        raise OllamaError(f"Ollama error: {e}") from e
-
-    msg = (data.get("message") or {}).get("content")
-    if not msg:
-        raise OllamaError(f"Unexpected Ollama response shape: {data}")
-    return msg
+
+def chat_json_stream(
+    messages,
+    model: str | None = None,
+    temperature: float = 0.2,
+    json_mode: bool = False,
+    accept: Callable[[str], bool] | None = None,
+    on_token: Callable[[str], None] | None = None,
+    num_predict: int | None = None,
+    schema: dict | None = None,
+    timeout: float | None = None,
+) -> str:
+    return get_default_client().chat_stream(
+        messages,
+        model=model,
+        temperature=temperature,
+        json_mode=json_mode,
+        accept=accept,
+        on_token=on_token,
+        num_predict=num_predict,
+        schema=schema,
+        timeout=timeout,
+    )
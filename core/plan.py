@@ -0,0 +1,320 @@
+# core/plan.py
+"""
+Plan-then-execute mode (run.py --plan): plan every repo in parallel, approve
+once, then run the approved actions concurrently across repos.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+from rich.console import Console
+from rich.markup import escape
+from rich.table import Table
+
+from core import changelog, commit, merge, sync
+from core.config import DEFAULT_HEAD_BRANCH, ROOT_DIRS
+from core.repositories import iter_repositories_by_root
+from core.snapshot import collect_snapshot
+from core.staged_diff import read_staged_change
+from utils.common import env_int, is_dry_run
+from utils.console import ask_selection
+from utils.profiling import profile_repo
+
+console = Console()
+
+_RESULT_KEYS = ("committed", "pushed", "merged", "changelogs", "synced", "skipped", "failed")
+
+
+@dataclass(frozen=True)
+class PlannedAction:
+    repo: str
+    path: str
+    kind: str  # "commit", "push", "merge", "changelog" or "sync"
+    summary: str  # one line for the approval table
+    message: str = ""  # commit message or changelog block
+    title: str = ""  # PR title
+    body: str = ""  # PR body
+    pr_number: str = ""  # already open PR, if any
+    branch: str = ""  # default branch to pull
+
+
+@dataclass
+class RepoPlan:
+    repo: str
+    path: str
+    actions: list[PlannedAction] = field(default_factory=list)
+    notes: list[str] = field(default_factory=list)
+
+    def add(self, kind: str, summary: str, **details: str) -> None:
+        self.actions.append(PlannedAction(self.repo, self.path, kind, summary, **details))
+
+
+# ---------------- Phase 1: plan ----------------
+
+def _plan_commit(plan: RepoPlan) -> None:
+    snapshot = collect_snapshot(plan.path)
+    if snapshot is None:
+        plan.notes.append("git status failed")
+        return
+    if not snapshot.is_dirty:
+        return
+    if not snapshot.has_staged_changes:
+        plan.notes.append("changes not staged, no commit planned")
+        return
+
+    change = read_staged_change(plan.path)
+    if not change.files:
+        return
+
+    message = commit.generate_commit_message_with_ollama(plan.repo, change, show_status=False)
+    message = message or commit.fallback_commit_message(change)
+    plan.add("commit", message.splitlines()[0], message=message)
+    plan.add("push", f"git push origin {DEFAULT_HEAD_BRANCH}")
+
+
+def _plan_merge(plan: RepoPlan) -> None:
+    if not merge.repo_has_branch_diff(plan.path):
+        return
+    commit_summary = merge.get_commit_summary(plan.path)
+    if not commit_summary:
+        return
+
+    title, body = merge.generate_pr_text(plan.repo, commit_summary)
+    pr_number = merge.existing_pr_number(plan.path)
+    summary = f"merge existing PR #{pr_number}" if pr_number else title
+    plan.add("merge", summary, title=title, body=body, pr_number=pr_number)
+
+
+def _plan_changelog(plan: RepoPlan) -> None:
+    last_tag = changelog.get_last_tag(plan.path)
+    commits = changelog.get_commits_since_tag(plan.path, last_tag)
+    if not commits:
+        return
+
+    version_label = last_tag or "Unreleased"
+    block = changelog.generate_changelog(commits, version_label)
+    plan.add("changelog", f"[{version_label}] {len(commits)} commit(s)", message=block)
+
+
+def _plan_sync(plan: RepoPlan) -> None:
+    # git fetch is blocked in --dry-run: plan from the remote refs already there
+    fetched = not is_dry_run()
+    if fetched and not sync.fetch(plan.path, plan.repo):
+        plan.notes.append("fetch failed, no sync planned")
+        return
+
+    snapshot = collect_snapshot(plan.path)
+    branch = sync.get_default_remote_branch(plan.path, snapshot)
+    if not branch:
+        return
+
+    counts = snapshot.ahead_behind(branch, sync.REMOTE) if snapshot else None
+    if counts is None:
+        counts = sync.get_ahead_behind(plan.path, branch)
+    if not counts:
+        return
+
+    ahead, behind = counts
+    if ahead > 0 and behind > 0:
+        plan.notes.append(f"{branch} diverged from {sync.REMOTE}/{branch} (ahead {ahead}, behind {behind})")
+        return
+    if behind > 0:
+        stale = "" if fetched else " (dry-run: remote refs not fetched)"
+        plan.add("sync", f"pull {behind} commit(s) into {branch}{stale}", branch=branch)
+
+
+def plan_repo(repo: str, path: str) -> RepoPlan:
+    plan = RepoPlan(repo, path)
+    with profile_repo(repo):
+        for step in (_plan_commit, _plan_merge, _plan_changelog, _plan_sync):
+            try:
+                step(plan)
+            except Exception as e:
+                plan.notes.append(f"{step.__name__[len('_plan_'):]} planning failed: {e}")
+    return plan
+
+
+def collect_plans(repos: list[tuple[str, str]], workers: int) -> list[RepoPlan]:
+    """Plan every repo concurrently; results keep the input order."""
+    plans: list[RepoPlan | None] = [None] * len(repos)
+    with console.status(f"[bold cyan]Planning {len(repos)} repos...[/]", spinner="dots") as status:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="plan") as pool:
+            futures = {pool.submit(plan_repo, name, path): idx for idx, (name, path) in enumerate(repos)}
+            for done, future in enumerate(as_completed(futures), start=1):
+                plans[futures[future]] = future.result()
+                status.update(f"[bold cyan]Planning repos... {done}/{len(repos)}[/]")
+    return [plan for plan in plans if plan is not None]
+
+
+# ---------------- Phase 2: approve ----------------
+
+def show_plan(plans: list[RepoPlan], actions: list[PlannedAction]) -> None:
+    table = Table(title="📋 Planned actions", title_justify="left")
+    table.add_column("#", justify="right")
+    table.add_column("repo", style="bold green")
+    table.add_column("action", style="cyan")
+    table.add_column("details")
+    for idx, action in enumerate(actions, start=1):
+        table.add_row(str(idx), escape(action.repo), action.kind, escape(action.summary))
+    console.print(table)
+
+    for plan in plans:
+        for note in plan.notes:
+            console.print(f"ℹ️  [yellow]{plan.repo}[/]: {note}")
+
+
+# ---------------- Phase 3: execute ----------------
+
+def _execute_commit(action: PlannedAction) -> bool:
+    return commit.commit_with_message(action.path, action.message)
+
+
+def _execute_push(action: PlannedAction) -> bool:
+    return commit.push_head_branch(action.path)
+
+
+def _execute_merge(action: PlannedAction) -> bool:
+    try:
+        merge.ensure_clean_worktree(action.path)
+    except RuntimeError as e:
+        print(f"❌ {action.repo}: {e}")
+        return False
+
+    pr_number = action.pr_number or merge.open_pull_request(action.path, action.repo, action.title, action.body)
+    if not pr_number:
+        return False
+    if not merge.merge_pr_with_retry(action.path, action.repo, pr_number):
+        return False
+
+    merge_timeout = env_int("GH_PR_MERGE_TIMEOUT", 90, minimum=5)
+    if not merge.wait_for_pr_merge(action.path, action.repo, pr_number, timeout_seconds=merge_timeout):
+        return False
+
+    try:
+        merge.checkout_update_base_branch(action.path)
+    except RuntimeError as e:
+        print(f"❌ {action.repo}: {e}")
+        return False
+    print(f"⏭️  {action.repo}: PR #{pr_number} merged; tagging is interactive, skipped in --plan mode.")
+    return True
+
+
+def _execute_changelog(action: PlannedAction) -> bool:
+    if not changelog.update_changelog(action.path, action.message):
+        print(f"❌ {action.repo}: could not write {changelog.CHANGELOG_FILENAME}")
+        return False
+    return changelog.commit_and_push_changelog(action.path, show_status=False)
+
+
+def _execute_sync(action: PlannedAction) -> bool:
+    if not sync.repo_is_clean(action.path):
+        print(f"⚠️  {action.repo}: repo not clean, skip sync (stash/commit first).")
+        return False
+    if not sync.ensure_local_branch_exists(action.path, action.branch):
+        print(f"❌ {action.repo}: could not create/find local branch '{action.branch}'.")
+        return False
+    if not sync.checkout_branch(action.path, action.repo, action.branch):
+        return False
+    return sync.pull_ff_only(action.path, action.repo, action.branch)
+
+
+_EXECUTORS = {
+    "commit": (_execute_commit, "committed"),
+    "push": (_execute_push, "pushed"),
+    "merge": (_execute_merge, "merged"),
+    "changelog": (_execute_changelog, "changelogs"),
+    "sync": (_execute_sync, "synced"),
+}
+
+
+def execute_repo_actions(actions: list[PlannedAction], results: dict[str, int], lock: threading.Lock) -> None:
+    """
+    Executors return True (done) or False (failed: the repo's next actions are
+    skipped). Under --dry-run every action writes, so none runs: all count as skipped.
+    """
+    for idx, action in enumerate(actions):
+        execute, counter = _EXECUTORS[action.kind]
+        ok: bool | None = None
+        if is_dry_run():
+            print(f"🧪 {action.repo}: dry-run, {action.kind} not executed")
+        else:
+            with profile_repo(action.repo):
+                ok = execute(action)
+
+        with lock:
+            results["skipped" if ok is None else counter if ok else "failed"] += 1
+        if ok is None:
+            print(f"⏭️  {action.repo}: {action.kind} skipped")
+            continue
+        if ok:
+            print(f"✅ {action.repo}: {action.kind} done")
+            continue
+
+        remaining = ", ".join(a.kind for a in actions[idx + 1:])
+        print(f"❌ {action.repo}: {action.kind} failed" + (f", skipped {remaining}" if remaining else ""))
+        return
+
+
+def execute_plan(actions: list[PlannedAction], workers: int) -> dict[str, int]:
+    results = dict.fromkeys(_RESULT_KEYS, 0)
+    lock = threading.Lock()
+
+    by_repo: dict[str, list[PlannedAction]] = {}
+    for action in actions:
+        by_repo.setdefault(action.path, []).append(action)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="execute") as pool:
+        futures = [pool.submit(execute_repo_actions, repo_actions, results, lock) for repo_actions in by_repo.values()]
+        for future in futures:
+            future.result()
+    return results
+
+
+def run_plan(root_dirs: list[str], workers: int | None = None) -> dict[str, int]:
+    """
+    Same summary shape as auto_commit_all_repos ("committed", "pushed"), extended
+    with the other stages' counters.
+    """
+    workers = workers or env_int("DEVTOOLS_PLAN_WORKERS", 8, minimum=1)
+    results = dict.fromkeys(_RESULT_KEYS, 0)
+
+    all_repos: list[tuple[str, str]] = []
+    for root_dir, repos in iter_repositories_by_root(root_dirs):
+        if not os.path.isdir(root_dir):
+            console.print(f"⚠️  Root directory not found: {root_dir}")
+            continue
+
+        found = list(repos)
+        if not found:
+            console.print(f"⚠️  No repositories found in {root_dir}")
+        all_repos.extend(found)
+
+    if not all_repos:
+        return results
+
+    plans = collect_plans(all_repos, workers)
+    actions = [action for plan in plans for action in plan.actions]
+    show_plan(plans, actions)
+    if not actions:
+        console.print("✔️  Nothing to do.")
+        return results
+
+    selected = ask_selection("Approve actions", len(actions))
+    approved = [action for idx, action in enumerate(actions, start=1) if idx in selected]
+    if not approved:
+        console.print("⏭️  No action approved.")
+        return results
+
+    results = execute_plan(approved, workers)
+    console.print(
+        f"\n📊 committed {results['committed']}, pushed {results['pushed']}, merged {results['merged']}, "
+        f"changelogs {results['changelogs']}, synced {results['synced']}, skipped {results['skipped']}, "
+        f"failed {results['failed']}"
+    )
+    return results
+
+
+def main(root_dirs: list[str] = ROOT_DIRS) -> dict[str, int]:
+    return run_plan(root_dirs)
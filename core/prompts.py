@@ -25,14 +25,40 @@ Rules:
 - breaking is true only if there is a breaking change.
 """
 
+COMMIT_PLAIN_SYSTEM = (
+    "Return ONLY a Conventional Commit message in plain text.\n"
+    "First line format: type(scope optional): subject\n"
+    "Allowed types: feat, fix, refactor, docs, test, chore, perf, ci, build, style.\n"
+    "Optional body lines must be bullets prefixed by '- '."
+)
+
 COMMIT_USER_TEMPLATE = """Repository: {repo}
-Changed files:
+Changed files (A added, M modified, D deleted, R renamed; +/- lines):
 {files}
 
 Staged diff:
 {diff}
 """
 
+DIFF_MAP_SYSTEM = """You summarize one part of a large staged git diff.
+Return 2 to 5 short bullet points starting with '- ', most important change first.
+Describe what changed and, when visible, why. Plain text only, no preamble.
+"""
+
+DIFF_MAP_USER_TEMPLATE = """Repository: {repo}
+Part {index} of {total}
+
+{diff}
+"""
+
+COMMIT_REDUCE_TEMPLATE = """Repository: {repo}
+Changed files (A added, M modified, D deleted, R renamed; +/- lines):
+{files}
+
+The staged diff is too large to show. Summaries of its parts:
+{summaries}
+"""
+
 PR_SYSTEM = """You are a senior engineer writing a Pull Request for merging one release branch into another.
 
 Rules:
@@ -53,6 +79,20 @@ Rules:
 - Do not invent tests. If no explicit test evidence is present, say so in Testing.
 """
 
+PR_PLAIN_SYSTEM = (
+    "Return plain text only with this exact structure:\n"
+    "TITLE: <max 80 chars>\n"
+    "## What\n"
+    "...\n"
+    "## Why\n"
+    "...\n"
+    "## Testing\n"
+    "...\n"
+    "## Notes\n"
+    "...\n"
+    "Do not invent tests; if unknown write that testing evidence is not provided."
+)
+
 PR_USER_TEMPLATE = """Repository: {repo}
 Base: {base}
 Head: {head}
@@ -0,0 +1,181 @@
+# core/refs.py
+"""
+Pure-Python reader for the "files" ref backend: .git/HEAD, loose refs under refs/
+and packed-refs, including the `gitdir:` indirection of worktrees and submodules.
+
+Anything this module cannot answer with certainty (reftable repos, unreadable or
+malformed files) raises RefsUnavailable so callers fall back to spawning git.
+"""
+
+import os
+import re
+import threading
+from dataclasses import dataclass
+
+_OID_RE = re.compile(r"^(?:[0-9a-f]{40}|[0-9a-f]{64})$")
+
+# Refs that belong to each worktree rather than to the shared common dir
+_PER_WORKTREE_PREFIXES = ("refs/bisect/", "refs/worktree/", "refs/rewritten/")
+
+_MAX_SYMREF_DEPTH = 5
+
+_packed_cache: dict[str, tuple[int, int, dict[str, str]]] = {}
+_packed_lock = threading.Lock()
+
+
+class RefsUnavailable(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class GitDirs:
+    git_dir: str  # per-worktree dir (HEAD lives here)
+    common_dir: str  # shared refs/, packed-refs, config
+
+
+def _read_text(path: str) -> str | None:
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return fh.read()
+    except FileNotFoundError:
+        return None
+    except (OSError, UnicodeDecodeError) as e:
+        raise RefsUnavailable(f"cannot read {path}: {e}") from e
+
+
+def resolve_git_dirs(repo_path: str) -> GitDirs:
+    git_entry = os.path.join(repo_path, ".git")
+    if os.path.isdir(git_entry):
+        git_dir = git_entry
+    else:
+        content = _read_text(git_entry)
+        if content is None or not content.startswith("gitdir:"):
+            raise RefsUnavailable(f"{repo_path}: no usable .git entry")
+        target = content[len("gitdir:"):].strip()
+        git_dir = target if os.path.isabs(target) else os.path.normpath(os.path.join(repo_path, target))
+
+    common_dir = git_dir
+    common = _read_text(os.path.join(git_dir, "commondir"))
+    if common is not None:
+        common = common.strip()
+        common_dir = common if os.path.isabs(common) else os.path.normpath(os.path.join(git_dir, common))
+
+    if os.path.isdir(os.path.join(common_dir, "reftable")):
+        raise RefsUnavailable(f"{repo_path}: reftable ref storage")
+    config = _read_text(os.path.join(common_dir, "config")) or ""
+    if "refstorage" in config.lower():
+        raise RefsUnavailable(f"{repo_path}: non-default ref storage")
+
+    return GitDirs(git_dir, common_dir)
+
+
+def _packed_refs(common_dir: str) -> dict[str, str]:
+    """refname -> oid from packed-refs, re-parsed only when its mtime/size change."""
+    path = os.path.join(common_dir, "packed-refs")
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return {}
+    except OSError as e:
+        raise RefsUnavailable(f"cannot stat {path}: {e}") from e
+
+    with _packed_lock:
+        cached = _packed_cache.get(path)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2]
+
+    refs: dict[str, str] = {}
+    for line in (_read_text(path) or "").splitlines():
+        if not line or line.startswith("#") or line.startswith("^"):
+            continue
+        oid, _, name = line.partition(" ")
+        if not _OID_RE.match(oid) or not name:
+            raise RefsUnavailable(f"malformed packed-refs line in {path}")
+        refs[name] = oid
+
+    with _packed_lock:
+        _packed_cache[path] = (st.st_mtime_ns, st.st_size, refs)
+    return refs
+
+
+def _ref_dir(dirs: GitDirs, refname: str) -> str:
+    if refname == "HEAD" or "/" not in refname or refname.startswith(_PER_WORKTREE_PREFIXES):
+        return dirs.git_dir
+    return dirs.common_dir
+
+
+def read_raw_ref(dirs: GitDirs, refname: str) -> str | None:
+    """
+    'ref: <target>' for symbolic refs, the oid for direct refs, None if missing.
+    """
+    loose = _read_text(os.path.join(_ref_dir(dirs, refname), *refname.split("/")))
+    if loose is not None:
+        value = loose.strip()
+        if value.startswith("ref:"):
+            return "ref: " + value[4:].strip()
+        if _OID_RE.match(value):
+            return value
+        raise RefsUnavailable(f"unexpected content in loose ref {refname}")
+    return _packed_refs(dirs.common_dir).get(refname)
+
+
+def resolve_ref(dirs: GitDirs, refname: str) -> str | None:
+    """Follow symbolic refs down to an oid; None when the ref (or its target) is missing."""
+    name = refname
+    for _ in range(_MAX_SYMREF_DEPTH):
+        value = read_raw_ref(dirs, name)
+        if value is None:
+            return None
+        if not value.startswith("ref: "):
+            return value
+        name = value[5:]
+    raise RefsUnavailable(f"symbolic ref chain too deep for {refname}")
+
+
+def current_branch(repo_path: str) -> str:
+    """
+    Same answer as `git branch --show-current`: the branch name (also on an unborn
+    branch), or "" when HEAD is detached.
+    """
+    head = read_raw_ref(resolve_git_dirs(repo_path), "HEAD")
+    if head is None:
+        raise RefsUnavailable(f"{repo_path}: HEAD missing")
+    if head.startswith("ref: refs/heads/"):
+        return head[len("ref: refs/heads/"):]
+    if head.startswith("ref: "):
+        raise RefsUnavailable(f"{repo_path}: HEAD points outside refs/heads")
+    return ""
+
+
+def symbolic_ref_target(repo_path: str, refname: str) -> str | None:
+    """Target of a symbolic ref (refs/remotes/origin/HEAD -> refs/remotes/origin/main)."""
+    value = read_raw_ref(resolve_git_dirs(repo_path), refname)
+    if value is None or not value.startswith("ref: "):
+        return None
+    return value[5:]
+
+
+def ref_exists(repo_path: str, refname: str) -> bool:
+    """Same answer as `git show-ref --verify --quiet <refname>`."""
+    return resolve_ref(resolve_git_dirs(repo_path), refname) is not None
+
+
+def list_refs(repo_path: str, prefix: str) -> dict[str, str]:
+    """
+    refname -> raw value (oid or 'ref: ...') for every ref under prefix ("refs/tags/"),
+    merging packed-refs with loose refs (loose wins, as in git).
+    """
+    dirs = resolve_git_dirs(repo_path)
+    refs = {name: oid for name, oid in _packed_refs(dirs.common_dir).items() if name.startswith(prefix)}
+
+    base = os.path.join(dirs.common_dir, *prefix.rstrip("/").split("/"))
+    for dirpath, _, filenames in os.walk(base):
+        rel_dir = os.path.relpath(dirpath, dirs.common_dir).replace(os.sep, "/")
+        for filename in filenames:
+            if filename.endswith(".lock"):
+                continue
+            name = f"{rel_dir}/{filename}"
+            value = read_raw_ref(dirs, name)
+            if value is not None:
+                refs[name] = value
+    return refs
@@ -0,0 +1,84 @@
+# core/repo_index.py
+"""
+On-disk index of discovered repositories, one JSON file per root. A directory
+whose mtime is unchanged reuses its recorded children without being listed.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any
+
+from utils.common import user_cache_dir
+
+INDEX_VERSION = 1
+
+_memory: dict[str, dict[str, Any]] = {}
+_memory_lock = threading.Lock()
+
+
+def index_path(root_dir: str) -> str:
+    key = hashlib.sha1(os.path.abspath(root_dir).encode("utf-8")).hexdigest()[:16]
+    return str(user_cache_dir("repo-index") / f"{key}.json")
+
+
+def _fingerprint(options) -> dict[str, Any]:
+    return {
+        "max_depth": options.max_depth,
+        "prune": sorted(options.prune),
+        "submodules": options.submodules,
+    }
+
+
+def load_index(root_dir: str, options) -> dict[str, dict[str, Any]]:
+    """
+    Returns the recorded dirs for root_dir, or {} when missing, unreadable, or
+    recorded with different scan options.
+    """
+    path = index_path(root_dir)
+    with _memory_lock:
+        data = _memory.get(path)
+
+    if data is None:
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    if not isinstance(data, dict):
+        return {}
+    if data.get("version") != INDEX_VERSION or data.get("options") != _fingerprint(options):
+        return {}
+    dirs = data.get("dirs")
+    return dirs if isinstance(dirs, dict) else {}
+
+
+def save_index(root_dir: str, options, dirs: dict[str, dict[str, Any]]) -> None:
+    path = index_path(root_dir)
+    data = {
+        "version": INDEX_VERSION,
+        "root": os.path.abspath(root_dir),
+        "options": _fingerprint(options),
+        "dirs": dirs,
+    }
+    with _memory_lock:
+        _memory[path] = data
+
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except OSError:
+        # The index is an optimisation only; a failed write just means a colder next run.
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def clear_memory() -> None:
+    with _memory_lock:
+        _memory.clear()
@@ -1,5 +1,36 @@
 import os
+import queue
+import threading
 from collections.abc import Iterator
+from dataclasses import dataclass, field
+
+from core import repo_index
+from core.config import REPO_INDEX_ENABLED, REPO_SCAN_MAX_DEPTH, REPO_SCAN_PRUNE, REPO_SCAN_SUBMODULES
+
+_RESCAN = False
+_rescanned: set[str] = set()  # roots whose index --rescan already rebuilt during this run
+
+
+@dataclass(frozen=True)
+class ScanOptions:
+    """
+    max_depth: how many directory levels below the root are inspected (1 = direct children only).
+    prune: directory names that are never entered.
+    submodules: keep descending into repos that declare a .gitmodules file.
+    """
+    max_depth: int = REPO_SCAN_MAX_DEPTH
+    prune: frozenset[str] = field(default=REPO_SCAN_PRUNE)
+    submodules: bool = REPO_SCAN_SUBMODULES
+
+
+def set_rescan(state: bool = True) -> None:
+    """
+    Ignore the on-disk repo index and rebuild it from a full scan, once per root:
+    later stages of the same run read the index that scan saved.
+    """
+    global _RESCAN
+    _RESCAN = state
+    _rescanned.clear()
 
 
 def is_git_repo(path: str) -> bool:
@@ -7,11 +38,168 @@ def is_git_repo(path: str) -> bool:
     return os.path.isdir(git_entry) or os.path.isfile(git_entry)
 
 
-def iter_git_repositories(root_dir: str) -> Iterator[tuple[str, str]]:
+def _has_git_entry(path: str) -> bool:
+    # A single lstat covers both layouts: .git directory and .git file (worktrees, submodules).
+    return os.path.lexists(os.path.join(path, ".git"))
+
+
+def _subdirectories(path: str, options: ScanOptions, seen_links: set[tuple[int, int]]) -> list[os.DirEntry]:
+    """
+    Sorted child directories of path, using scandir's cached d_type so plain
+    directories cost no extra stat. Symlinked directories are followed once.
+    """
+    try:
+        with os.scandir(path) as it:
+            entries = list(it)
+    except OSError:
+        return []
+
+    dirs: list[os.DirEntry] = []
+    for entry in entries:
+        if entry.name == ".git" or entry.name in options.prune:
+            continue
+        try:
+            if not entry.is_dir():
+                continue
+            if entry.is_symlink():
+                st = entry.stat()
+                key = (st.st_dev, st.st_ino)
+                if key in seen_links:
+                    continue
+                seen_links.add(key)
+        except OSError:
+            continue
+        dirs.append(entry)
+
+    dirs.sort(key=lambda e: e.name)
+    return dirs
+
+
+def _walk(
+    root_dir: str,
+    options: ScanOptions,
+    previous: dict[str, dict],
+    record: dict[str, dict],
+) -> Iterator[tuple[str, str]]:
+    """
+    Depth-first, sorted walk. Directories whose mtime matches their entry in
+    `previous` reuse the recorded repo flag and children instead of being listed
+    again; every visited directory is written to `record`.
+    """
+    seen_links: set[tuple[int, int]] = set()
+    # Explicit stack instead of recursion: (relative path, depth); pushed reversed so pop() keeps sorted order.
+    stack: list[tuple[str, int]] = [("", 0)]
+
+    while stack:
+        rel, depth = stack.pop()
+        path = os.path.join(root_dir, rel) if rel else root_dir
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            continue
+
+        cached = previous.get(rel)
+        fresh = cached is not None and cached.get("mtime") == mtime
+
+        if fresh:
+            is_repo = bool(cached.get("repo"))
+            children = cached.get("children")
+        else:
+            is_repo = bool(rel) and _has_git_entry(path)
+            descend = not is_repo or (options.submodules and os.path.isfile(os.path.join(path, ".gitmodules")))
+            if descend and depth < options.max_depth:
+                children = [entry.name for entry in _subdirectories(path, options, seen_links)]
+            else:
+                children = None
+
+        record[rel] = {"mtime": mtime, "repo": is_repo, "children": children}
+
+        if is_repo:
+            yield rel, path
+
+        for name in reversed(children or []):
+            stack.append((os.path.join(rel, name) if rel else name, depth + 1))
+
+
+def discover_git_repositories(
+    root_dir: str,
+    options: ScanOptions | None = None,
+    use_index: bool | None = None,
+) -> Iterator[tuple[str, str]]:
+    """
+    Yield (repo_name, repo_path) for every repo below root_dir as soon as it is found.
+    repo_name is the path relative to root_dir, so nested groups stay distinguishable
+    ("clients/api").
+
+    Repos are leaves unless they carry a .gitmodules file and submodules are enabled.
+    With the index enabled (default), unchanged subtrees are served from the on-disk
+    index and the refreshed index is saved once the walk completes.
+    """
+    options = options or ScanOptions()
     if not os.path.isdir(root_dir):
         return
 
-    for repo_name in sorted(os.listdir(root_dir)):
-        repo_path = os.path.join(root_dir, repo_name)
-        if os.path.isdir(repo_path) and is_git_repo(repo_path):
-            yield repo_name, repo_path
+    if use_index is None:
+        use_index = REPO_INDEX_ENABLED
+    root_key = os.path.abspath(root_dir)
+    rescan = _RESCAN and root_key not in _rescanned
+    previous = repo_index.load_index(root_dir, options) if use_index and not rescan else {}
+    record: dict[str, dict] = {}
+
+    yield from _walk(root_dir, options, previous, record)
+
+    if use_index:
+        repo_index.save_index(root_dir, options, record)
+        _rescanned.add(root_key)
+
+
+def iter_git_repositories(root_dir: str) -> Iterator[tuple[str, str]]:
+    yield from discover_git_repositories(root_dir)
+
+
+_DONE = object()
+
+
+def _scan_into_queue(root_dir: str, options: ScanOptions, out: queue.Queue) -> None:
+    try:
+        for item in discover_git_repositories(root_dir, options):
+            out.put(item)
+    except Exception as exc:  # surfaced to the consumer thread
+        out.put(exc)
+    finally:
+        out.put(_DONE)
+
+
+def _drain(out: queue.Queue) -> Iterator[tuple[str, str]]:
+    while True:
+        item = out.get()
+        if item is _DONE:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+def iter_repositories_by_root(
+    root_dirs: list[str],
+    options: ScanOptions | None = None,
+) -> Iterator[tuple[str, Iterator[tuple[str, str]]]]:
+    """
+    Start scanning every root concurrently, then yield (root_dir, repos) in the given
+    root order. Each repos iterator streams results while its scan is still running,
+    so later roots are usually complete by the time the caller reaches them.
+    """
+    options = options or ScanOptions()
+    queues: list[tuple[str, queue.Queue]] = []
+    for root_dir in root_dirs:
+        out: queue.Queue = queue.Queue()
+        threading.Thread(
+            target=_scan_into_queue,
+            args=(root_dir, options, out),
+            name=f"repo-scan:{root_dir}",
+            daemon=True,
+        ).start()
+        queues.append((root_dir, out))
+
+    for root_dir, out in queues:
+        yield root_dir, _drain(out)
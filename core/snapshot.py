@@ -0,0 +1,210 @@
+# core/snapshot.py
+"""
+RepoSnapshot: branch, upstream, ahead/behind, HEAD and working tree state of a repo
+from two git calls:
+
+  git status --porcelain=v2 --branch -z
+  git for-each-ref refs/heads refs/remotes   (branch tips, symrefs, upstream tracking)
+"""
+
+from dataclasses import dataclass, field
+
+from utils.common import command_has_output, run_command
+
+_REF_FORMAT = "%(refname)%00%(objectname)%00%(objectname:short)%00%(symref)%00%(upstream)%00%(upstream:track,nobracket)"
+
+# Leading fields before the path for each porcelain v2 record kind
+_V2_FIELDS_BEFORE_PATH = {"1": 8, "2": 9, "u": 10}
+
+
+@dataclass(frozen=True)
+class StatusEntry:
+    kind: str  # "1" changed, "2" renamed/copied, "u" unmerged, "?" untracked
+    xy: str  # porcelain v2 XY, "." meaning unmodified ("??" for untracked)
+    path: str
+    orig_path: str = ""
+
+    @property
+    def staged(self) -> bool:
+        return self.kind != "?" and self.xy[0] != "."
+
+    @property
+    def unstaged(self) -> bool:
+        return self.kind == "?" or self.xy[1] != "."
+
+
+@dataclass(frozen=True)
+class RefInfo:
+    name: str
+    oid: str
+    short_oid: str
+    symref: str = ""
+    upstream: str = ""
+    track: str = ""  # "ahead 1, behind 2", "gone" or ""
+
+
+@dataclass(frozen=True)
+class RepoSnapshot:
+    path: str
+    branch: str | None  # None when HEAD is detached
+    head_oid: str | None  # None on an unborn branch
+    upstream: str | None
+    ahead: int | None
+    behind: int | None
+    entries: tuple[StatusEntry, ...] = ()
+    refs: dict[str, RefInfo] = field(default_factory=dict, compare=False, hash=False)
+
+    @property
+    def is_dirty(self) -> bool:
+        return bool(self.entries)
+
+    @property
+    def has_staged_changes(self) -> bool:
+        return any(e.staged for e in self.entries)
+
+    @property
+    def has_unstaged_changes(self) -> bool:
+        return any(e.unstaged for e in self.entries)
+
+    @property
+    def files(self) -> list[str]:
+        return [e.path for e in self.entries]
+
+    def default_remote_branch(self, remote: str) -> str | None:
+        """Branch name origin/HEAD points to (e.g. 'main'), if the remote HEAD is known."""
+        info = self.refs.get(f"refs/remotes/{remote}/HEAD")
+        prefix = f"refs/remotes/{remote}/"
+        if info and info.symref.startswith(prefix):
+            return info.symref[len(prefix):] or None
+        return None
+
+    def has_local_branch(self, branch: str) -> bool:
+        return f"refs/heads/{branch}" in self.refs
+
+    def short_oid(self, ref: str) -> str | None:
+        info = self.refs.get(ref)
+        return info.short_oid if info else None
+
+    def ahead_behind(self, branch: str, remote: str) -> tuple[int, int] | None:
+        """
+        (ahead, behind) of branch vs <remote>/<branch>, answered from upstream tracking
+        info. None when the branch does not track exactly that ref (caller falls back).
+        """
+        info = self.refs.get(f"refs/heads/{branch}")
+        if not info or info.upstream != f"refs/remotes/{remote}/{branch}":
+            return None
+        return parse_track(info.track)
+
+
+def parse_track(track: str) -> tuple[int, int] | None:
+    """'ahead 1, behind 2' -> (1, 2); '' -> (0, 0); 'gone' -> None."""
+    track = (track or "").strip()
+    if track == "gone":
+        return None
+    ahead = behind = 0
+    for part in filter(None, (p.strip() for p in track.split(","))):
+        word, _, count = part.partition(" ")
+        try:
+            value = int(count)
+        except ValueError:
+            return None
+        if word == "ahead":
+            ahead = value
+        elif word == "behind":
+            behind = value
+        else:
+            return None
+    return ahead, behind
+
+
+def parse_status_v2(raw: str) -> dict:
+    """
+    Parse `git status --porcelain=v2 --branch -z` output into the header values and
+    a tuple of StatusEntry.
+    """
+    info: dict = {"branch": None, "head_oid": None, "upstream": None, "ahead": None, "behind": None}
+    entries: list[StatusEntry] = []
+
+    records = raw.split("\0")
+    i = 0
+    while i < len(records):
+        record = records[i]
+        i += 1
+        if not record:
+            continue
+
+        if record.startswith("# "):
+            key, _, value = record[2:].partition(" ")
+            if key == "branch.oid":
+                info["head_oid"] = None if value == "(initial)" else value
+            elif key == "branch.head":
+                info["branch"] = None if value == "(detached)" else value
+            elif key == "branch.upstream":
+                info["upstream"] = value
+            elif key == "branch.ab":
+                parts = value.split()
+                if len(parts) == 2:
+                    info["ahead"] = int(parts[0].lstrip("+"))
+                    info["behind"] = int(parts[1].lstrip("-"))
+            continue
+
+        kind = record[0]
+        if kind == "?":
+            entries.append(StatusEntry("?", "??", record[2:]))
+            continue
+        if kind not in _V2_FIELDS_BEFORE_PATH:
+            continue  # "!" ignored entries or unknown future record kinds
+
+        fields = record.split(" ", _V2_FIELDS_BEFORE_PATH[kind])
+        if len(fields) <= _V2_FIELDS_BEFORE_PATH[kind]:
+            continue
+        orig_path = ""
+        if kind == "2" and i < len(records):
+            # -z puts the rename/copy source in its own record
+            orig_path = records[i]
+            i += 1
+        entries.append(StatusEntry(kind, fields[1], fields[-1], orig_path))
+
+    info["entries"] = tuple(entries)
+    return info
+
+
+def parse_refs(raw: str) -> dict[str, RefInfo]:
+    refs: dict[str, RefInfo] = {}
+    for line in raw.splitlines():
+        parts = line.split("\0")
+        if len(parts) != 6:
+            continue
+        refs[parts[0]] = RefInfo(*parts)
+    return refs
+
+
+def collect_snapshot(repo_path: str) -> RepoSnapshot | None:
+    """
+    Returns None when git status fails (not a repo, corrupted index...).
+    """
+    status = run_command(["git", "status", "--porcelain=v2", "--branch", "-z"], cwd=repo_path, silent=True)
+    if status.returncode != 0:
+        return None
+
+    refs = run_command(
+        ["git", "for-each-ref", f"--format={_REF_FORMAT}", "refs/heads", "refs/remotes"],
+        cwd=repo_path,
+        silent=True,
+    )
+
+    info = parse_status_v2(status.stdout or "")
+    return RepoSnapshot(
+        path=repo_path,
+        refs=parse_refs(refs.stdout or "") if refs.returncode == 0 else {},
+        **info,
+    )
+
+
+def is_worktree_dirty(repo_path: str) -> bool:
+    """
+    Cheapest dirty check: stops reading `git status --porcelain` at the first byte.
+    A failing status counts as dirty so callers stay on the safe side.
+    """
+    has_output = command_has_output(["git", "status", "--porcelain", "-z"], cwd=repo_path)
+    return has_output is not False
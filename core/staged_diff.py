@@ -0,0 +1,335 @@
+# core/staged_diff.py
+"""
+StagedChange: the staged files (status, rename, numstat, kept patch) read from
+one `git diff --cached --numstat --summary --patch -z` stream, capped at
+DEVTOOLS_MAX_DIFF_BYTES. Generated files keep their counts but not their hunks.
+"""
+
+from dataclasses import dataclass
+from functools import cached_property
+
+from core.classifier import category
+from core.diff_budget import WEIGHT_GENERATED, FileDiff, file_weight, parse_diff
+from utils.common import env_int, open_command_stream, run_command
+
+_COMMAND = ["git", "diff", "--cached", "--numstat", "--summary", "--patch", "-z", "--no-color", "--no-ext-diff"]
+_SECTION = "diff --git "
+_NEXT_SECTION = b"\n" + _SECTION.encode()
+_HEADER_ENDS = (b"\n@@", b"\nBinary files ", _NEXT_SECTION)
+_CHUNK = 1 << 16
+_ATTR_BATCH = 1000  # paths per git check-attr call
+
+
+def max_diff_bytes() -> int:
+    return env_int("DEVTOOLS_MAX_DIFF_BYTES", 2 * 1024 * 1024, minimum=64 * 1024)
+
+
+@dataclass(frozen=True)
+class NumStat:
+    path: str
+    added: int | None  # None for binary files
+    deleted: int | None
+    old_path: str = ""  # renames / copies
+
+    @property
+    def binary(self) -> bool:
+        return self.added is None
+
+
+@dataclass(frozen=True)
+class StagedFile:
+    path: str
+    status: str  # "A" added, "D" deleted, "R" renamed, "M" otherwise
+    added: int | None  # None for binary files
+    deleted: int | None
+    old_path: str = ""
+    patch: str = ""  # "diff --git" section as kept: whole, partial or header only
+    omitted: str = ""  # "generated" / "size limit" when hunks are missing
+
+    @property
+    def binary(self) -> bool:
+        return self.added is None
+
+    @property
+    def summary(self) -> str:
+        name = f"{self.old_path} -> {self.path}" if self.old_path else self.path
+        if self.binary:
+            return f"{self.status} {name} (binary)"
+        return f"{self.status} {name} (+{self.added} -{self.deleted})"
+
+    @cached_property
+    def diff(self) -> FileDiff:
+        """The file as diff_budget sees it, with the numstat path and counts."""
+        parsed = parse_diff(self.render())
+        diff = parsed[0] if parsed else FileDiff(self.path)
+        diff.path, diff.binary = self.path, self.binary
+        if not self.binary:
+            diff.added, diff.deleted = self.added, self.deleted
+        return diff
+
+    @property
+    def hunks(self) -> list[list[str]]:
+        return self.diff.hunks
+
+    def render(self) -> str:
+        if not self.omitted:
+            return self.patch
+        counts = "binary" if self.binary else f"+{self.added} -{self.deleted}"
+        verb = "truncated" if self.omitted == "size limit" else "excluded"
+        patch = self.patch or f"{_SECTION}a/{self.old_path or self.path} b/{self.path}"
+        return f"{patch}\nDiff {verb} ({self.omitted}): {counts}"
+
+
+@dataclass(frozen=True)
+class StagedChange:
+    files: tuple[StagedFile, ...]
+    patch_bytes: int  # patch bytes kept
+    truncated: bool  # the byte budget stopped the stream
+
+    @property
+    def paths(self) -> list[str]:
+        return [f.path for f in self.files]
+
+    @cached_property
+    def text(self) -> str:
+        return "\n".join(f.render() for f in self.files)
+
+    def only(self, *paths: str) -> bool:
+        """True when something is staged and nothing outside paths is."""
+        return bool(self.files) and set(self.paths) <= set(paths)
+
+    def file_diffs(self) -> list[FileDiff]:
+        return [f.diff for f in self.files]
+
+    @classmethod
+    def from_patch(cls, text: str) -> "StagedChange":
+        """Model of a plain unified diff (tests, benchmarks): counts come from its hunks."""
+        files = []
+        for section in _split_sections(text):
+            diff = parse_diff(section)[0]
+            files.append(StagedFile(diff.path, _status_from_header(diff.header), diff.added, diff.deleted, patch=section))
+        return cls(tuple(files), len(text.encode("utf-8")), False)
+
+
+EMPTY_CHANGE = StagedChange((), 0, False)
+
+
+def _split_sections(text: str) -> list[str]:
+    parts = text.split(f"\n{_SECTION}")
+    sections = [parts[0], *(_SECTION + part for part in parts[1:])]
+    return [s for s in sections if s.startswith(_SECTION)]
+
+
+def _status_from_header(header: list[str]) -> str:
+    for line in header:
+        if line.startswith("new file mode"):
+            return "A"
+        if line.startswith("deleted file mode"):
+            return "D"
+        if line.startswith(("rename from", "copy from")):
+            return "R"
+    return "M"
+
+
+_C_ESCAPES = {"a": 7, "b": 8, "t": 9, "n": 10, "v": 11, "f": 12, "r": 13, '"': 34, "\\": 92}
+
+
+def unquote_c_path(path: str) -> str:
+    """
+    Undo git's C-style quoting ("\\303\\274.txt", core.quotePath), which -z does
+    not turn off in --summary lines. Unquoted paths are returned as is.
+    """
+    if len(path) < 2 or not (path.startswith('"') and path.endswith('"')):
+        return path
+    raw = bytearray()
+    body = path[1:-1]
+    i = 0
+    while i < len(body):
+        char = body[i]
+        if char != "\\" or i + 1 >= len(body):
+            raw += char.encode("utf-8")
+            i += 1
+        elif body[i + 1] in "01234567":
+            raw.append(int(body[i + 1:i + 4], 8))
+            i += 4
+        else:
+            raw.append(_C_ESCAPES.get(body[i + 1], ord(body[i + 1])))
+            i += 2
+    return raw.decode("utf-8", errors="replace")
+
+
+def parse_head(head: bytes) -> tuple[list[NumStat], dict[str, str]]:
+    """Numstat records and summary statuses ({path: "A" | "D"}) written before the patch."""
+    stats: list[NumStat] = []
+    statuses: dict[str, str] = {}
+    tokens = head.decode("utf-8", errors="replace").split("\0")
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        i += 1
+        if token.startswith(" "):
+            # " create mode 100644 path\n delete mode 100644 path\n rename ..."
+            for line in token.splitlines():
+                kind, _, rest = line.lstrip().partition(" mode ")
+                if kind in ("create", "delete"):
+                    statuses[unquote_c_path(rest.split(" ", 1)[1])] = "A" if kind == "create" else "D"
+            continue
+        if not token:
+            continue
+        added, deleted, path = token.split("\t", 2)
+        old_path = ""
+        if not path and i + 1 < len(tokens):
+            old_path, path = tokens[i], tokens[i + 1]
+            i += 2
+        binary = added == "-"
+        stats.append(NumStat(path, None if binary else int(added), None if binary else int(deleted), old_path))
+    return stats, statuses
+
+
+class _Stream:
+    """Chunked reader over the git pipe with a look-ahead buffer."""
+
+    def __init__(self, pipe) -> None:
+        self.pipe = pipe
+        self.buf = bytearray()
+        self.eof = False
+
+    def more(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.pipe.read(_CHUNK)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf += chunk
+        return True
+
+    def find(self, needles: tuple[bytes, ...], limit: int | None = None) -> int:
+        """
+        First position of any needle, reading more until found, EOF (-1) or more
+        than limit bytes buffered without a match (-1).
+        """
+        start = 0
+        while True:
+            found = [at for at in (self.buf.find(needle, start) for needle in needles) if at >= 0]
+            if found:
+                return min(found)
+            if limit is not None and len(self.buf) > limit:
+                return -1
+            start = max(0, len(self.buf) - max(len(needle) for needle in needles) + 1)
+            if not self.more():
+                return -1
+
+    def take(self, size: int) -> bytes:
+        data = bytes(self.buf[:size])
+        del self.buf[:size]
+        return data
+
+    def skip_section(self) -> None:
+        """Drop the rest of the current section, one chunk at a time."""
+        if self.buf.startswith(_SECTION.encode()):
+            # The header ran up to the next section (rename, mode change, empty file)
+            return
+        while True:
+            at = self.buf.find(_NEXT_SECTION)
+            if at >= 0:
+                del self.buf[:at + 1]
+                return
+            del self.buf[:max(0, len(self.buf) - len(_NEXT_SECTION))]
+            if not self.more():
+                self.buf.clear()
+                return
+
+
+def _is_generated(path: str, marked: set[str] | frozenset[str] = frozenset()) -> bool:
+    # Version files and manifests keep their hunks: the release / deps rules read them
+    # (Unity's ProjectSettings/ProjectSettings.asset carries bundleVersion).
+    if category(path) in ("manifest", "version"):
+        return False
+    return path in marked or file_weight(path) <= WEIGHT_GENERATED
+
+
+def linguist_generated(repo_path: str, paths: list[str]) -> set[str]:
+    """Paths marked linguist-generated by the .gitattributes of the index."""
+    marked: set[str] = set()
+    for start in range(0, len(paths), _ATTR_BATCH):
+        result = run_command(
+            ["git", "check-attr", "--cached", "-z", "linguist-generated", "--", *paths[start:start + _ATTR_BATCH]],
+            cwd=repo_path,
+            silent=True,
+        )
+        if result.returncode != 0:
+            continue
+        # path NUL attribute NUL value NUL
+        fields = (result.stdout or "").split("\0")
+        marked.update(fields[i] for i in range(0, len(fields) - 2, 3) if fields[i + 2] in ("set", "true"))
+    return marked
+
+
+def _read_sections(stream: _Stream, generated: list[bool], budget: int) -> tuple[list[tuple[bytes, str]], int, bool]:
+    """
+    (section bytes, omitted reason) in numstat order, bytes kept, truncated.
+    stream.buf starts at the first "diff --git" line. Stops (and git is killed)
+    once only generated files are left: numstat already gave their counts.
+    """
+    needed = max((i + 1 for i, skip in enumerate(generated) if not skip), default=0)
+    sections: list[tuple[bytes, str]] = []
+    kept = 0
+    for skip in generated[:needed]:
+        if not stream.buf and not stream.more():
+            break
+        if skip:
+            end = stream.find(_HEADER_ENDS)
+            header = stream.take(end + 1 if end >= 0 else len(stream.buf))
+            stream.skip_section()
+            sections.append((header, "generated"))
+            kept += len(header)
+            continue
+
+        left = budget - kept
+        end = stream.find((_NEXT_SECTION,), limit=left)
+        size = end + 1 if end >= 0 else len(stream.buf)
+        if size > left:
+            cut = stream.buf.rfind(b"\n", 0, max(left, 0)) + 1
+            sections.append((stream.take(cut), "size limit"))
+            return sections, kept + cut, True
+        sections.append((stream.take(size), ""))
+        kept += size
+    return sections, kept, False
+
+
+def read_staged_change(repo_path: str, max_bytes: int | None = None) -> StagedChange:
+    """
+    Parsed staged change, patch kept up to max_bytes (DEVTOOLS_MAX_DIFF_BYTES);
+    max_bytes=0 reads numstat and summary only. EMPTY_CHANGE when nothing is
+    staged or git fails.
+    """
+    budget = max_bytes if max_bytes is not None else max_diff_bytes()
+    with open_command_stream(_COMMAND, cwd=repo_path) as proc:
+        assert proc.stdout is not None
+        stream = _Stream(proc.stdout)
+        start = stream.find((b"\0" + _SECTION.encode(),))
+        if start < 0:
+            # No patch at all: nothing staged, or git failed
+            return EMPTY_CHANGE
+        stats, statuses = parse_head(stream.take(start + 1))
+        marked: set[str] = set()
+        if budget > 0:
+            # Attributes only matter when the patch is read (max_bytes=0 lists files only)
+            marked = linguist_generated(repo_path, [s.path for s in stats if not _is_generated(s.path)])
+        generated = [_is_generated(s.path, marked) for s in stats]
+        sections: list[tuple[bytes, str]] = []
+        kept, truncated = 0, budget <= 0
+        if budget > 0:
+            sections, kept, truncated = _read_sections(stream, generated, budget)
+
+    files = []
+    for index, stat in enumerate(stats):
+        if index < len(sections):
+            patch, omitted = sections[index]
+        else:
+            patch, omitted = b"", "generated" if generated[index] else "size limit"
+        status = "R" if stat.old_path else statuses.get(stat.path, "M")
+        text = patch.decode("utf-8", errors="replace").rstrip("\n")
+        files.append(StagedFile(stat.path, status, stat.added, stat.deleted, stat.old_path, text, omitted))
+    return StagedChange(tuple(files), kept, truncated)
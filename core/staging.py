@@ -0,0 +1,241 @@
+# core/staging.py
+"""
+Staging for auto-commit on large working trees: unstaged changes grouped by
+top-level directory, selected groups staged in batches with progress.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator
+
+from rich.console import Console
+from rich.markup import escape
+from rich.table import Table
+
+from core.snapshot import StatusEntry
+from utils.common import env_int, run_command
+from utils.console import ask_selection
+
+console = Console()
+
+ROOT_GROUP = "."
+
+# Applied through the environment for the duration of auto_commit_all_repos
+FAST_GIT_CONFIG = {
+    "core.untrackedCache": "true",
+    "core.preloadIndex": "true",
+}
+
+
+def stage_batch_size() -> int:
+    return env_int("DEVTOOLS_STAGE_BATCH", 2000)
+
+
+@contextmanager
+def fast_git_config(settings: dict[str, str] = FAST_GIT_CONFIG) -> Iterator[None]:
+    """
+    Add settings to every git command started inside the block, after any
+    GIT_CONFIG_* entries already in the environment. The environment is restored
+    on exit.
+    """
+    base = env_int("GIT_CONFIG_COUNT", 0, minimum=0)
+    added = {"GIT_CONFIG_COUNT": str(base + len(settings))}
+    for offset, (key, value) in enumerate(settings.items()):
+        added[f"GIT_CONFIG_KEY_{base + offset}"] = key
+        added[f"GIT_CONFIG_VALUE_{base + offset}"] = value
+
+    previous = {name: os.environ.get(name) for name in added}
+    os.environ.update(added)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+@dataclass(frozen=True)
+class StageGroup:
+    name: str  # top-level directory ("Assets/") or ROOT_GROUP for files at the root
+    paths: tuple[str, ...]
+    untracked: int = 0
+    modified: int = 0
+    deleted: int = 0
+
+    @property
+    def details(self) -> str:
+        counts = (("untracked", self.untracked), ("modified", self.modified), ("deleted", self.deleted))
+        return ", ".join(f"{count} {label}" for label, count in counts if count)
+
+
+def _top_level(path: str) -> str:
+    head, sep, _ = path.partition("/")
+    return f"{head}/" if sep else ROOT_GROUP
+
+
+def group_entries(entries: Iterable[StatusEntry]) -> list[StageGroup]:
+    """
+    Unstaged entries grouped by top-level directory, root files first then by name.
+    Untracked directories come collapsed from git status ("Assets/New/"), so they
+    count as one path.
+    """
+    groups: dict[str, dict] = {}
+    for entry in entries:
+        if not entry.unstaged:
+            continue
+        group = groups.setdefault(_top_level(entry.path), {"paths": [], "untracked": 0, "modified": 0, "deleted": 0})
+        group["paths"].append(entry.path)
+        if entry.orig_path:
+            group["paths"].append(entry.orig_path)
+        if entry.kind == "?":
+            group["untracked"] += 1
+        elif entry.xy[1] == "D":
+            group["deleted"] += 1
+        else:
+            group["modified"] += 1
+
+    names = sorted(groups, key=lambda name: (name != ROOT_GROUP, name))
+    return [
+        StageGroup(
+            name,
+            tuple(groups[name]["paths"]),
+            groups[name]["untracked"],
+            groups[name]["modified"],
+            groups[name]["deleted"],
+        )
+        for name in names
+    ]
+
+
+def _glob_escape(text: str) -> str:
+    return "".join(f"\\{char}" if char in "*?[]\\" else char for char in text)
+
+
+def _directory_units(prefix: str, paths: list[str], batch_size: int) -> list[tuple[str, int]]:
+    """Units for paths under the directory prefix ("" for the root, files only there)."""
+    members: dict[str, list[str]] = {}
+    for path in paths:
+        rest = path[len(prefix):]
+        if not rest:
+            key = f":(literal){prefix}"  # untracked directory, collapsed by git status
+        elif "/" in rest:
+            key = f":(literal){prefix}{rest.split('/', 1)[0]}/"
+        else:
+            key = f":(glob){_glob_escape(prefix)}*"
+        members.setdefault(key, []).append(path)
+
+    units: list[tuple[str, int]] = []
+    for key, covered in members.items():
+        if len(covered) <= batch_size or key == f":(literal){prefix}":
+            units.append((key, len(covered)))
+        elif key.startswith(":(literal)"):
+            units.extend(_directory_units(key[len(":(literal)"):], covered, batch_size))
+        else:
+            # More files directly in one directory than a batch holds
+            units.extend((f":(literal){path}", 1) for path in covered)
+    return units
+
+
+def pathspec_units(group: StageGroup, batch_size: int | None = None) -> list[tuple[str, int]]:
+    """
+    (pathspec, paths covered) for a whole group: one directory pathspec per
+    second-level directory and one glob for the files directly in the group.
+    git matches every index entry against every pathspec of a call, so listing
+    20k paths one by one is quadratic; a handful of directories is not. A unit
+    covering more than batch_size paths is split one level deeper (or, for the
+    files directly in a directory, into literal paths) so batches stay near
+    batch_size and progress keeps moving.
+    """
+    size = batch_size or stage_batch_size()
+    prefix = "" if group.name == ROOT_GROUP else group.name
+    inside: list[str] = []
+    outside: list[str] = []  # rename sources in another top-level directory
+    for path in group.paths:
+        (inside if path.startswith(prefix) and (prefix or "/" not in path) else outside).append(path)
+    return _directory_units(prefix, inside, size) + [(f":(literal){path}", 1) for path in outside]
+
+
+def stage_groups(
+    repo_path: str,
+    groups: list[StageGroup],
+    batch_size: int | None = None,
+    on_progress: Callable[[int, int], None] | None = None,
+) -> bool:
+    """
+    `git add -A` of every unstaged path in groups, about batch_size paths per git
+    call. on_progress gets (paths staged, total) after each batch. Stops at the
+    first failing batch.
+    """
+    size = batch_size or stage_batch_size()
+    batches: list[tuple[list[str], int]] = []
+    for pathspec, count in (unit for group in groups for unit in pathspec_units(group, size)):
+        if not batches or batches[-1][1] >= size:
+            batches.append(([], 0))
+        specs, covered = batches[-1]
+        specs.append(pathspec)
+        batches[-1] = (specs, covered + count)
+
+    total = sum(covered for _, covered in batches)
+    done = 0
+    fd, spec_path = tempfile.mkstemp(prefix="devtools-stage-", suffix=".pathspec")
+    os.close(fd)
+    try:
+        for specs, covered in batches:
+            with open(spec_path, "wb") as f:
+                f.write(b"".join(spec.encode("utf-8") + b"\0" for spec in specs))
+            result = run_command(
+                ["git", "add", "-A", f"--pathspec-from-file={spec_path}", "--pathspec-file-nul"],
+                cwd=repo_path,
+            )
+            if result.returncode != 0:
+                print(f"❌ git add failed:\n{(result.stderr or '').strip()}")
+                return False
+            done += covered
+            if on_progress is not None:
+                on_progress(done, total)
+    finally:
+        os.unlink(spec_path)
+    return True
+
+
+def show_groups(groups: list[StageGroup]) -> None:
+    table = Table(title="🗂️  Unstaged changes by top-level directory", title_justify="left")
+    table.add_column("#", justify="right")
+    table.add_column("group", style="bold green")
+    table.add_column("paths", justify="right")
+    table.add_column("details")
+    for idx, group in enumerate(groups, start=1):
+        table.add_row(str(idx), escape(group.name), str(len(group.paths)), group.details)
+    console.print(table)
+
+
+def stage_interactively(repo_path: str, entries: Iterable[StatusEntry]) -> bool:
+    """
+    Show the unstaged groups, stage the ones the user selects. True when
+    something was staged.
+    """
+    groups = group_entries(entries)
+    if not groups:
+        return False
+
+    show_groups(groups)
+    selected = ask_selection("➕ Stage groups", len(groups))
+    if not selected:
+        return False
+
+    chosen = [groups[idx - 1] for idx in sorted(selected)]
+    label = ", ".join(group.name for group in chosen)
+    with console.status(f"[bold green]➕ Staging {escape(label)}...[/]", spinner="dots") as status:
+
+        def on_progress(done: int, total: int) -> None:
+            status.update(f"[bold green]➕ Staging {escape(label)}: {done}/{total} paths[/]")
+
+        if not stage_groups(repo_path, chosen, on_progress=on_progress):
+            return False
+
+    print(f"✅ Staged {sum(len(group.paths) for group in chosen)} paths from {len(chosen)} group(s).")
+    return True
@@ -1,25 +1,39 @@
 # core/sync.py
 
+import asyncio
 import os
+from dataclasses import dataclass
 
 from core.config import DEFAULT_REMOTE, ROOT_DIRS
-from core.repositories import iter_git_repositories
+from core.refs import RefsUnavailable, ref_exists, symbolic_ref_target
+from core.repositories import iter_repositories_by_root
+from core.snapshot import RepoSnapshot, collect_snapshot, is_worktree_dirty
 from rich.console import Console
-from utils.common import run_command
+from utils.common import async_limits, async_run_command, env_int, run_command
 from utils.console import ask_yes_no
 
 console = Console()
 REMOTE = DEFAULT_REMOTE
 
 
+@dataclass
+class FetchedRepo:
+    """Phase-1 result for one repo: everything sync needs before asking anything."""
+    name: str
+    path: str
+    clean: bool
+    fetched: bool = False
+    fetch_error: str = ""
+    snapshot: RepoSnapshot | None = None
+
+
 def git_output(repo_path: str, args: list[str]) -> str:
     res = run_command(["git"] + args, cwd=repo_path, silent=True)
     return (res.stdout or "").strip()
 
 
 def repo_is_clean(repo_path: str) -> bool:
-    res = run_command(["git", "status", "--porcelain"], cwd=repo_path, silent=True)
-    return (res.stdout or "").strip() == ""
+    return not is_worktree_dirty(repo_path)
 
 
 def fetch(repo_path: str, repo_name: str) -> bool:
@@ -30,25 +44,37 @@ def fetch(repo_path: str, repo_name: str) -> bool:
     return True
 
 
-def get_default_remote_branch(repo_path: str) -> str | None:
+def get_default_remote_branch(repo_path: str, snapshot: RepoSnapshot | None = None) -> str | None:
     """
     Returns default branch name from origin/HEAD (e.g. 'main' or 'master').
     Requires fetch to be done before in many cases.
     """
+    if snapshot is not None and snapshot.refs:
+        return snapshot.default_remote_branch(REMOTE)
+
     # Typical output: "refs/remotes/origin/main"
-    ref = git_output(repo_path, ["symbolic-ref", f"refs/remotes/{REMOTE}/HEAD"])
+    try:
+        ref = symbolic_ref_target(repo_path, f"refs/remotes/{REMOTE}/HEAD") or ""
+    except RefsUnavailable:
+        ref = git_output(repo_path, ["symbolic-ref", f"refs/remotes/{REMOTE}/HEAD"])
     if ref.startswith(f"refs/remotes/{REMOTE}/"):
         return ref.split(f"refs/remotes/{REMOTE}/", 1)[1].strip() or None
     return None
 
 
-def ensure_local_branch_exists(repo_path: str, branch: str) -> bool:
+def ensure_local_branch_exists(repo_path: str, branch: str, snapshot: RepoSnapshot | None = None) -> bool:
     """
     Ensure local branch exists; if not, try to create it tracking origin/<branch>.
     """
     # Does local branch exist?
-    res = run_command(["git", "show-ref", "--verify", "--quiet", f"refs/heads/{branch}"], cwd=repo_path, silent=True)
-    if res.returncode == 0:
+    if snapshot is not None and snapshot.has_local_branch(branch):
+        return True
+    try:
+        exists = ref_exists(repo_path, f"refs/heads/{branch}")
+    except RefsUnavailable:
+        res = run_command(["git", "show-ref", "--verify", "--quiet", f"refs/heads/{branch}"], cwd=repo_path, silent=True)
+        exists = res.returncode == 0
+    if exists:
         return True
 
     # Create local branch tracking origin
@@ -84,6 +110,18 @@ def get_ahead_behind(repo_path: str, branch: str) -> tuple[int, int] | None:
         return None
 
 
+def get_head_short(repo_path: str, branch: str, snapshot: RepoSnapshot | None = None) -> str:
+    """
+    Abbreviated HEAD once <branch> is checked out; served from the snapshot when the
+    branch already existed there.
+    """
+    if snapshot is not None:
+        short = snapshot.short_oid(f"refs/heads/{branch}")
+        if short:
+            return short
+    return git_output(repo_path, ["rev-parse", "--short", "HEAD"])
+
+
 def pull_ff_only(repo_path: str, repo_name: str, branch: str) -> bool:
     res = run_command(["git", "pull", "--ff-only", REMOTE, branch], cwd=repo_path, silent=True)
     if res.returncode != 0:
@@ -92,28 +130,74 @@ def pull_ff_only(repo_path: str, repo_name: str, branch: str) -> bool:
     return True
 
 
-def sync_default_branch(repo_path: str, repo_name: str) -> None:
-    if not repo_is_clean(repo_path):
+async def fetch_repo_async(repo_path: str, repo_name: str) -> FetchedRepo:
+    if await asyncio.to_thread(is_worktree_dirty, repo_path):
+        return FetchedRepo(repo_name, repo_path, clean=False)
+
+    res = await async_run_command(["git", "fetch", "--all", "--prune"], cwd=repo_path, silent=True)
+    if res.returncode != 0:
+        return FetchedRepo(repo_name, repo_path, clean=True, fetch_error=(res.stderr or "").strip())
+
+    # One status + one for-each-ref after the fetch answers everything phase 2 needs.
+    snapshot = await asyncio.to_thread(collect_snapshot, repo_path)
+    return FetchedRepo(repo_name, repo_path, clean=True, fetched=True, snapshot=snapshot)
+
+
+async def fetch_all_repos(repos: list[tuple[str, str]]) -> list[FetchedRepo]:
+    """
+    Fetch every repo concurrently (bounded by async_run_command's global and per-host
+    limits) and return results in the input order.
+    """
+    done = 0
+    with console.status(f"[bold cyan]Fetching {len(repos)} repos...[/]", spinner="dots") as status:
+        async def run_one(name: str, path: str) -> FetchedRepo:
+            nonlocal done
+            result = await fetch_repo_async(path, name)
+            done += 1
+            status.update(f"[bold cyan]Fetching repos... {done}/{len(repos)}[/]")
+            return result
+
+        return await asyncio.gather(*(run_one(name, path) for name, path in repos))
+
+
+def sync_default_branch(repo_path: str, repo_name: str, fetched: FetchedRepo | None = None) -> None:
+    """
+    Phase 2 for one repo. Without a phase-1 result, checks, fetches and snapshots inline.
+    """
+    if fetched is None:
+        if not repo_is_clean(repo_path):
+            fetched = FetchedRepo(repo_name, repo_path, clean=False)
+        elif not fetch(repo_path, repo_name):
+            return
+        else:
+            fetched = FetchedRepo(repo_name, repo_path, clean=True, fetched=True, snapshot=collect_snapshot(repo_path))
+
+    if not fetched.clean:
         console.print(f"⚠️  [yellow]{repo_name}[/]: repo not clean, skip sync (stash/commit first).")
         return
 
-    if not fetch(repo_path, repo_name):
+    if not fetched.fetched:
+        console.print(f"❌ [red]{repo_name}[/]: fetch failed:\n{fetched.fetch_error}")
         return
 
-    default_branch = get_default_remote_branch(repo_path)
+    snapshot = fetched.snapshot
+
+    default_branch = get_default_remote_branch(repo_path, snapshot)
     if not default_branch:
         console.print(f"⚠️  [yellow]{repo_name}[/]: could not resolve {REMOTE}/HEAD default branch. Skip.")
         return
 
     # Ensure local branch exists (some repos only have main locally or nothing checked out)
-    if not ensure_local_branch_exists(repo_path, default_branch):
+    if not ensure_local_branch_exists(repo_path, default_branch, snapshot):
         console.print(f"❌ [red]{repo_name}[/]: could not create/find local branch '{default_branch}'.")
         return
 
     if not checkout_branch(repo_path, repo_name, default_branch):
         return
 
-    counts = get_ahead_behind(repo_path, default_branch)
+    counts = snapshot.ahead_behind(default_branch, REMOTE) if snapshot else None
+    if counts is None:
+        counts = get_ahead_behind(repo_path, default_branch)
     if not counts:
         console.print(f"⚠️  [yellow]{repo_name}[/]: cannot compute ahead/behind. Skip.")
         return
@@ -121,11 +205,11 @@ def sync_default_branch(repo_path: str, repo_name: str) -> None:
     ahead, behind = counts
 
     if behind <= 0 and ahead <= 0:
-        head = git_output(repo_path, ["rev-parse", "--short", "HEAD"])
+        head = get_head_short(repo_path, default_branch, snapshot)
         console.print(f"✔️  [green]{repo_name}[/]: {default_branch} up-to-date (HEAD {head})")
         return
     if behind <= 0 and ahead > 0:
-        head = git_output(repo_path, ["rev-parse", "--short", "HEAD"])
+        head = get_head_short(repo_path, default_branch, snapshot)
         console.print(
             f"ℹ️  [cyan]{repo_name}[/]: {default_branch} is ahead of {REMOTE}/{default_branch} "
             f"by {ahead} commit(s) (HEAD {head})"
@@ -149,19 +233,31 @@ def sync_default_branch(repo_path: str, repo_name: str) -> None:
         console.print(f"✅ [green]{repo_name}[/]: pulled {default_branch} (HEAD {head})")
 
 
-def sync_all_repos(root_dirs: list[str]) -> None:
-    for root_dir in root_dirs:
+def sync_all_repos(root_dirs: list[str], workers: int | None = None) -> None:
+    """
+    Phase 1 fetches every repo concurrently (workers = DEVTOOLS_SYNC_WORKERS, per-host
+    cap = DEVTOOLS_MAX_PER_HOST); phase 2 then asks the pull questions in repo order
+    against the already-fetched state.
+    """
+    all_repos: list[tuple[str, str]] = []
+    for root_dir, repos in iter_repositories_by_root(root_dirs):
         if not os.path.isdir(root_dir):
             console.print(f"⚠️  Root directory not found: {root_dir}")
             continue
 
-        found_repos = False
-        for repo, path in iter_git_repositories(root_dir):
-            found_repos = True
-            sync_default_branch(path, repo)
-
-        if not found_repos:
+        found = list(repos)
+        if not found:
             console.print(f"⚠️  No repositories found in {root_dir}")
+        all_repos.extend(found)
+
+    if not all_repos:
+        return
+
+    with async_limits(max_concurrency=workers or env_int("DEVTOOLS_SYNC_WORKERS", 16, minimum=1)):
+        fetched_repos = asyncio.run(fetch_all_repos(all_repos))
+
+    for fetched in fetched_repos:
+        sync_default_branch(fetched.path, fetched.name, fetched)
 
 
 def main(root_dirs: list[str] = ROOT_DIRS) -> None:
@@ -1,13 +1,16 @@
 # core/versioning.py
+import fnmatch
 import re
 from dataclasses import dataclass
 
 from core.config import DEFAULT_REMOTE
+from core.refs import RefsUnavailable, list_refs
 from core.conventional_commits import determine_bump_from_messages
 from utils.common import run_command, run_command_checked
 
 
 SEMVER_RE = re.compile(r"^v?(\d+)\.(\d+)\.(\d+)$")
+LEADING_ZERO_RE = re.compile(r"(?<!\d)0\d")
 
 
 @dataclass(frozen=True)
@@ -42,6 +45,24 @@ def get_last_semver_tag(repo_path: str) -> str | None:
     """
     Return latest semver-like tag (vX.Y.Z) by version sort.
     """
+    try:
+        names = [name[len("refs/tags/"):] for name in list_refs(repo_path, "refs/tags/")]
+    except RefsUnavailable:
+        names = None
+
+    # Numeric ordering equals git's v:refname sort unless leading zeros are involved.
+    if names is not None:
+        candidates = [
+            (version, name)
+            for name in names
+            if fnmatch.fnmatchcase(name, "v*.*.*") and (version := parse_semver(name))
+        ]
+        if not any(LEADING_ZERO_RE.search(name) for _, name in candidates):
+            if not candidates:
+                return None
+            _, latest = max(candidates, key=lambda c: (c[0].major, c[0].minor, c[0].patch))
+            return latest
+
     res = run_command(["git", "tag", "--list", "v*.*.*", "--sort=-v:refname"], cwd=repo_path)
     if res.returncode != 0:
         return None
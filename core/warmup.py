@@ -0,0 +1,82 @@
+# core/warmup.py
+"""
+Background Ollama warm-up: the model is loaded in a daemon thread while
+repositories are discovered.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+
+from rich import print
+
+from core.commit import commit_context_size
+from core.merge import is_ollama_enabled
+from core.ollama import OllamaClient, OllamaError, get_default_client
+
+
+@dataclass(frozen=True)
+class WarmupResult:
+    model: str
+    already_loaded: bool = False
+    seconds: float = 0.0
+    error: str | None = None
+
+
+def warm_up_model(client: OllamaClient) -> WarmupResult:
+    started = time.perf_counter()
+    try:
+        if client.is_loaded():
+            return WarmupResult(client.model, already_loaded=True, seconds=time.perf_counter() - started)
+        client.show_model()
+        client.load_model(num_ctx=commit_context_size(client))
+    except OllamaError as e:
+        return WarmupResult(client.model, seconds=time.perf_counter() - started, error=str(e))
+    return WarmupResult(client.model, seconds=time.perf_counter() - started)
+
+
+class ModelWarmup:
+    def __init__(self, client: OllamaClient | None = None) -> None:
+        self._client = client
+        self._thread: threading.Thread | None = None
+        self._result: WarmupResult | None = None
+        self._reported = False
+
+    def start(self) -> None:
+        """Idempotent; does nothing when ENABLE_OLLAMA=0."""
+        if self._thread is not None or not is_ollama_enabled():
+            return
+        self._thread = threading.Thread(target=self._run, name="ollama-warmup", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        self._result = warm_up_model(self._client or get_default_client())
+
+    def result(self, timeout: float | None = 0) -> WarmupResult | None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self._result
+
+    def report(self, timeout: float | None = 0) -> None:
+        """Prints the outcome once; silent while the load is still running."""
+        result = self.result(timeout)
+        if result is None or self._reported:
+            return
+        self._reported = True
+        if result.error:
+            print(f"⚠️ Ollama warm-up failed for {result.model}: {result.error}")
+        elif result.already_loaded:
+            print(f"🔥 Ollama model {result.model} was already loaded.")
+        else:
+            print(f"🔥 Ollama model {result.model} loaded in background ({result.seconds:.1f}s).")
+
+
+_WARMUP = ModelWarmup()
+
+
+def start_warmup() -> None:
+    _WARMUP.start()
+
+
+def report_warmup(timeout: float | None = 0) -> None:
+    _WARMUP.report(timeout)
@@ -2,12 +2,19 @@ from rich import print
 from rich.console import Console
 from rich.panel import Panel
 from pyfiglet import figlet_format
-from utils.common import set_dry_run
+from utils.common import command_cache_stats, set_command_backend, set_dry_run
+from utils import profiling
 from utils.console import ask_yes_no
+from core.classifier import format_fast_path_stats
 from core.commit import auto_commit_all_repos
 from core.changelog import update_all_repos_interactive
+from core.generation import format_rung_stats
+from core.llm_cache import set_llm_cache
 from core.config import DEFAULT_BASE_BRANCH, DEFAULT_HEAD_BRANCH, DEFAULT_REMOTE, ROOT_DIRS
+from core.repositories import set_rescan
+from core.warmup import report_warmup, start_warmup
 import core.merge as merge
+import core.plan as plan
 import core.sync as sync
 import argparse
 
@@ -23,9 +30,31 @@ def main():
     group = parser.add_mutually_exclusive_group(required=True)
     group.add_argument("--dry-run", action="store_true", help="Simulate actions (safe mode)")
     group.add_argument("--prod", action="store_true", help="Execute real actions")
+    parser.add_argument("--rescan", action="store_true", help="Ignore the cached repo index and rescan all roots")
+    parser.add_argument("--git-pool", action="store_true", help="Answer ref lookups from long-lived git helpers")
+    parser.add_argument("--no-llm-cache", action="store_true", help="Regenerate commit/PR texts instead of reusing cached ones")
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Plan every stage for all repos first, approve once, then execute concurrently",
+    )
+    parser.add_argument("--profile", action="store_true", help="Record every git/gh/Ollama call and print a report")
+    parser.add_argument("--profile-top", type=int, default=15, help="Rows per table in the --profile report")
+    parser.add_argument(
+        "--profile-output",
+        default="devtools-profile.json",
+        help="Chrome trace / Perfetto JSON written by --profile",
+    )
 
     args = parser.parse_args()
 
+    if args.rescan:
+        set_rescan(True)
+    if args.git_pool:
+        set_command_backend("pool")
+    if args.no_llm_cache:
+        set_llm_cache(False)
+
     if args.dry_run:
         set_dry_run(True)
         console.print("\n🚀 [bold cyan][DRY-RUN MODE ENABLED][/]\n")
@@ -33,29 +62,73 @@ def main():
         set_dry_run(False)
         console.print("\n🚀 [bold green][PRODUCTION MODE - REAL EXECUTION][/]\n")
 
+    if args.profile:
+        profiling.enable_profiling(ROOT_DIRS)
+        try:
+            run_stages(args.plan)
+        finally:
+            profiling.print_report(top=args.profile_top)
+            stats = command_cache_stats()
+            console.print(f"🗃️  Command cache: {stats['hits']} hits / {stats['misses']} misses")
+            rungs = format_rung_stats()
+            if rungs:
+                console.print(f"🪜 Generation rungs: {rungs}")
+            trace = profiling.write_chrome_trace(args.profile_output)
+            console.print(f"🧭 Trace written to [bold]{trace}[/] (open in ui.perfetto.dev)")
+    else:
+        run_stages(args.plan)
+
+
+def report_fast_path() -> None:
+    served = format_fast_path_stats()
+    if served:
+        print(f"⚡ Commit messages from rules, no model call: {served}")
+
+
+def run_stages(plan_mode: bool = False):
     # Banner
     print(f"\n[bold green]{figlet_format('Dev Tools', font='slant')}[/]")
 
+    if plan_mode:
+        section_title("Plan all stages", "📋")
+        start_warmup()
+        with profiling.profile_stage("plan"):
+            plan.main(ROOT_DIRS)
+        report_warmup()
+        report_fast_path()
+        print(f"\n[bold cyan]{figlet_format('All Done!', font='slant')}[/]")
+        return
+
     # --- STEP 1: AUTO-COMMIT ---
     section_title(f"Auto-commit {DEFAULT_HEAD_BRANCH}", "🔧")
     if ask_yes_no("Browse repos and run auto-commit ?", default="n"):
-        auto_commit_all_repos(ROOT_DIRS)
+        # Loads the model while repos are scanned and staged
+        start_warmup()
+        with profiling.profile_stage("auto-commit"):
+            auto_commit_all_repos(ROOT_DIRS)
+        report_warmup()
+        report_fast_path()
 
     # --- STEP 2: MERGE ---
     section_title(f"Merge to {DEFAULT_BASE_BRANCH}", "🔁")
     if ask_yes_no(f"Merge {DEFAULT_HEAD_BRANCH} into {DEFAULT_BASE_BRANCH} ?", default="n"):
-        merge.main(ROOT_DIRS)
+        start_warmup()
+        with profiling.profile_stage("merge"):
+            merge.main(ROOT_DIRS)
+        report_warmup()
 
     # --- STEP 3: CHANGELOG ---
     section_title("Update changelogs", "📝")
     if ask_yes_no("Update changelogs ?", default="n"):
-        update_all_repos_interactive(ROOT_DIRS)
+        with profiling.profile_stage("changelog"):
+            update_all_repos_interactive(ROOT_DIRS)
 
     # --- STEP 4: SYNC MASTER ---
     section_title(f"Sync {DEFAULT_BASE_BRANCH} from {DEFAULT_REMOTE}", "⏳")
     sync_prompt = f"Checkout {DEFAULT_BASE_BRANCH} + pull {DEFAULT_REMOTE}/{DEFAULT_BASE_BRANCH} on all repos ?"
     if ask_yes_no(sync_prompt, default="n"):
-        sync.main(ROOT_DIRS)
+        with profiling.profile_stage("sync"):
+            sync.main(ROOT_DIRS)
 
     print(f"\n[bold cyan]{figlet_format('All Done!', font='slant')}[/]")
 
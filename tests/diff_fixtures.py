@@ -0,0 +1,11 @@
+def file_diff(path: str, lines: list[str], new: bool = False) -> str:
+    """One-file unified diff with a single hunk holding lines."""
+    header = [f"diff --git a/{path} b/{path}"]
+    if new:
+        header.append("new file mode 100644")
+    header += ["index 1111111..2222222 100644", f"--- a/{path}", f"+++ b/{path}"]
+    return "\n".join(header + [f"@@ -1,{len(lines)} +1,{len(lines)} @@"] + lines)
+
+
+def added_lines(count: int) -> list[str]:
+    return [f"+    value_{n} = compute({n})" for n in range(count)]
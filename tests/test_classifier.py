@@ -0,0 +1,92 @@
+import unittest
+
+from core.classifier import (
+    category,
+    classify_diff,
+    fast_path_commit_message,
+    format_fast_path_stats,
+    reset_fast_path_stats,
+)
+from core.diff_budget import parse_diff
+from tests.diff_fixtures import file_diff
+
+
+LOCK = file_diff("package-lock.json", ['-      "version": "4.17.20",', '+      "version": "4.17.21",', '+      "integrity": "sha512-x"'])
+
+
+class CategoryTests(unittest.TestCase):
+    def test_paths(self) -> None:
+        self.assertEqual(category("web/yarn.lock"), "lockfile")
+        self.assertEqual(category("requirements-dev.txt"), "manifest")
+        self.assertEqual(category("docs/guide.txt"), "docs")
+        self.assertEqual(category(".github/workflows/ci.yml"), "ci")
+        self.assertEqual(category("Assets/Player.prefab.meta"), "asset")
+        self.assertEqual(category("Dockerfile"), "build")
+        self.assertEqual(category("core/commit.py"), "other")
+
+
+class ClassifyDiffTests(unittest.TestCase):
+    def test_lockfile_only_is_deps(self) -> None:
+        result = classify_diff(LOCK)
+
+        self.assertEqual(result.rule, "deps")
+        self.assertTrue(result.message.startswith("chore(deps): update package-lock.json\n\n- package-lock.json (+2 -1)"))
+
+    def test_manifest_pins_with_lockfile_are_deps(self) -> None:
+        manifest = file_diff("package.json", ['-    "lodash": "^4.17.20",', '+    "lodash": "^4.17.21",'])
+
+        result = classify_diff(manifest + "\n" + LOCK)
+
+        self.assertEqual(result.rule, "deps")
+        self.assertIn("chore(deps): update dependencies", result.message)
+
+    def test_manifest_metadata_change_is_left_to_model(self) -> None:
+        manifest = file_diff("package.json", ['-  "description": "old",', '+  "description": "new",'])
+
+        self.assertIsNone(classify_diff(manifest + "\n" + LOCK))
+
+    def test_version_bump_is_release(self) -> None:
+        diff = "\n".join([
+            file_diff("package.json", ['-  "version": "1.2.0",', '+  "version": "1.3.0",']),
+            file_diff("CHANGELOG.md", ["+## 1.3.0", "+- things"]),
+            LOCK,
+        ])
+
+        result = classify_diff(diff)
+
+        self.assertEqual(result.rule, "release")
+        self.assertTrue(result.message.startswith("chore(release): bump version to 1.3.0"))
+
+    def test_docs_ci_and_meta_files(self) -> None:
+        docs = classify_diff(file_diff("README.md", ["+More usage notes"]))
+        ci = classify_diff(file_diff(".github/workflows/ci.yml", ["+      - run: pytest"]))
+        meta = classify_diff(file_diff("Assets/Player.cs.meta", ["+guid: abc"], new=True))
+
+        self.assertEqual(docs.message.splitlines()[0], "docs: update README.md")
+        self.assertEqual(ci.message.splitlines()[0], "ci: update .github/workflows/ci.yml")
+        self.assertEqual(meta.message.splitlines()[0], "chore(assets): add Unity meta files")
+
+    def test_any_source_file_or_mixed_categories_go_to_model(self) -> None:
+        source = file_diff("core/commit.py", ["+import os"])
+        readme = file_diff("README.md", ["+notes"])
+        ci = file_diff(".github/workflows/ci.yml", ["+  - run: make"])
+
+        self.assertIsNone(classify_diff(source + "\n" + readme))
+        self.assertIsNone(classify_diff(readme + "\n" + ci))
+        self.assertIsNone(classify_diff(""))
+
+
+class FastPathStatsTests(unittest.TestCase):
+    def setUp(self) -> None:
+        reset_fast_path_stats()
+        self.addCleanup(reset_fast_path_stats)
+
+    def test_counts_each_repo_once(self) -> None:
+        readme = file_diff("README.md", ["+notes"])
+
+        fast_path_commit_message("a", parse_diff(LOCK))
+        fast_path_commit_message("a", parse_diff(LOCK))
+        fast_path_commit_message("b", parse_diff(readme))
+        self.assertIsNone(fast_path_commit_message("c", parse_diff(file_diff("app.py", ["+x = 1"]))))
+
+        self.assertEqual(format_fast_path_stats(), "2 repos (deps 1, docs 1)")
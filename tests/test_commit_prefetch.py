@@ -0,0 +1,117 @@
+import threading
+import unittest
+from unittest import mock
+
+from core import commit
+from core.commit import CommitMessagePrefetcher
+
+
+class CommitMessagePrefetcherTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.started: list[str] = []
+        self.cancels: dict[str, threading.Event] = {}
+        self.release = threading.Event()
+        self.running = threading.Event()
+
+        def fake_prefetch(repo: str, repo_path: str, cancel: threading.Event):
+            self.started.append(repo)
+            self.cancels[repo] = cancel
+            if repo == "slow":
+                self.running.set()
+                self.release.wait(5)
+            return f"diff {repo}", f"feat: {repo}", [f"⚡ {repo}: held"]
+
+        patcher = mock.patch.object(commit, "_prefetch_commit_message", side_effect=fake_prefetch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_schedules_current_plus_depth_and_reuses_matching_diff(self) -> None:
+        prefetcher = CommitMessagePrefetcher(depth=1, workers=1)
+        self.addCleanup(prefetcher.close)
+        queue = [("a", "/a"), ("b", "/b"), ("c", "/c")]
+
+        prefetcher.schedule(queue)
+        with mock.patch("builtins.print") as printed:
+            self.assertEqual(prefetcher.take("/a", "diff a"), (True, "feat: a"))
+        printed.assert_called_once_with("⚡ a: held")
+        self.assertEqual(prefetcher.take("/b", "diff changed"), (False, None))
+        self.assertEqual(prefetcher.take("/c", "diff c"), (False, None))  # beyond depth
+        self.assertEqual(sorted(self.started), ["a", "b"])
+
+    def test_discard_cancels_pending_work(self) -> None:
+        prefetcher = CommitMessagePrefetcher(depth=2, workers=1)
+        self.addCleanup(prefetcher.close)
+
+        prefetcher.schedule([("slow", "/slow"), ("next", "/next")])
+        self.assertTrue(self.running.wait(5))
+        prefetcher.discard("/next")  # queued behind "slow": never starts
+        prefetcher.discard("/slow")  # running: asked to stop
+        self.release.set()
+        prefetcher.close()
+
+        self.assertTrue(self.cancels["slow"].is_set())
+        self.assertNotIn("next", self.started)
+
+    def test_depth_zero_disables_prefetch(self) -> None:
+        prefetcher = CommitMessagePrefetcher(depth=0)
+
+        prefetcher.schedule([("a", "/a")])
+
+        self.assertEqual(prefetcher.take("/a", "diff a"), (False, None))
+        self.assertEqual(self.started, [])
+
+
+class PrefetchNoticeTests(unittest.TestCase):
+    def test_notices_are_held_off_the_main_thread(self) -> None:
+        diff = "diff --git a/README.md b/README.md\n--- a/README.md\n+++ b/README.md\n@@ -1 +1 @@\n-a\n+b"
+        snapshot = mock.Mock(has_staged_changes=True)
+        with (
+            mock.patch.object(commit, "collect_snapshot", return_value=snapshot),
+            mock.patch.object(commit, "read_staged_change", return_value=commit.StagedChange.from_patch(diff)),
+            mock.patch("builtins.print") as printed,
+        ):
+            result = commit._prefetch_commit_message("docs", "/docs", threading.Event())
+
+        printed.assert_not_called()
+        self.assertEqual(result[2], ["⚡ docs: docs change, message from rules (no model call)."])
+
+
+class AutoCommitDiscoveryTests(unittest.TestCase):
+    def test_repos_are_read_only_as_far_as_the_prefetch_depth(self) -> None:
+        produced: list[str] = []
+
+        def repos(root: str, names: list[str]):
+            for name in names:
+                produced.append(name)
+                yield name, f"/{root}/{name}"
+
+        def roots(root_dirs):
+            yield "one", repos("one", ["a", "b", "c", "d"])
+            yield "empty", repos("empty", [])
+            yield "two", repos("two", ["e"])
+
+        seen: list[tuple[str, list[str]]] = []
+        scheduled: list[list[str]] = []
+
+        def fake_repo(repo, repo_path, results, prefetcher):
+            seen.append((repo, list(produced)))
+
+        with (
+            mock.patch.object(commit, "iter_repositories_by_root", side_effect=roots),
+            mock.patch.object(commit, "_auto_commit_repo", side_effect=fake_repo),
+            mock.patch.object(commit.os.path, "isdir", return_value=True),
+            mock.patch.object(CommitMessagePrefetcher, "schedule", lambda self, up: scheduled.append([r for r, _ in up])),
+            mock.patch.object(commit, "CommitMessagePrefetcher", lambda: CommitMessagePrefetcher(depth=1, workers=1)),
+            mock.patch("builtins.print") as printed,
+            mock.patch.object(commit.console, "print"),
+        ):
+            commit.auto_commit_all_repos(["one", "empty", "two"])
+
+        self.assertEqual(seen[0], ("a", ["a", "b"]))
+        self.assertEqual([repo for repo, _ in seen], ["a", "b", "c", "d", "e"])
+        self.assertEqual(scheduled[0], ["a", "b"])
+        printed.assert_any_call("⚠️ No repositories found in empty")
+
+
+if __name__ == "__main__":
+    unittest.main()
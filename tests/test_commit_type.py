@@ -0,0 +1,69 @@
+import unittest
+
+from core.commit import fallback_commit_message
+from core.commit_type import (
+    detect_commit_type,
+    detect_commit_type_from_files,
+    detect_commit_type_from_numstat,
+    path_type,
+)
+from core.staged_diff import NumStat, StagedChange, StagedFile
+from tests.diff_fixtures import file_diff
+
+
+class DetectCommitTypeTests(unittest.TestCase):
+    def test_keywords_on_changed_lines(self) -> None:
+        self.assertEqual(detect_commit_type(file_diff("app.py", ["+def handler(event):", "-    # fix typo"])), "feat")
+        self.assertEqual(detect_commit_type(file_diff("app.py", ["+    if ERROR: raise", "     class_name = 1"])), "fix")
+        self.assertEqual(detect_commit_type(""), "chore")
+
+    def test_file_paths_vote_without_keywords(self) -> None:
+        self.assertEqual(detect_commit_type(file_diff("README.md", ["-old", "+new"])), "docs")
+        self.assertEqual(detect_commit_type(file_diff("web/site.css", ["+a { color: red; }"])), "style")
+        self.assertEqual(detect_commit_type(file_diff(".github/workflows/ci.yml", ["+  - run: make"])), "ci")
+
+    def test_keywords_weighted_by_file(self) -> None:
+        # Three "fix" mentions in a changelog weigh less than one new function in source.
+        diff = "\n".join([
+            file_diff("CHANGELOG.md", ["+- fix crash", "+- fix typo", "+- fix login"]),
+            file_diff("core/app.py", ["+def login(user):"]),
+        ])
+
+        self.assertEqual(detect_commit_type(diff), "feat")
+
+    def test_omitted_files_count_with_their_numstat(self) -> None:
+        diff = "\n".join([
+            "diff --git a/docs/guide.md b/docs/guide.md\nDiff excluded (size limit): +400 -20",
+            file_diff("app.py", ["+    value = 1  # fix"]),
+        ])
+
+        self.assertEqual(detect_commit_type(diff), "docs")
+
+    def test_numstat_only(self) -> None:
+        self.assertEqual(path_type("tests/test_app.py"), "test")
+        self.assertEqual(detect_commit_type_from_numstat([NumStat("src/app.py", 120, 4), NumStat("README.md", 3, 1)]), "feat")
+        self.assertEqual(detect_commit_type_from_numstat([NumStat("src/app.py", 10, 40)]), "refactor")
+        self.assertEqual(detect_commit_type_from_numstat([NumStat("logo.png", None, None)]), "chore")
+        self.assertEqual(detect_commit_type_from_numstat([]), "chore")
+
+    def test_staged_files_use_their_numstat_counts(self) -> None:
+        change = StagedChange((
+            StagedFile("docs/guide.md", "M", 400, 20, omitted="size limit"),
+            StagedFile("app.py", "M", 1, 0, patch=file_diff("app.py", ["+    value = 1  # fix"])),
+            StagedFile("logo.png", "A", None, None),
+        ), 0, True)
+
+        self.assertEqual(detect_commit_type_from_files(change.files), "docs")
+        self.assertEqual(detect_commit_type_from_files(change.files[1:]), "fix")
+        self.assertEqual(detect_commit_type_from_files([]), "chore")
+
+    def test_fallback_message_uses_detected_type(self) -> None:
+        message = fallback_commit_message(StagedChange.from_patch(file_diff("README.md", ["+more"])))
+        numstat_only = StagedChange((StagedFile("src/app.py", "A", 200, 0, omitted="size limit"),), 0, True)
+
+        self.assertTrue(message.startswith("docs: update README.md ("))
+        self.assertTrue(fallback_commit_message(numstat_only).startswith("feat: update src/app.py ("))
+
+
+if __name__ == "__main__":
+    unittest.main()
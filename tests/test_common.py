@@ -0,0 +1,152 @@
+import asyncio
+import subprocess
+import tempfile
+import unittest
+from unittest import mock
+
+from utils import common
+
+
+class FakeProcess:
+    running = 0
+    peak = 0
+
+    def __init__(self) -> None:
+        self.returncode: int | None = None
+
+    async def communicate(self) -> tuple[bytes, bytes]:
+        FakeProcess.running += 1
+        FakeProcess.peak = max(FakeProcess.peak, FakeProcess.running)
+        await asyncio.sleep(0.01)
+        FakeProcess.running -= 1
+        self.returncode = 0
+        return b"ok\n", b""
+
+
+async def fake_exec(*args, **kwargs) -> FakeProcess:
+    return FakeProcess()
+
+
+class AsyncRunCommandTests(unittest.TestCase):
+    def tearDown(self) -> None:
+        common.set_dry_run(False)
+        common._async_max_concurrency = None
+        common._async_max_per_host = None
+
+    def test_remote_host_parsing(self) -> None:
+        self.assertEqual(common.remote_host("git@github.com:owner/repo.git"), "github.com")
+        self.assertEqual(common.remote_host("https://GitLab.example.com/group/repo"), "gitlab.example.com")
+        self.assertEqual(common.remote_host("ssh://git@host.internal:2222/repo.git"), "host.internal")
+        self.assertEqual(common.remote_host("/srv/git/repo.git"), "local")
+        self.assertEqual(common.remote_host("C:/repos/repo.git"), "local")
+
+    def test_dry_run_blocks_mutating_commands(self) -> None:
+        common.set_dry_run(True)
+        result = asyncio.run(common.async_run_command(["git", "push", "origin", "main"], silent=True))
+
+        self.assertEqual(result.returncode, 99)
+        self.assertEqual(result.stdout, "")
+
+    def test_per_host_limit_bounds_concurrent_remote_commands(self) -> None:
+        common.set_async_limits(max_concurrency=8, max_per_host=2)
+        FakeProcess.peak = 0
+
+        async def run_all() -> list:
+            return await asyncio.gather(
+                *[common.async_run_command(["gh", "pr", "list"], silent=True) for _ in range(6)]
+            )
+
+        with mock.patch.object(common.asyncio, "create_subprocess_exec", fake_exec):
+            results = asyncio.run(run_all())
+
+        self.assertEqual(FakeProcess.peak, 2)
+        self.assertTrue(all(r.stdout == "ok\n" for r in results))
+
+    def test_scoped_limits_are_restored(self) -> None:
+        common.set_async_limits(max_concurrency=3)
+
+        with common.async_limits(max_concurrency=16, max_per_host=1):
+            self.assertEqual((common._async_max_concurrency, common._async_max_per_host), (16, 1))
+
+        self.assertEqual((common._async_max_concurrency, common._async_max_per_host), (3, None))
+
+    def test_remote_url_lookups_take_global_slots(self) -> None:
+        common.set_async_limits(max_concurrency=2)
+        FakeProcess.peak = 0
+        paths = [f"/repos/r{n}" for n in range(6)]
+        self.addCleanup(lambda: [common._remote_urls.pop(p, None) for p in paths])
+
+        async def run_all() -> list:
+            return await asyncio.gather(*[common._remote_url_map(path) for path in paths])
+
+        with mock.patch.object(common.asyncio, "create_subprocess_exec", fake_exec):
+            asyncio.run(run_all())
+
+        self.assertEqual(FakeProcess.peak, 2)
+
+    def test_remote_urls_are_reread_after_a_write(self) -> None:
+        with tempfile.TemporaryDirectory() as repo:
+            subprocess.run(["git", "init", "-q", repo], check=True)
+            subprocess.run(["git", "remote", "add", "origin", "git@github.com:o/r.git"], cwd=repo, check=True)
+            self.assertEqual(asyncio.run(common._command_hosts(["git", "fetch"], repo)), ["github.com"])
+
+            common.run_command(["git", "remote", "set-url", "origin", "https://gitlab.com/o/r.git"], cwd=repo)
+
+            self.assertEqual(asyncio.run(common._command_hosts(["git", "fetch"], repo)), ["gitlab.com"])
+
+
+class CommandCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.repo = self._tmp.name
+        subprocess.run(["git", "init", "-q", "-b", "main"], cwd=self.repo, check=True)
+        common.set_command_cache(True)
+        common.clear_command_cache()
+
+    def tearDown(self) -> None:
+        common.clear_command_cache()
+        self._tmp.cleanup()
+
+    def test_read_only_commands_are_memoized_until_a_mutation(self) -> None:
+        before = common.command_cache_stats()
+        first = common.run_command(["git", "tag", "--list"], cwd=self.repo, silent=True)
+        second = common.run_command(["git", "tag", "--list"], cwd=self.repo, silent=True)
+        after = common.command_cache_stats()
+
+        self.assertEqual(first.stdout, second.stdout)
+        self.assertEqual(after["misses"] - before["misses"], 1)
+        self.assertEqual(after["hits"] - before["hits"], 1)
+
+        common.run_command(
+            ["git", "-c", "user.name=dev", "-c", "user.email=dev@example.com", "commit", "-q", "--allow-empty", "-m", "x"],
+            cwd=self.repo,
+            silent=True,
+        )
+        self.assertEqual(common.command_cache_stats()["entries"], 0)
+
+        common.run_command(["git", "tag", "v1.0.0"], cwd=self.repo, silent=True)
+        tags = common.run_command(["git", "tag", "--list"], cwd=self.repo, silent=True)
+        self.assertEqual(tags.stdout, "v1.0.0\n")
+
+    def test_query_forms_only_count_as_read_only(self) -> None:
+        self.assertTrue(common._is_readonly(["git", "tag", "--list", "v*", "--sort=-v:refname"]))
+        self.assertTrue(common._is_readonly(["git", "branch", "--show-current"]))
+        self.assertTrue(common._is_readonly(["git", "config", "--get", "remote.origin.url"]))
+        self.assertFalse(common._is_readonly(["git", "tag", "v1.0.0"]))
+        self.assertFalse(common._is_readonly(["git", "branch", "-D", "old"]))
+        self.assertFalse(common._is_readonly(["git", "config", "user.name", "dev"]))
+        self.assertFalse(common._is_readonly(["git", "remote", "add", "up", "url"]))
+
+    def test_working_tree_views_are_never_cached(self) -> None:
+        common.run_command(["git", "status", "--porcelain"], cwd=self.repo, silent=True)
+        with open(f"{self.repo}/new.txt", "w", encoding="utf-8") as fh:
+            fh.write("x")
+
+        result = common.run_command(["git", "status", "--porcelain"], cwd=self.repo, silent=True)
+
+        self.assertIn("new.txt", result.stdout)
+        self.assertEqual(common.command_cache_stats()["entries"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+import unittest
+
+from utils.daemon_pool import DaemonPool
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class DaemonPoolTests(unittest.TestCase):
+    def test_results_errors_and_cancelled_work(self) -> None:
+        pool = DaemonPool(1, "test")
+        self.addCleanup(pool.shutdown)
+        release = threading.Event()
+
+        blocked = pool.submit(release.wait, 5)
+        queued = pool.submit(lambda: "never")
+        failing = pool.submit(int, "x")
+        self.assertTrue(queued.cancel())
+        release.set()
+
+        self.assertTrue(blocked.result(timeout=5))
+        self.assertRaises(ValueError, failing.result, 5)
+        self.assertTrue(queued.cancelled())
+
+    def test_exit_does_not_wait_for_running_work(self) -> None:
+        script = (
+            "import time\n"
+            "from utils.daemon_pool import DaemonPool\n"
+            "pool = DaemonPool(1, 'test')\n"
+            "pool.submit(time.sleep, 30)\n"
+            "time.sleep(0.1)\n"
+            "pool.shutdown()\n"
+        )
+        started = time.monotonic()
+
+        subprocess.run([sys.executable, "-c", script], cwd=ROOT, check=True, timeout=20)
+
+        self.assertLess(time.monotonic() - started, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
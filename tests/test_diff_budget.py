@@ -0,0 +1,61 @@
+import unittest
+
+from core.diff_budget import compact_diff, estimate_tokens, file_weight, parse_diff
+from tests.diff_fixtures import file_diff
+
+
+class EstimateTokensTests(unittest.TestCase):
+    def test_counts_words_symbols_and_newlines(self) -> None:
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertEqual(estimate_tokens("def foo():"), 5)  # def, foo, (, ), :
+        self.assertEqual(estimate_tokens("a\nb"), 3)
+        self.assertEqual(estimate_tokens("internationalization"), 5)
+
+
+class FileWeightTests(unittest.TestCase):
+    def test_source_outranks_docs_generated_and_lockfiles(self) -> None:
+        source = file_weight("core/commit.py")
+        self.assertGreater(source, file_weight("tests/test_commit.py"))
+        self.assertGreater(file_weight("README.md"), file_weight("dist/app.min.js"))
+        self.assertGreater(file_weight("Assets/Player.prefab"), file_weight("package-lock.json"))
+        self.assertGreater(source, file_weight("Assets/Player.cs.meta"))
+
+
+class CompactDiffTests(unittest.TestCase):
+    def test_small_diff_is_unchanged(self) -> None:
+        diff = file_diff("app.py", ["-old", "+new"])
+        self.assertEqual(compact_diff(diff, 1000), diff)
+
+    def test_parse_counts_and_paths(self) -> None:
+        diff = file_diff("app.py", [" ctx", "-old", "+new", "+more"], new=True)
+        (parsed,) = parse_diff(diff)
+        self.assertEqual((parsed.path, parsed.added, parsed.deleted), ("app.py", 2, 1))
+        self.assertIn("new file mode 100644", parsed.header)
+
+    def test_budget_goes_to_source_and_every_file_keeps_a_header(self) -> None:
+        lock = file_diff("package-lock.json", [f'+    "dep-{i}": "^1.{i}.0",' for i in range(400)])
+        source = file_diff("core/app.py", ["-def old():", "+def handle_request(payload):", "+    return payload"])
+        docs = file_diff("README.md", [f"+Line {i} of the new usage section." for i in range(40)])
+        diff = "\n".join([lock, source, docs])
+
+        compacted = compact_diff(diff, 300)
+
+        self.assertLessEqual(estimate_tokens(compacted), 300)
+        self.assertIn("# package-lock.json (+400 -0, ", compacted)
+        self.assertIn("# README.md (+40 -0, partial)", compacted)
+        self.assertIn("+def handle_request(payload):", compacted)
+        self.assertNotIn('"dep-399"', compacted)
+
+    def test_lists_most_significant_files_when_headers_overflow(self) -> None:
+        diff = "\n".join(file_diff(f"pkg/generated_{i}.min.js", ["+x"]) for i in range(30))
+        diff += "\n" + file_diff("core/app.py", ["+y"])
+
+        compacted = compact_diff(diff, 60)
+
+        self.assertIn("core/app.py (+1 -0)", compacted)
+        self.assertLessEqual(estimate_tokens(compacted), 60)
+        self.assertIn("more files omitted", compacted)
+
+
+if __name__ == "__main__":
+    unittest.main()
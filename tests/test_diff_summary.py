@@ -0,0 +1,62 @@
+import os
+import unittest
+from unittest import mock
+
+from core import diff_summary
+from core.diff_budget import parse_diff
+from core.diff_summary import plan_chunks, summarize_diff
+from tests.diff_fixtures import added_lines, file_diff
+from utils import profiling
+
+
+class PlanChunksTests(unittest.TestCase):
+    def test_groups_by_directory_and_lists_lockfiles(self) -> None:
+        diff = "\n".join(
+            [
+                file_diff("web/b.py", added_lines(20)),
+                file_diff("api/a.py", added_lines(20)),
+                file_diff("package-lock.json", added_lines(500)),
+                file_diff("web/a.py", added_lines(20)),
+                file_diff("api/b.py", added_lines(20)),
+            ]
+        )
+
+        chunks, listed = plan_chunks(parse_diff(diff), chunk_tokens=600, max_chunks=10)
+
+        self.assertEqual([[f.path for f in c.files] for c in chunks], [["api/a.py", "api/b.py"], ["web/a.py", "web/b.py"]])
+        self.assertEqual([f.path for f in listed], ["package-lock.json"])
+        self.assertTrue(all("value_19" in chunk.text for chunk in chunks))
+
+    def test_oversized_files_are_compacted_and_overflow_is_listed(self) -> None:
+        diff = "\n".join(file_diff(f"src/m{i}.py", added_lines(400)) for i in range(4))
+
+        chunks, listed = plan_chunks(parse_diff(diff), chunk_tokens=300, max_chunks=3)
+
+        self.assertEqual(len(chunks), 3)
+        self.assertIn("partial", chunks[0].text)
+        self.assertEqual([f.path for f in listed], ["src/m3.py"])
+
+
+
+class SummarizeDiffTests(unittest.TestCase):
+    def test_map_calls_keep_the_callers_repo(self) -> None:
+        diff = "\n".join(file_diff(f"m{i}/a.py", added_lines(400)) for i in range(3))
+        repos: list[str | None] = []
+
+        def fake_chat(*args, **kwargs) -> str:
+            repos.append(profiling._repo.get())
+            return "summary"
+
+        with (
+            mock.patch.object(diff_summary, "chat_json", side_effect=fake_chat),
+            mock.patch.dict(os.environ, {"OLLAMA_MAP_CHUNK_TOKENS": "2000"}),
+            profiling.profile_repo("app"),
+        ):
+            summary = summarize_diff("app", parse_diff(diff))
+
+        self.assertGreater(len(summary.chunks), 1)
+        self.assertEqual(set(repos), {"app"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import time
+import unittest
+from unittest import mock
+
+from core import generation
+from core.formatters import COMMIT_SCHEMA
+from core.generation import GenerationTask, generate
+from core.ollama import OllamaError
+
+VALID = '{"commit": {"type": "feat", "scope": "", "subject": "add engine", "body": "", "breaking": false}}'
+
+
+def _parse(raw: str) -> str | None:
+    return "feat: add engine" if raw == VALID else None
+
+
+def _recover(raw: str) -> str | None:
+    return raw if raw.startswith("fix: ") else None
+
+
+TASK = GenerationTask(
+    kind="commit",
+    messages=[{"role": "system", "content": "sys"}, {"role": "user", "content": "diff"}],
+    schema=COMMIT_SCHEMA,
+    parse=_parse,
+    recover=_recover,
+    plain_system="plain",
+    num_predict=64,
+)
+
+
+class GenerateTests(unittest.TestCase):
+    def setUp(self) -> None:
+        generation.reset_rung_stats()
+        for patcher in (
+            mock.patch.dict(os.environ, {"OLLAMA_STREAM": "0"}),
+            mock.patch("builtins.print"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _chat(self, *answers):
+        patcher = mock.patch.object(generation, "chat_json", side_effect=list(answers))
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def test_schema_answer_is_one_call(self) -> None:
+        chat = self._chat(VALID)
+
+        self.assertEqual(generate(TASK, show_status=False), "feat: add engine")
+
+        chat.assert_called_once()
+        self.assertEqual(chat.call_args.kwargs["schema"], COMMIT_SCHEMA)
+        self.assertEqual(generation.rung_stats(), {"commit": {"schema": 1}})
+
+    def test_falls_through_to_plain_rung(self) -> None:
+        chat = self._chat("nonsense", "{}", "fix: recover plain")
+
+        self.assertEqual(generate(TASK, show_status=False), "fix: recover plain")
+
+        self.assertEqual(chat.call_count, 3)
+        plain_call = chat.call_args_list[-1]
+        self.assertIsNone(plain_call.kwargs["schema"])
+        self.assertEqual(plain_call.args[0][0]["content"], "plain")
+        self.assertEqual(generation.rung_stats(), {"commit": {"plain": 1}})
+
+    def test_deadline_stops_the_ladder(self) -> None:
+        def slow(*args, **kwargs):
+            time.sleep(kwargs["timeout"])
+            raise OllamaError("Ollama error: timed out")
+
+        patcher = mock.patch.object(generation, "chat_json", side_effect=slow)
+        chat = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.assertIsNone(generate(TASK, show_status=False, deadline=0.2))
+
+        chat.assert_called_once()
+        self.assertLessEqual(chat.call_args.kwargs["timeout"], 0.2)
+        self.assertEqual(generation.format_rung_stats(), "commit: deadline 1")
+
+    def test_server_errors_propagate(self) -> None:
+        self._chat(OllamaError("Ollama unreachable: refused"))
+
+        with self.assertRaises(OllamaError):
+            generate(TASK, show_status=False)
+        self.assertEqual(generation.rung_stats(), {"commit": {"error": 1}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import subprocess
+import tempfile
+import unittest
+
+from utils.git_workers import GitWorkerPool
+
+
+def git(cwd: str, *args: str) -> None:
+    subprocess.run(
+        ["git", "-c", "user.name=dev", "-c", "user.email=dev@example.com", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+    )
+
+
+class GitWorkerPoolTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.repo = self._tmp.name
+        git(self.repo, "init", "-q", "-b", "main")
+        git(self.repo, "commit", "-q", "--allow-empty", "-m", "init")
+        for tag in ("v1.9.0", "v1.10.0", "v1.2.0"):
+            git(self.repo, "tag", tag)
+        git(self.repo, "tag", "-a", "v2.0.0", "-m", "release")
+        git(self.repo, "update-ref", "refs/remotes/origin/main", "HEAD")
+        git(self.repo, "symbolic-ref", "refs/remotes/origin/HEAD", "refs/remotes/origin/main")
+        self.pool = GitWorkerPool()
+
+    def tearDown(self) -> None:
+        self.pool.close()
+        self._tmp.cleanup()
+
+    def assertMatchesGit(self, command: list[str]) -> None:
+        served = self.pool.try_run(command, self.repo)
+        self.assertIsNotNone(served, command)
+        assert served is not None
+        real = subprocess.run(command, cwd=self.repo, capture_output=True, text=True)
+        self.assertEqual(
+            (served.returncode, served.stdout, served.stderr),
+            (real.returncode, real.stdout, real.stderr),
+            command,
+        )
+
+    def test_served_commands_match_git_output(self) -> None:
+        commands = [
+            ["git", "rev-parse", "HEAD"],
+            ["git", "rev-parse", "v2.0.0"],
+            ["git", "rev-parse", "origin/main"],
+            ["git", "rev-parse", "--verify", "missing"],
+            ["git", "rev-parse", "--verify", "-q", "missing"],
+            ["git", "show-ref", "--verify", "--quiet", "refs/heads/main"],
+            ["git", "show-ref", "--verify", "--quiet", "refs/heads/missing"],
+            ["git", "show-ref", "--verify", "refs/tags/v2.0.0"],
+            ["git", "symbolic-ref", "refs/remotes/origin/HEAD"],
+            ["git", "symbolic-ref", "-q", "refs/heads/main"],
+            ["git", "tag", "--list", "v*.*.*", "--sort=-v:refname"],
+            ["git", "tag", "--sort=-creatordate"],
+            ["git", "tag", "--list", "--sort=refname"],
+        ]
+        for command in commands:
+            self.assertMatchesGit(command)
+
+    def test_unsupported_shapes_fall_back(self) -> None:
+        self.assertIsNone(self.pool.try_run(["git", "rev-parse", "--short", "HEAD"], self.repo))
+        self.assertIsNone(self.pool.try_run(["git", "symbolic-ref", "HEAD"], self.repo))
+        self.assertIsNone(self.pool.try_run(["git", "tag", "--list"], self.repo))
+        self.assertIsNone(self.pool.try_run(["git", "status", "--porcelain"], self.repo))
+
+    def test_invalidate_picks_up_new_refs(self) -> None:
+        command = ["git", "show-ref", "--verify", "--quiet", "refs/heads/feature"]
+        first = self.pool.try_run(command, self.repo)
+        assert first is not None
+        self.assertEqual(first.returncode, 1)
+
+        git(self.repo, "branch", "feature")
+        self.pool.invalidate(self.repo)
+
+        second = self.pool.try_run(command, self.repo)
+        assert second is not None
+        self.assertEqual(second.returncode, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from core import llm_cache
+
+
+class LlmCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        cache = tempfile.TemporaryDirectory()
+        self.addCleanup(cache.cleanup)
+        patcher = mock.patch.dict(os.environ, {"DEVTOOLS_CACHE_DIR": cache.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(llm_cache.close)
+        llm_cache.set_llm_cache(True)
+
+    def test_key_depends_on_every_input(self) -> None:
+        base = ("commit", "llama3.2", "system", "user", {"num_ctx": None})
+        key = llm_cache.cache_key(*base)
+
+        self.assertEqual(key, llm_cache.cache_key(*base))
+        self.assertNotEqual(key, llm_cache.cache_key("pr", *base[1:]))
+        self.assertNotEqual(key, llm_cache.cache_key("commit", "other", *base[2:]))
+        self.assertNotEqual(key, llm_cache.cache_key("commit", "llama3.2", "system", "user 2", {"num_ctx": None}))
+        self.assertNotEqual(key, llm_cache.cache_key("commit", "llama3.2", "system", "user", {"num_ctx": 4096}))
+
+    def test_generates_once_then_reuses(self) -> None:
+        generate = mock.Mock(return_value="feat: add cache")
+        args = ("commit", "m", "sys", "user", {})
+
+        with mock.patch("builtins.print"):
+            first = llm_cache.cached_generation(*args, generate)
+            second = llm_cache.cached_generation(*args, generate)
+
+        self.assertEqual((first, second), ("feat: add cache", "feat: add cache"))
+        generate.assert_called_once()
+
+    def test_failed_generation_is_not_stored(self) -> None:
+        generate = mock.Mock(return_value=None)
+
+        llm_cache.cached_generation("commit", "m", "s", "u", {}, generate)
+        llm_cache.cached_generation("commit", "m", "s", "u", {}, generate)
+
+        self.assertEqual(generate.call_count, 2)
+
+    def test_evicts_least_recently_used(self) -> None:
+        for name in ("a", "b", "c"):
+            llm_cache.store(name, "commit", name, max_entries=2)
+            if name == "b":
+                llm_cache.lookup("a")  # "a" becomes more recent than "b"
+
+        self.assertIsNone(llm_cache.lookup("b"))
+        self.assertEqual(llm_cache.lookup("a"), "a")
+        self.assertEqual(llm_cache.lookup("c"), "c")
+
+    def test_disabled_cache_bypasses_reads_and_writes(self) -> None:
+        llm_cache.store("k", "commit", "stored")
+        llm_cache.set_llm_cache(False)
+        self.addCleanup(llm_cache.set_llm_cache, True)
+
+        self.assertIsNone(llm_cache.lookup("k"))
+        llm_cache.store("k2", "commit", "ignored")
+        llm_cache.set_llm_cache(True)
+        self.assertIsNone(llm_cache.lookup("k2"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import unittest
+from unittest import mock
+
+from benchmarks.fake_ollama import FakeOllama, FakeOllamaConfig
+from core import llm_cache, merge
+from core.commit import generate_commit_message_with_ollama
+from core.formatters import COMMIT_SCHEMA
+from core.ollama import OllamaClient, set_default_client
+from core.staged_diff import StagedChange
+
+DIFF = "diff --git a/app.py b/app.py\n--- a/app.py\n+++ b/app.py\n@@ -1 +1 @@\n-old\n+new"
+FROM_JSON = "feat(core): add generated change summary\n\n- update generated modules\n- adjust callers"
+FROM_PLAIN = "feat(core): add generated change summary\n\n- update generated modules"
+
+
+class LlmPathTests(unittest.TestCase):
+    """Commit and PR generation end to end against the fake Ollama server."""
+
+    def setUp(self) -> None:
+        self.fake = FakeOllama(FakeOllamaConfig()).start()
+        self.addCleanup(self.fake.stop)
+        client = OllamaClient(host=self.fake.host, model="fake")
+        self.addCleanup(client.close)
+        previous = set_default_client(client)
+        self.addCleanup(set_default_client, previous)
+
+        llm_cache.set_llm_cache(False)
+        self.addCleanup(llm_cache.set_llm_cache, True)
+        patcher = mock.patch("builtins.print")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _commit(self, stream: str) -> str | None:
+        with mock.patch.dict(os.environ, {"OLLAMA_STREAM": stream}):
+            return generate_commit_message_with_ollama("repo", StagedChange.from_patch(DIFF), show_status=False)
+
+    def test_commit_schema_answer_takes_one_call(self) -> None:
+        for stream in ("1", "0"):
+            with self.subTest(stream=stream):
+                before = self.fake.requests["/api/chat"]
+                self.assertEqual(self._commit(stream), FROM_JSON)
+                self.assertEqual(self.fake.requests["/api/chat"] - before, 1)
+        self.assertEqual(self.fake.payloads[-1]["format"], COMMIT_SCHEMA)
+
+    def test_commit_retry_then_plain_recovery(self) -> None:
+        for stream in ("1", "0"):
+            with self.subTest(stream=stream, rung="retry"):
+                self.fake.config.script = ["malformed", "ok"]
+                self.assertEqual(self._commit(stream), FROM_JSON)
+            with self.subTest(stream=stream, rung="plain"):
+                self.fake.config.script = ["malformed", "malformed", "ok"]
+                self.assertEqual(self._commit(stream), FROM_PLAIN)
+                self.assertNotIn("format", self.fake.payloads[-1])
+
+    def test_commit_http_error_returns_none(self) -> None:
+        self.fake.config.script = ["error"]
+
+        self.assertIsNone(self._commit("1"))
+
+    def test_docs_only_diff_skips_the_model(self) -> None:
+        docs = "diff --git a/README.md b/README.md\n--- a/README.md\n+++ b/README.md\n@@ -1 +1 @@\n-old\n+new"
+
+        message = generate_commit_message_with_ollama("repo", StagedChange.from_patch(docs), show_status=False)
+
+        self.assertTrue(message.startswith("docs: update README.md"))
+        self.assertEqual(self.fake.requests["/api/chat"], 0)
+
+    def test_large_diff_is_summarized_then_reduced(self) -> None:
+        big = "\n".join(
+            f"diff --git a/src/m{i}.py b/src/m{i}.py\n--- a/src/m{i}.py\n+++ b/src/m{i}.py\n@@ -0,0 +1,300 @@\n"
+            + "\n".join(f"+    value_{n} = compute({n})" for n in range(300))
+            for i in range(6)
+        )
+        env = {"OLLAMA_STREAM": "0", "OLLAMA_MAP_REDUCE_TOKENS": "1000", "OLLAMA_MAP_CHUNK_TOKENS": "3000"}
+
+        with mock.patch.dict(os.environ, env):
+            message = generate_commit_message_with_ollama("repo", StagedChange.from_patch(big), show_status=False)
+
+        self.assertEqual(message, FROM_JSON)
+        map_calls, reduce_call = self.fake.payloads[:-1], self.fake.payloads[-1]
+        self.assertGreater(len(map_calls), 1)
+        self.assertTrue(all("format" not in payload for payload in map_calls))
+        self.assertIn("Summaries of its parts", reduce_call["messages"][1]["content"])
+        self.assertEqual(reduce_call["format"], COMMIT_SCHEMA)
+
+    def test_pr_retry_and_fallback(self) -> None:
+        self.fake.config.script = ["malformed", "ok"]
+        title, body = merge.generate_pr_text("repo", "- feat: add thing")
+        self.assertEqual(title, "Release latest changes")
+        self.assertIn("## Testing", body)
+
+        self.fake.config.script = ["malformed", "malformed", "error"]
+        title, _ = merge.generate_pr_text("repo", "- feat: add thing")
+        self.assertIn("chore: merge", title)
+
+
+if __name__ == "__main__":
+    unittest.main()
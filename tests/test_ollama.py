@@ -0,0 +1,214 @@
+import http.client
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from unittest import mock
+
+from core.ollama import JsonObjectScanner, OllamaClient, OllamaError, pick_num_ctx
+
+
+COMMIT = '{"commit": {"type": "fix", "subject": "handle } in \\"strings\\"", "body": ""}}'
+
+
+class _StreamHandler(BaseHTTPRequestHandler):
+    tokens: list[str] = []
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        try:
+            for token in self.tokens:
+                line = json.dumps({"message": {"role": "assistant", "content": token}, "done": False})
+                self.wfile.write(line.encode("utf-8") + b"\n")
+                self.wfile.flush()
+                time.sleep(0.01)
+            self.wfile.write(b'{"message": {"content": ""}, "done": true}\n')
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class _ChatHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    drop_after_response = False
+    peers: list[tuple[str, int]] = []
+    payloads: list[dict] = []
+
+    def do_POST(self) -> None:
+        type(self).payloads.append(json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0)))))
+        type(self).peers.append(self.client_address)
+        body = json.dumps({"message": {"role": "assistant", "content": COMMIT}, "done": True}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        # Simulates an idle keep-alive timeout on the server side
+        self.close_connection = self.drop_after_response
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def _serve(handler) -> tuple[ThreadingHTTPServer, str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class JsonObjectScannerTests(unittest.TestCase):
+    def test_finds_objects_across_chunks_ignoring_braces_in_strings(self) -> None:
+        scanner = JsonObjectScanner()
+        found: list[str] = []
+        for i in range(0, len(COMMIT), 7):
+            found += scanner.feed(("Sure: " if i == 0 else "") + COMMIT[i : i + 7])
+        self.assertEqual(found, [COMMIT])
+        self.assertEqual(scanner.feed(" {\"a\": 1} trailing"), ['{"a": 1}'])
+
+
+class PickNumCtxTests(unittest.TestCase):
+    def test_rounds_up_to_bucket_within_cap(self) -> None:
+        self.assertEqual(pick_num_ctx(100, 320), 2048)
+        self.assertEqual(pick_num_ctx(2000, 320), 4096)
+        self.assertEqual(pick_num_ctx(2000, 320, cap=3000), 3000)
+        self.assertEqual(pick_num_ctx(100_000, 320), 32768)
+
+
+class ChatJsonStreamTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server, host = _serve(_StreamHandler)
+        self.client = OllamaClient(host=host, model="test")
+
+    def tearDown(self) -> None:
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_returns_once_object_is_complete(self) -> None:
+        _StreamHandler.tokens = [COMMIT[:20], COMMIT[20:], "\n"] + [" "] * 50
+        received: list[str] = []
+
+        raw = self.client.chat_stream([], json_mode=True, on_token=received.append)
+
+        self.assertEqual(raw, COMMIT)
+        self.assertEqual(received, [COMMIT[:20], COMMIT[20:]])
+
+    def test_rejected_object_keeps_reading_until_done(self) -> None:
+        _StreamHandler.tokens = ['{"other": 1}', " ", COMMIT]
+
+        raw = self.client.chat_stream([], json_mode=True, accept=lambda candidate: "commit" in candidate)
+
+        self.assertEqual(raw, COMMIT)
+
+    def test_plain_text_returns_full_content(self) -> None:
+        _StreamHandler.tokens = ["feat: add", " streaming"]
+
+        self.assertEqual(self.client.chat_stream([]), "feat: add streaming")
+
+
+class OllamaClientPoolTests(unittest.TestCase):
+    def setUp(self) -> None:
+        _ChatHandler.peers = []
+        _ChatHandler.payloads = []
+        _ChatHandler.drop_after_response = False
+        self.server, host = _serve(_ChatHandler)
+        self.client = OllamaClient(host=host, model="test")
+
+    def tearDown(self) -> None:
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_sequential_calls_reuse_one_connection(self) -> None:
+        for _ in range(3):
+            self.assertEqual(self.client.chat([], json_mode=True), COMMIT)
+
+        self.assertEqual(len(set(_ChatHandler.peers)), 1)
+
+    def test_reconnects_when_server_dropped_idle_connection(self) -> None:
+        _ChatHandler.drop_after_response = True
+
+        self.assertEqual(self.client.chat([]), COMMIT)
+        time.sleep(0.05)
+        self.assertEqual(self.client.chat([]), COMMIT)
+
+        self.assertEqual(len(set(_ChatHandler.peers)), 2)
+
+    def test_sizes_context_and_sends_keep_alive(self) -> None:
+        client = OllamaClient(host=self.client.host, model="test", keep_alive="1h")
+        self.addCleanup(client.close)
+        messages = [{"role": "user", "content": "word " * 3000}]
+
+        client.chat(messages, num_predict=320)
+
+        payload = _ChatHandler.payloads[-1]
+        self.assertEqual(payload["options"]["num_ctx"], 4096)
+        self.assertEqual(payload["options"]["num_predict"], 320)
+        self.assertEqual(payload["keep_alive"], "1h")
+
+
+class _FakeConnection:
+    def __init__(self, request_error: Exception | None = None, response_error: Exception | None = None) -> None:
+        self.request_error = request_error
+        self.response_error = response_error
+        self.timeout: float | None = None
+        self.sock = None
+
+    def request(self, *args, **kwargs) -> None:
+        if self.request_error is not None:
+            raise self.request_error
+
+    def getresponse(self):
+        if self.response_error is not None:
+            raise self.response_error
+        return "response"
+
+    def close(self) -> None:
+        pass
+
+
+class OllamaClientRetryTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = OllamaClient(host="http://127.0.0.1:1", model="test", timeout=10.0)
+
+    def _send(self, *connections: tuple[_FakeConnection, bool], clock: list[float] | None = None):
+        acquire = mock.patch.object(self.client, "_acquire", side_effect=list(connections))
+        monotonic = mock.patch("core.ollama.time.monotonic", side_effect=clock or [0.0] * 4)
+        with acquire as acquired, monotonic:
+            try:
+                return self.client._send("POST", "/api/chat", {})
+            finally:
+                self.calls = acquired.call_count
+
+    def test_stale_pooled_connection_is_retried_within_the_timeout(self) -> None:
+        fresh = _FakeConnection()
+
+        _, resp = self._send((_FakeConnection(request_error=BrokenPipeError()), True), (fresh, False), clock=[0.0, 4.0])
+
+        self.assertEqual(resp, "response")
+        self.assertEqual(fresh.timeout, 6.0)
+
+    def test_failure_after_the_request_is_not_retried(self) -> None:
+        garbled = _FakeConnection(response_error=http.client.BadStatusLine("garbage"))
+
+        with self.assertRaises(OllamaError):
+            self._send((garbled, True), (_FakeConnection(), False))
+        self.assertEqual(self.calls, 1)
+
+    def test_no_retry_once_the_timeout_is_spent(self) -> None:
+        stale = _FakeConnection(response_error=http.client.RemoteDisconnected("closed"))
+
+        with self.assertRaises(OllamaError):
+            self._send((stale, True), (_FakeConnection(), False), clock=[0.0, 10.5])
+        self.assertEqual(self.calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
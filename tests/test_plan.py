@@ -0,0 +1,99 @@
+import threading
+import unittest
+from unittest import mock
+
+from core import plan
+from core.plan import PlannedAction
+from utils.console import parse_selection
+
+
+class ParseSelectionTests(unittest.TestCase):
+    def test_lists_ranges_and_keywords(self) -> None:
+        self.assertEqual(parse_selection("1,3-5", 6), {1, 3, 4, 5})
+        self.assertEqual(parse_selection(" 2 , 2-3 ", 3), {2, 3})
+        self.assertEqual(parse_selection("all", 3), {1, 2, 3})
+        self.assertEqual(parse_selection("", 3), set())
+        self.assertEqual(parse_selection("none", 3), set())
+
+    def test_rejects_malformed_or_out_of_range(self) -> None:
+        for raw in ("0", "4", "3-1", "1-9", "x", "1;2"):
+            self.assertIsNone(parse_selection(raw, 3), raw)
+
+
+class ExecutePlanTests(unittest.TestCase):
+    def test_failure_skips_rest_of_repo_only(self) -> None:
+        calls: list[tuple[str, str]] = []
+        lock = threading.Lock()
+
+        def fake(ok: bool):
+            def run(action: PlannedAction) -> bool:
+                with lock:
+                    calls.append((action.repo, action.kind))
+                return ok
+            return run
+
+        executors = {
+            "commit": (fake(True), "committed"),
+            "push": (fake(False), "pushed"),
+            "merge": (fake(True), "merged"),
+            "changelog": (fake(True), "changelogs"),
+            "sync": (fake(True), "synced"),
+        }
+        actions = [
+            PlannedAction("a", "/a", "commit", "feat: x"),
+            PlannedAction("a", "/a", "push", "push"),
+            PlannedAction("a", "/a", "sync", "pull"),
+            PlannedAction("b", "/b", "changelog", "[v1] 2 commit(s)"),
+        ]
+
+        with mock.patch.dict(plan._EXECUTORS, executors):
+            results = plan.execute_plan(actions, workers=2)
+
+        self.assertEqual(sorted(calls), [("a", "commit"), ("a", "push"), ("b", "changelog")])
+        self.assertEqual(
+            results,
+            {"committed": 1, "pushed": 0, "merged": 0, "changelogs": 1, "synced": 0, "skipped": 0, "failed": 1},
+        )
+
+    def test_dry_run_skips_every_action_without_failures(self) -> None:
+        actions = [
+            PlannedAction("a", "/a", "commit", "feat: x"),
+            PlannedAction("a", "/a", "push", "push"),
+            PlannedAction("a", "/a", "changelog", "[v1] 2 commit(s)"),
+            PlannedAction("b", "/b", "merge", "PR"),
+            PlannedAction("b", "/b", "sync", "pull", branch="main"),
+        ]
+        called = mock.Mock(return_value=False)
+        executors = {kind: (called, counter) for kind, (_, counter) in plan._EXECUTORS.items()}
+
+        with (
+            mock.patch.object(plan, "is_dry_run", return_value=True),
+            mock.patch.dict(plan._EXECUTORS, executors),
+            mock.patch("builtins.print"),
+        ):
+            results = plan.execute_plan(actions, workers=2)
+
+        called.assert_not_called()
+        self.assertEqual((results["skipped"], results["failed"]), (5, 0))
+
+
+class PlanSyncTests(unittest.TestCase):
+    def test_dry_run_plans_from_existing_remote_refs(self) -> None:
+        snapshot = mock.Mock()
+        snapshot.ahead_behind.return_value = (0, 3)
+        repo_plan = plan.RepoPlan("a", "/a")
+
+        with (
+            mock.patch.object(plan, "is_dry_run", return_value=True),
+            mock.patch.object(plan.sync, "fetch") as fetch,
+            mock.patch.object(plan, "collect_snapshot", return_value=snapshot),
+            mock.patch.object(plan.sync, "get_default_remote_branch", return_value="main"),
+        ):
+            plan._plan_sync(repo_plan)
+
+        fetch.assert_not_called()
+        self.assertEqual([a.summary for a in repo_plan.actions], ["pull 3 commit(s) into main (dry-run: remote refs not fetched)"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import json
+import os
+import tempfile
+import unittest
+
+from utils import profiling
+
+
+class ProfilingTests(unittest.TestCase):
+    def setUp(self) -> None:
+        profiling.reset_profiling()
+        self.addCleanup(profiling.reset_profiling)
+        self.roots = [os.path.join("/work", "a"), os.path.join("/work", "b")]
+
+    def _record(self, argv: list[str], returncode: int = 0, **kwargs) -> None:
+        profiling.record_call(argv, profiling.now(), returncode, **kwargs)
+
+    def test_nothing_is_recorded_unless_enabled(self) -> None:
+        self._record(["git", "status"], cwd="/work/a/app")
+
+        self.assertEqual(profiling.records(), [])
+
+    def test_records_label_repo_stage_and_command(self) -> None:
+        profiling.enable_profiling(self.roots)
+
+        with profiling.profile_stage("merge"):
+            self._record(["git", "-c", "x=y", "fetch", "--all"], cwd="/work/a/app", stdout="ok\n")
+            self._record(["git", "status"], cwd="/work/b/group/app", returncode=1, stderr=b"boom")
+            with profiling.profile_repo("named"):
+                self._record(["ollama", "chat"], tool="ollama", prefix="ollama chat (host)")
+        self._record(["git", "status"], cwd="/elsewhere/app")
+
+        recs = profiling.records()
+        self.assertEqual([r.repo for r in recs], [
+            "app", os.path.join("group", "app"), "named", os.path.abspath("/elsewhere/app"),
+        ])
+        self.assertEqual([r.prefix for r in recs], ["git fetch", "git status", "ollama chat (host)", "git status"])
+        self.assertEqual([r.stage for r in recs], ["merge", "merge", "merge", "main"])
+        self.assertEqual((recs[0].stdout_bytes, recs[1].stderr_bytes, recs[2].tool), (3, 4, "ollama"))
+
+    def test_nested_repos_with_the_same_name_stay_apart(self) -> None:
+        profiling.enable_profiling(self.roots)
+
+        self._record(["git", "status"], cwd="/work/a/x/app")
+        self._record(["git", "status"], cwd="/work/a/y/app")
+
+        self.assertEqual([r.repo for r in profiling.records()], [os.path.join("x", "app"), os.path.join("y", "app")])
+
+    def test_aggregate_counts_calls_and_failures(self) -> None:
+        profiling.enable_profiling(self.roots)
+        for code in (0, 1, 0):
+            self._record(["git", "fetch"], returncode=code, cwd="/work/a/app")
+        self._record(["gh", "pr", "list"], cwd="/work/a/app")
+
+        rows = {label: (calls, failed) for label, calls, _, _, failed in profiling._aggregate(lambda r: r.prefix)}
+
+        self.assertEqual(rows, {"git fetch": (3, 1), "gh pr": (1, 0)})
+
+    def test_chrome_trace_has_stages_calls_and_thread_names(self) -> None:
+        profiling.enable_profiling(self.roots)
+        with profiling.profile_stage("sync"):
+            self._record(["git", "pull"], cwd="/work/a/app")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = profiling.write_chrome_trace(os.path.join(tmp, "trace.json"))
+            with open(path, encoding="utf-8") as fh:
+                events = json.load(fh)["traceEvents"]
+
+        by_phase = {(e["ph"], e.get("cat")): e for e in events}
+        self.assertEqual(by_phase[("X", "stage")]["name"], "sync")
+        call = by_phase[("X", "git")]
+        self.assertEqual((call["name"], call["args"]["repo"], call["args"]["stage"]), ("git pull", "app", "sync"))
+        self.assertGreaterEqual(call["dur"], 0)
+        names = {e["args"]["name"] for e in events if e["ph"] == "M"}
+        self.assertEqual(names, {"stages", "MainThread"})
+
+
+if __name__ == "__main__":
+    unittest.main()
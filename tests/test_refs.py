@@ -0,0 +1,73 @@
+import os
+import subprocess
+import tempfile
+import unittest
+
+from core import refs
+from core.versioning import get_last_semver_tag
+
+
+def git(cwd: str, *args: str) -> str:
+    res = subprocess.run(
+        ["git", "-c", "user.name=dev", "-c", "user.email=dev@example.com", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return res.stdout.strip()
+
+
+class RefReaderTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.repo = os.path.join(self._tmp.name, "repo")
+        os.makedirs(self.repo)
+        git(self.repo, "init", "-q", "-b", "main")
+        git(self.repo, "commit", "-q", "--allow-empty", "-m", "init")
+        for tag in ("v1.9.0", "v1.10.0", "v1.2.0", "nightly"):
+            git(self.repo, "tag", tag)
+        git(self.repo, "update-ref", "refs/remotes/origin/main", "HEAD")
+        git(self.repo, "symbolic-ref", "refs/remotes/origin/HEAD", "refs/remotes/origin/main")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_loose_and_packed_refs_match_git(self) -> None:
+        for packed in (False, True):
+            if packed:
+                git(self.repo, "pack-refs", "--all")
+                git(self.repo, "tag", "v2.0.0")  # loose tag next to packed ones
+
+            expected = git(self.repo, "for-each-ref", "--format=%(refname)", "refs/tags/").splitlines()
+            self.assertEqual(sorted(refs.list_refs(self.repo, "refs/tags/")), expected)
+            self.assertEqual(refs.current_branch(self.repo), "main")
+            self.assertTrue(refs.ref_exists(self.repo, "refs/heads/main"))
+            self.assertFalse(refs.ref_exists(self.repo, "refs/heads/missing"))
+            self.assertEqual(
+                refs.symbolic_ref_target(self.repo, "refs/remotes/origin/HEAD"),
+                "refs/remotes/origin/main",
+            )
+
+        self.assertEqual(get_last_semver_tag(self.repo), "v2.0.0")
+
+    def test_detached_head_and_worktree(self) -> None:
+        worktree = os.path.join(self._tmp.name, "wt")
+        git(self.repo, "worktree", "add", "-q", "-b", "feature", worktree)
+
+        self.assertEqual(refs.current_branch(worktree), "feature")
+        self.assertTrue(refs.ref_exists(worktree, "refs/tags/v1.2.0"))
+
+        git(self.repo, "checkout", "-q", "--detach")
+        self.assertEqual(refs.current_branch(self.repo), "")
+        self.assertEqual(refs.current_branch(worktree), "feature")
+
+    def test_reftable_repos_are_left_to_git(self) -> None:
+        os.makedirs(os.path.join(self.repo, ".git", "reftable"))
+
+        with self.assertRaises(refs.RefsUnavailable):
+            refs.current_branch(self.repo)
+
+
+if __name__ == "__main__":
+    unittest.main()
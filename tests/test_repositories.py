@@ -0,0 +1,123 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import core.repositories as repositories
+from core import repo_index
+from core.repositories import ScanOptions, discover_git_repositories, iter_repositories_by_root
+
+
+def make_repo(path: str, git_file: bool = False) -> None:
+    os.makedirs(path, exist_ok=True)
+    if git_file:
+        with open(os.path.join(path, ".git"), "w", encoding="utf-8") as fh:
+            fh.write("gitdir: ../.git/worktrees/wt\n")
+    else:
+        os.makedirs(os.path.join(path, ".git"), exist_ok=True)
+
+
+class DiscoverRepositoriesTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        cache = tempfile.TemporaryDirectory()
+        self.addCleanup(cache.cleanup)
+        patcher = mock.patch.dict(os.environ, {"DEVTOOLS_CACHE_DIR": cache.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        repo_index.clear_memory()
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def names(self, options: ScanOptions | None = None, use_index: bool | None = False) -> list[str]:
+        return [name for name, _ in discover_git_repositories(self.root, options, use_index=use_index)]
+
+    def test_finds_nested_groups_and_worktrees_in_sorted_order(self) -> None:
+        make_repo(os.path.join(self.root, "b-repo"))
+        make_repo(os.path.join(self.root, "a-group", "api"))
+        make_repo(os.path.join(self.root, "a-group", "api-wt"), git_file=True)
+
+        self.assertEqual(
+            self.names(),
+            [os.path.join("a-group", "api"), os.path.join("a-group", "api-wt"), "b-repo"],
+        )
+
+    def test_depth_limit_and_pruned_directories(self) -> None:
+        make_repo(os.path.join(self.root, "top"))
+        make_repo(os.path.join(self.root, "g", "deep"))
+        make_repo(os.path.join(self.root, "g", "node_modules", "dep"))
+
+        self.assertEqual(self.names(ScanOptions(max_depth=1)), ["top"])
+        self.assertEqual(self.names(), [os.path.join("g", "deep"), "top"])
+
+    def test_descends_into_repos_only_when_they_declare_submodules(self) -> None:
+        make_repo(os.path.join(self.root, "plain", "vendor", "lib"))
+        make_repo(os.path.join(self.root, "plain"))
+        make_repo(os.path.join(self.root, "parent", "libs", "sub"), git_file=True)
+        make_repo(os.path.join(self.root, "parent"))
+        with open(os.path.join(self.root, "parent", ".gitmodules"), "w", encoding="utf-8") as fh:
+            fh.write("")
+
+        self.assertEqual(
+            self.names(),
+            ["parent", os.path.join("parent", "libs", "sub"), "plain"],
+        )
+        self.assertEqual(self.names(ScanOptions(submodules=False)), ["parent", "plain"])
+
+    def test_warm_index_only_lists_changed_directories(self) -> None:
+        make_repo(os.path.join(self.root, "g1", "a"))
+        make_repo(os.path.join(self.root, "g2", "b"))
+        self.assertEqual(self.names(use_index=True), [os.path.join("g1", "a"), os.path.join("g2", "b")])
+
+        make_repo(os.path.join(self.root, "g2", "c"))
+        with mock.patch.object(repositories, "_subdirectories", wraps=repositories._subdirectories) as listing:
+            names = self.names(use_index=True)
+
+        self.assertEqual(names, [os.path.join("g1", "a"), os.path.join("g2", "b"), os.path.join("g2", "c")])
+        listed = [call.args[0] for call in listing.call_args_list]
+        self.assertEqual(listed, [os.path.join(self.root, "g2")])
+
+    def test_index_drops_removed_repositories(self) -> None:
+        make_repo(os.path.join(self.root, "keep"))
+        make_repo(os.path.join(self.root, "gone"))
+        self.names(use_index=True)
+
+        os.rmdir(os.path.join(self.root, "gone", ".git"))
+        os.rmdir(os.path.join(self.root, "gone"))
+
+        self.assertEqual(self.names(use_index=True), ["keep"])
+
+    def test_rescan_walks_each_root_cold_once_per_run(self) -> None:
+        make_repo(os.path.join(self.root, "g", "a"))
+        self.names(use_index=True)
+        repositories.set_rescan(True)
+        self.addCleanup(repositories.set_rescan, False)
+
+        with mock.patch.object(repositories, "_subdirectories", wraps=repositories._subdirectories) as listing:
+            self.names(use_index=True)
+            cold = listing.call_count
+            listing.reset_mock()
+            self.names(use_index=True)
+
+        self.assertEqual(cold, 2)  # root and g/
+        self.assertEqual(listing.call_count, 0)
+
+    def test_roots_are_returned_in_order_with_their_repos(self) -> None:
+        other = tempfile.TemporaryDirectory()
+        self.addCleanup(other.cleanup)
+        make_repo(os.path.join(self.root, "one"))
+        make_repo(os.path.join(other.name, "two"))
+        missing = os.path.join(self.root, "missing")
+
+        results = [
+            (root, [name for name, _ in repos])
+            for root, repos in iter_repositories_by_root([self.root, missing, other.name])
+        ]
+
+        self.assertEqual(results, [(self.root, ["one"]), (missing, []), (other.name, ["two"])])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+from core.snapshot import parse_refs, parse_status_v2, parse_track, RepoSnapshot
+
+
+STATUS_V2 = "\0".join(
+    [
+        "# branch.oid 83e195c5c03381b1d654733b5c941c50680dbb5f",
+        "# branch.head feature/x",
+        "# branch.upstream origin/feature/x",
+        "# branch.ab +2 -1",
+        "1 .M N... 100644 100644 100644 6178079 6178079 with space.txt",
+        "2 R. N... 100644 100644 100644 7898192 7898192 R100 new name.txt",
+        "old name.txt",
+        "? untracked.txt",
+        "",
+    ]
+)
+
+
+class RepoSnapshotTests(unittest.TestCase):
+    def test_parse_status_v2_headers_and_entries(self) -> None:
+        info = parse_status_v2(STATUS_V2)
+
+        self.assertEqual(info["branch"], "feature/x")
+        self.assertEqual(info["upstream"], "origin/feature/x")
+        self.assertEqual((info["ahead"], info["behind"]), (2, 1))
+        paths = [(e.kind, e.xy, e.path, e.orig_path) for e in info["entries"]]
+        self.assertEqual(
+            paths,
+            [
+                ("1", ".M", "with space.txt", ""),
+                ("2", "R.", "new name.txt", "old name.txt"),
+                ("?", "??", "untracked.txt", ""),
+            ],
+        )
+
+    def test_staged_and_unstaged_flags(self) -> None:
+        snapshot = RepoSnapshot(path=".", refs={}, **parse_status_v2(STATUS_V2))
+
+        self.assertTrue(snapshot.is_dirty)
+        self.assertTrue(snapshot.has_staged_changes)
+        self.assertTrue(snapshot.has_unstaged_changes)
+
+    def test_detached_unborn_and_clean(self) -> None:
+        info = parse_status_v2("# branch.oid (initial)\0# branch.head (detached)\0")
+        snapshot = RepoSnapshot(path=".", **info)
+
+        self.assertIsNone(snapshot.branch)
+        self.assertIsNone(snapshot.head_oid)
+        self.assertFalse(snapshot.is_dirty)
+
+    def test_refs_answer_default_branch_and_tracking(self) -> None:
+        raw = "\n".join(
+            [
+                "refs/heads/main\0aaa\0aaa1\0\0refs/remotes/origin/main\0behind 3",
+                "refs/heads/topic\0bbb\0bbb1\0\0refs/remotes/origin/other\0ahead 1",
+                "refs/remotes/origin/HEAD\0aaa\0aaa1\0refs/remotes/origin/main\0\0",
+            ]
+        )
+        snapshot = RepoSnapshot(".", "main", "aaa", None, None, None, refs=parse_refs(raw))
+
+        self.assertEqual(snapshot.default_remote_branch("origin"), "main")
+        self.assertEqual(snapshot.ahead_behind("main", "origin"), (0, 3))
+        self.assertIsNone(snapshot.ahead_behind("topic", "origin"))
+        self.assertTrue(snapshot.has_local_branch("topic"))
+
+    def test_parse_track(self) -> None:
+        self.assertEqual(parse_track("ahead 1, behind 2"), (1, 2))
+        self.assertEqual(parse_track(""), (0, 0))
+        self.assertIsNone(parse_track("gone"))
+
+
+if __name__ == "__main__":
+    unittest.main()
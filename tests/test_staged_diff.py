@@ -0,0 +1,190 @@
+import os
+import subprocess
+import tempfile
+import unittest
+
+from core.classifier import classify_diff
+from core.diff_budget import compact_diff, parse_diff
+from core.staged_diff import StagedChange, parse_head, read_staged_change, unquote_c_path
+
+
+def git(cwd: str, *args: str) -> str:
+    res = subprocess.run(
+        ["git", "-c", "user.name=dev", "-c", "user.email=dev@example.com", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return res.stdout.strip()
+
+
+class ParseHeadTests(unittest.TestCase):
+    def test_numstat_records_and_summary(self) -> None:
+        head = (
+            b"3\t1\tsrc/app.py\0-\t-\tlogo.png\0" b"0\t0\t\0old name.py\0new name.py\0"
+            b" create mode 100644 logo.png\n rename old name.py => new name.py (100%)\n\0"
+        )
+
+        stats, statuses = parse_head(head)
+
+        self.assertEqual([(s.path, s.added, s.deleted) for s in stats], [
+            ("src/app.py", 3, 1), ("logo.png", None, None), ("new name.py", 0, 0),
+        ])
+        self.assertTrue(stats[1].binary)
+        self.assertEqual(stats[2].old_path, "old name.py")
+        self.assertEqual(statuses, {"logo.png": "A"})
+
+    def test_quoted_summary_paths(self) -> None:
+        self.assertEqual(unquote_c_path('"\\303\\274n\\303\\257.txt"'), "ünï.txt")
+        self.assertEqual(unquote_c_path('"tab\\there \\"q\\".md"'), 'tab\there "q".md')
+        self.assertEqual(unquote_c_path("plain name.txt"), "plain name.txt")
+
+        _, statuses = parse_head(b"1\t0\t\xc3\xbcn\xc3\xaf.txt\0 create mode 100644 \"\\303\\274n\\303\\257.txt\"\n\0")
+
+        self.assertEqual(statuses, {"ünï.txt": "A"})
+
+
+class StagedChangeFromPatchTests(unittest.TestCase):
+    def test_statuses_and_counts_from_a_plain_diff(self) -> None:
+        change = StagedChange.from_patch(
+            "diff --git a/a.py b/a.py\nnew file mode 100644\n--- /dev/null\n+++ b/a.py\n@@ -0,0 +1 @@\n+x\n"
+            "diff --git a/b.py b/b.py\n--- a/b.py\n+++ b/b.py\n@@ -1 +1 @@\n-y\n+z"
+        )
+
+        self.assertEqual([f.summary for f in change.files], ["A a.py (+1 -0)", "M b.py (+1 -1)"])
+        self.assertEqual(change.files[1].hunks, [["@@ -1 +1 @@", "-y", "+z"]])
+        self.assertTrue(change.text.startswith("diff --git a/a.py b/a.py\n"))
+
+
+class ReadStagedChangeTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.repo = self._tmp.name
+        git(self.repo, "init", "-q", "-b", "main")
+
+    def _write(self, path: str, content: str) -> None:
+        full = os.path.join(self.repo, path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    def test_statuses_renames_and_hunks(self) -> None:
+        self._write("old.py", "".join(f"line {n}\n" for n in range(20)))
+        self._write("gone.py", "bye\n")
+        self._write("keep.py", "a\nb\n")
+        git(self.repo, "add", "-A")
+        git(self.repo, "commit", "-q", "-m", "init")
+        git(self.repo, "mv", "old.py", "new.py")
+        git(self.repo, "rm", "-q", "gone.py")
+        self._write("keep.py", "a\nc\n")
+        self._write("added.py", "n\n")
+        git(self.repo, "add", "-A")
+
+        change = read_staged_change(self.repo)
+
+        self.assertEqual([f.summary for f in change.files], [
+            "A added.py (+1 -0)", "D gone.py (+0 -1)", "M keep.py (+1 -1)", "R old.py -> new.py (+0 -0)",
+        ])
+        self.assertEqual(change.files[2].hunks[0][1:], [" a", "-b", "+c"])
+        self.assertFalse(change.truncated)
+        self.assertEqual(read_staged_change(self.repo, max_bytes=0).paths, change.paths)
+
+    def test_non_ascii_paths_keep_their_status(self) -> None:
+        self._write("vieux fichier é.txt", "bye\n")
+        git(self.repo, "add", "-A")
+        git(self.repo, "commit", "-q", "-m", "init")
+        git(self.repo, "rm", "-q", "vieux fichier é.txt")
+        self._write("ünï.txt", "hi\n")
+        git(self.repo, "add", "-A")
+
+        change = read_staged_change(self.repo)
+
+        self.assertEqual([f.summary for f in change.files], ["D vieux fichier é.txt (+0 -1)", "A ünï.txt (+1 -0)"])
+
+    def test_generated_files_keep_only_their_counts(self) -> None:
+        self._write("src/app.py", "print('hi')\n")
+        self._write("dist/app.min.js", "x=1;\n" * 50)
+        self._write("package-lock.json", "{}\n")
+        git(self.repo, "add", "-A")
+
+        change = read_staged_change(self.repo)
+
+        self.assertNotIn("x=1;", change.text)
+        files = {f.path: f for f in parse_diff(change.text)}
+        self.assertEqual(set(files), set(change.paths))
+        self.assertEqual((files["dist/app.min.js"].added, files["dist/app.min.js"].omitted), (50, "generated"))
+        self.assertEqual(files["src/app.py"].hunks[0][1:], ["+print('hi')"])
+        self.assertIn("# dist/app.min.js (+50 -0, omitted)", compact_diff(change.text, 200))
+
+    def test_hunkless_generated_file_keeps_the_sections_paired(self) -> None:
+        self._write("Assets/a.prefab.meta", "guid: 1\n")
+        self._write("b.py", "b = 1\n")
+        self._write("c.py", "c = 1\n")
+        git(self.repo, "add", "-A")
+        git(self.repo, "commit", "-q", "-m", "init")
+        git(self.repo, "mv", "Assets/a.prefab.meta", "Assets/z.prefab.meta")
+        self._write("b.py", "b = 2\n")
+        self._write("c.py", "c = 2\n")
+        git(self.repo, "add", "-A")
+
+        change = read_staged_change(self.repo)
+
+        files = {f.path: f for f in change.files}
+        self.assertEqual(files["Assets/z.prefab.meta"].omitted, "generated")
+        self.assertEqual(files["b.py"].hunks[0][1:], ["-b = 1", "+b = 2"])
+        self.assertEqual((files["c.py"].hunks[0][1:], files["c.py"].omitted), (["-c = 1", "+c = 2"], ""))
+
+    def test_unity_version_file_keeps_its_hunks(self) -> None:
+        self._write("ProjectSettings/ProjectSettings.asset", "PlayerSettings:\n  bundleVersion: 1.2.0\n")
+        git(self.repo, "add", "-A")
+        git(self.repo, "commit", "-q", "-m", "init")
+        self._write("ProjectSettings/ProjectSettings.asset", "PlayerSettings:\n  bundleVersion: 1.3.0\n")
+        git(self.repo, "add", "-A")
+
+        change = read_staged_change(self.repo)
+
+        self.assertEqual(change.files[0].omitted, "")
+        result = classify_diff(change.text)
+        self.assertIsNotNone(result)
+        self.assertEqual(result.rule, "release")
+
+    def test_linguist_generated_files_keep_only_their_counts(self) -> None:
+        self._write(".gitattributes", "gen/** linguist-generated\n")
+        self._write("gen/client.py", "".join(f"call_{n} = {n}\n" for n in range(30)))
+        self._write("src/app.py", "print('hi')\n")
+        git(self.repo, "add", "-A")
+
+        change = read_staged_change(self.repo)
+
+        files = {f.path: f for f in change.files}
+        self.assertEqual((files["gen/client.py"].omitted, files["gen/client.py"].added), ("generated", 30))
+        self.assertNotIn("call_1 = 1", change.text)
+        self.assertEqual(files["src/app.py"].hunks[0][1:], ["+print('hi')"])
+        self.assertEqual([f.path for f in change.file_diffs()], change.paths)
+
+    def test_byte_budget_stops_the_stream_with_complete_counts(self) -> None:
+        for name in ("a.py", "b.py", "c.py"):
+            self._write(name, "".join(f"value_{n} = {n}\n" for n in range(3000)))
+        self._write("z.py", "one = 1\n")
+        git(self.repo, "add", "-A")
+
+        change = read_staged_change(self.repo, max_bytes=64 * 1024)
+
+        self.assertTrue(change.truncated)
+        self.assertLessEqual(change.patch_bytes, 64 * 1024)
+        files = {f.path: f for f in parse_diff(change.text)}
+        self.assertEqual(sorted(files), ["a.py", "b.py", "c.py", "z.py"])
+        self.assertTrue(all(f.added == 3000 for name, f in files.items() if name != "z.py"))
+        self.assertEqual(files["z.py"].omitted, "size limit")
+
+    def test_nothing_staged(self) -> None:
+        change = read_staged_change(self.repo)
+
+        self.assertEqual((change.files, change.text), ((), ""))
+        self.assertFalse(change.only("CHANGELOG.md"))
+
+
+if __name__ == "__main__":
+    unittest.main()
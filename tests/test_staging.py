@@ -0,0 +1,120 @@
+import os
+import subprocess
+import tempfile
+import unittest
+from unittest import mock
+
+from core.snapshot import StatusEntry, collect_snapshot
+from core.staging import StageGroup, fast_git_config, group_entries, pathspec_units, stage_groups
+
+
+def git(cwd: str, *args: str) -> str:
+    res = subprocess.run(
+        ["git", "-c", "user.name=dev", "-c", "user.email=dev@example.com", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return res.stdout.strip()
+
+
+class GroupEntriesTests(unittest.TestCase):
+    def test_groups_by_top_level_directory(self) -> None:
+        entries = [
+            StatusEntry("1", "M.", "staged.py"),
+            StatusEntry("1", ".M", "Assets/Scenes/Main.unity"),
+            StatusEntry("1", ".D", "Assets/Old.cs"),
+            StatusEntry("?", "??", "Assets/New/"),
+            StatusEntry("?", "??", "README.md"),
+            StatusEntry("1", "MM", "Packages/manifest.json"),
+        ]
+
+        groups = group_entries(entries)
+
+        self.assertEqual([g.name for g in groups], [".", "Assets/", "Packages/"])
+        self.assertEqual(groups[0].paths, ("README.md",))
+        self.assertEqual(groups[1].paths, ("Assets/Scenes/Main.unity", "Assets/Old.cs", "Assets/New/"))
+        self.assertEqual(groups[1].details, "1 untracked, 1 modified, 1 deleted")
+
+    def test_pathspecs_name_directories_not_paths(self) -> None:
+        group = StageGroup("Assets/", ("Assets/a/1.cs", "Assets/a/2.cs", "Assets/[x].cs", "Assets/y.cs", "Other/z.cs"))
+        root = StageGroup(".", ("README.md", "Assets/moved.cs"))
+
+        self.assertEqual(pathspec_units(group), [
+            (":(literal)Assets/a/", 2), (":(glob)Assets/*", 2), (":(literal)Other/z.cs", 1),
+        ])
+        self.assertEqual(pathspec_units(root), [(":(glob)*", 1), (":(literal)Assets/moved.cs", 1)])
+
+    def test_units_larger_than_a_batch_are_split(self) -> None:
+        art = tuple(f"Assets/Art/{kind}/{n}.png" for kind in ("a", "b") for n in range(3))
+        group = StageGroup("Assets/", (*art, "Assets/Art/x.txt", "Assets/Art/y.txt", "Assets/Art/z.txt", "Assets/New/"))
+
+        self.assertEqual(pathspec_units(group, batch_size=3), [
+            (":(literal)Assets/Art/a/", 3), (":(literal)Assets/Art/b/", 3), (":(glob)Assets/Art/*", 3),
+            (":(literal)Assets/New/", 1),
+        ])
+        self.assertEqual(pathspec_units(group, batch_size=2)[-4:], [
+            (":(literal)Assets/Art/x.txt", 1), (":(literal)Assets/Art/y.txt", 1), (":(literal)Assets/Art/z.txt", 1),
+            (":(literal)Assets/New/", 1),
+        ])
+        self.assertEqual(pathspec_units(group, batch_size=10), [(":(literal)Assets/Art/", 9), (":(literal)Assets/New/", 1)])
+
+
+class FastGitConfigTests(unittest.TestCase):
+    def test_settings_follow_existing_entries_and_are_restored(self) -> None:
+        env = {"GIT_CONFIG_COUNT": "1", "GIT_CONFIG_KEY_0": "user.name", "GIT_CONFIG_VALUE_0": "dev"}
+        with mock.patch.dict(os.environ, env):
+            with fast_git_config({"core.preloadIndex": "true"}):
+                self.assertEqual(git(".", "config", "core.preloadIndex"), "true")
+                self.assertEqual(git(".", "config", "user.name"), "dev")
+            self.assertEqual(os.environ["GIT_CONFIG_COUNT"], "1")
+            self.assertNotIn("GIT_CONFIG_KEY_1", os.environ)
+
+
+class StagePathsTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.repo = self._tmp.name
+        git(self.repo, "init", "-q", "-b", "main")
+
+    def _write(self, path: str, content: str = "x\n") -> None:
+        full = os.path.join(self.repo, path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    def test_selected_groups_are_staged_in_batches(self) -> None:
+        for path in ("Assets/gone.cs", "Assets/keep.cs", "Assets/[*].txt", "Assets/Old/x.cs", "Docs/guide.md"):
+            self._write(path)
+        git(self.repo, "add", "-A")
+        git(self.repo, "commit", "-q", "-m", "init")
+        os.remove(os.path.join(self.repo, "Assets/gone.cs"))
+        os.remove(os.path.join(self.repo, "Assets/Old/x.cs"))
+        self._write("Assets/keep.cs", "y\n")
+        self._write("Assets/[*].txt", "y\n")
+        self._write("Assets/New/one.prefab", "prefab\n")
+        self._write("Docs/guide.md", "y\n")
+
+        groups = group_entries(collect_snapshot(self.repo).entries)
+        self.assertEqual([g.name for g in groups], ["Assets/", "Docs/"])
+        progress: list[tuple[int, int]] = []
+
+        ok = stage_groups(self.repo, groups[:1], batch_size=2, on_progress=lambda *p: progress.append(p))
+
+        self.assertTrue(ok)
+        self.assertEqual(progress, [(2, 5), (4, 5), (5, 5)])
+        staged = git(self.repo, "diff", "--cached", "--name-status").splitlines()
+        self.assertEqual(sorted(staged), [
+            "A\tAssets/New/one.prefab", "D\tAssets/Old/x.cs", "D\tAssets/gone.cs", "M\tAssets/[*].txt", "M\tAssets/keep.cs",
+        ])
+        self.assertEqual(git(self.repo, "diff", "--name-only"), "Docs/guide.md")
+
+    def test_failing_batch_stops(self) -> None:
+        with mock.patch("builtins.print"):
+            self.assertFalse(stage_groups(self.repo, [StageGroup("missing/", ("missing/a.txt",))]))
+
+
+if __name__ == "__main__":
+    unittest.main()
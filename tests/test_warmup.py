@@ -0,0 +1,84 @@
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from core.ollama import OllamaClient
+from core.warmup import warm_up_model
+
+
+class _OllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    loaded: list[str] = []
+    pulled = True
+    calls: list[tuple[str, dict]] = []
+
+    def _reply(self, status: int, data: dict) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        type(self).calls.append((self.path, {}))
+        self._reply(200, {"models": [{"name": name, "model": name} for name in self.loaded]})
+
+    def do_POST(self) -> None:
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        type(self).calls.append((self.path, payload))
+        if self.path == "/api/show" and not self.pulled:
+            self._reply(404, {"error": f"model '{payload['model']}' not found"})
+            return
+        self._reply(200, {"done": True})
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class WarmUpModelTests(unittest.TestCase):
+    def setUp(self) -> None:
+        _OllamaHandler.loaded = []
+        _OllamaHandler.pulled = True
+        _OllamaHandler.calls = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _OllamaHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        host = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.client = OllamaClient(host=host, model="test", keep_alive="30m")
+
+    def tearDown(self) -> None:
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_cold_model_is_checked_then_loaded(self) -> None:
+        result = warm_up_model(self.client)
+
+        self.assertFalse(result.already_loaded)
+        self.assertIsNone(result.error)
+        self.assertEqual([path for path, _ in _OllamaHandler.calls], ["/api/ps", "/api/show", "/api/generate"])
+        load = _OllamaHandler.calls[-1][1]
+        self.assertEqual(load["keep_alive"], "30m")
+        self.assertNotIn("prompt", load)
+        self.assertIn("num_ctx", load["options"])
+
+    def test_resident_model_is_not_reloaded(self) -> None:
+        _OllamaHandler.loaded = ["test:latest"]
+
+        result = warm_up_model(self.client)
+
+        self.assertTrue(result.already_loaded)
+        self.assertEqual([path for path, _ in _OllamaHandler.calls], ["/api/ps"])
+
+    def test_missing_model_is_reported(self) -> None:
+        _OllamaHandler.pulled = False
+
+        result = warm_up_model(self.client)
+
+        self.assertIn("404", result.error or "")
+        self.assertNotIn("/api/generate", [path for path, _ in _OllamaHandler.calls])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,24 @@
 # utils/common.py
 
+import asyncio
 import os
+import re
+import threading
+import weakref
+from contextlib import AsyncExitStack, contextmanager
 from pathlib import Path
 import subprocess
-from typing import List, Optional, Union
+from typing import Iterator, List, Optional, Union
+from urllib.parse import urlparse
+
+from utils import profiling
+from utils.git_workers import get_pool
 
 DRY_RUN = False
 
+# "subprocess" (default) or "pool": serve ref/object lookups from long-lived git helpers
+_COMMAND_BACKEND = os.getenv("DEVTOOLS_GIT_BACKEND", "subprocess")
+
 # Commands that are safe to execute even in dry-run (read-only)
 _SAFE_PREFIXES: list[list[str]] = [
     ["git", "status"],
@@ -18,11 +30,13 @@ _SAFE_PREFIXES: list[list[str]] = [
     ["git", "remote"],
     ["git", "show"],
     ["git", "show-ref"],
+    ["git", "for-each-ref"],
     ["git", "symbolic-ref"],
     ["git", "rev-list"],
     ["git", "ls-files"],
     ["git", "config"],
     ["git", "tag"],
+    ["git", "check-attr"],
 ]
 
 # Commands that mutate state (must be blocked in dry-run)
@@ -41,8 +55,23 @@ _BLOCK_PREFIXES: list[list[str]] = [
     ["gh"], # GitHub CLI actions should not run in dry-run
 ]
 
+# Read-only commands whose output depends on the working tree or index, which can
+# change outside of this tool between two prompts: never memoized.
+_UNCACHED_PREFIXES: list[list[str]] = [
+    ["git", "status"],
+    ["git", "diff"],
+    ["git", "ls-files"],
+    ["git", "check-attr"],
+]
+
 _DRY_RUN_BLOCKED_RC = 99
 
+# Per-process memo of read-only command results, keyed by (repo dir, argv, text)
+_COMMAND_CACHE_ENABLED = os.getenv("DEVTOOLS_COMMAND_CACHE", "1") == "1"
+_command_cache: dict[tuple[str, tuple[str, ...], bool], subprocess.CompletedProcess] = {}
+_command_cache_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+_command_cache_lock = threading.Lock()
+
 
 def set_dry_run(state: bool = True) -> None:
     global DRY_RUN
@@ -53,6 +82,48 @@ def is_dry_run() -> bool:
     return DRY_RUN
 
 
+def set_command_backend(name: str) -> None:
+    if name not in ("subprocess", "pool"):
+        raise ValueError("backend must be subprocess|pool")
+    global _COMMAND_BACKEND
+    _COMMAND_BACKEND = name
+
+
+def set_command_cache(enabled: bool = True) -> None:
+    global _COMMAND_CACHE_ENABLED
+    _COMMAND_CACHE_ENABLED = enabled
+    if not enabled:
+        clear_command_cache()
+
+
+def clear_command_cache() -> None:
+    with _command_cache_lock:
+        _command_cache.clear()
+
+
+def command_cache_stats() -> dict[str, int]:
+    with _command_cache_lock:
+        return {**_command_cache_stats, "entries": len(_command_cache)}
+
+
+def _cache_dir_key(cwd: Optional[str]) -> str:
+    return os.path.abspath(cwd or os.getcwd())
+
+
+def invalidate_command_cache(cwd: Optional[str]) -> None:
+    """Drop memoized results (remote URLs and pooled git helpers included) for the repo at cwd."""
+    key = _cache_dir_key(cwd)
+    _remote_urls.pop(key, None)
+    with _command_cache_lock:
+        stale = [k for k in _command_cache if k[0] == key]
+        for k in stale:
+            del _command_cache[k]
+        if stale:
+            _command_cache_stats["invalidations"] += 1
+    if _COMMAND_BACKEND == "pool":
+        get_pool().invalidate(cwd)
+
+
 def _is_prefix(command: list[str], prefix: list[str]) -> bool:
     if len(command) < len(prefix):
         return False
@@ -67,6 +138,70 @@ def _is_blocked(command: list[str]) -> bool:
     return any(_is_prefix(command, p) for p in _BLOCK_PREFIXES)
 
 
+_CONFIG_WRITE_FLAGS = {"--add", "--unset", "--unset-all", "--replace-all", "--rename-section", "--remove-section", "--edit", "-e"}
+
+
+def _is_query_form(command: list[str]) -> bool:
+    """
+    git tag/branch/config/remote are in _SAFE_PREFIXES for their listing/query forms
+    only; `git tag v1`, `git branch -D x`, `git config k v` or `git remote add` write.
+    """
+    if len(command) < 2 or command[0] != "git":
+        return True
+    sub, args = command[1], command[2:]
+    positional = [a for a in args if not a.startswith("-")]
+    if sub in ("tag", "branch"):
+        return not positional or "-l" in args or "--list" in args
+    if sub == "config":
+        if _CONFIG_WRITE_FLAGS & set(args):
+            return False
+        return len(positional) <= 1 or any(a.startswith("--get") or a in ("-l", "--list") for a in args)
+    if sub == "remote":
+        return not positional or positional[0] in ("show", "get-url")
+    return True
+
+
+def _is_readonly(command: list[str]) -> bool:
+    return _is_safe_readonly(command) and not _is_blocked(command) and _is_query_form(command)
+
+
+def _is_cacheable(command: list[str]) -> bool:
+    return _COMMAND_CACHE_ENABLED and not any(_is_prefix(command, p) for p in _UNCACHED_PREFIXES)
+
+
+def _execute(command_list: list[str], cwd: Optional[str], text: bool) -> subprocess.CompletedProcess:
+    readonly = _is_readonly(command_list)
+
+    if not readonly:
+        started = profiling.now()
+        result = subprocess.run(command_list, cwd=cwd, capture_output=True, text=text)
+        profiling.record_call(command_list, started, result.returncode, result.stdout, result.stderr, cwd=cwd)
+        invalidate_command_cache(cwd)
+        return result
+
+    cache_key = None
+    if _is_cacheable(command_list):
+        cache_key = (_cache_dir_key(cwd), tuple(command_list), text)
+        with _command_cache_lock:
+            cached = _command_cache.get(cache_key)
+            _command_cache_stats["hits" if cached is not None else "misses"] += 1
+        if cached is not None:
+            return subprocess.CompletedProcess(cached.args, cached.returncode, cached.stdout, cached.stderr)
+
+    started = profiling.now()
+    result = None
+    if _COMMAND_BACKEND == "pool" and text:
+        result = get_pool().try_run(command_list, cwd)
+    if result is None:
+        result = subprocess.run(command_list, cwd=cwd, capture_output=True, text=text)
+    profiling.record_call(command_list, started, result.returncode, result.stdout, result.stderr, cwd=cwd)
+
+    if cache_key is not None:
+        with _command_cache_lock:
+            _command_cache[cache_key] = result
+    return subprocess.CompletedProcess(result.args, result.returncode, result.stdout, result.stderr)
+
+
 def run_command(
     command: Union[List[str], str],
     cwd: Optional[str] = None,
@@ -90,15 +225,10 @@ def run_command(
     # DRY-RUN handling
     if DRY_RUN:
         # Allow read-only commands to execute for real
-        if _is_safe_readonly(command_list) and not _is_blocked(command_list):
+        if _is_readonly(command_list):
             if not silent:
                 print(f"🧪 [DRY-RUN/READ] Executing: {cmd_str} in {cwd}")
-            return subprocess.run(
-                command_list,
-                cwd=cwd,
-                capture_output=True,
-                text=text,
-            )
+            return _execute(command_list, cwd, text)
 
         # Block mutating commands: DO NOT pretend success
         if not silent:
@@ -111,12 +241,7 @@ def run_command(
         )
 
     # Normal execution: ALWAYS capture output so callers can debug on failure
-    result = subprocess.run(
-        command_list,
-        cwd=cwd,
-        capture_output=True,
-        text=text,
-    )
+    result = _execute(command_list, cwd, text)
 
     # If silent, we simply do not print. Caller can decide.
     return result
@@ -142,6 +267,225 @@ def run_command_checked(
     raise RuntimeError(f"{action} failed: {details}")
 
 
+@contextmanager
+def open_command_stream(
+    command: List[str],
+    cwd: Optional[str] = None,
+) -> Iterator[subprocess.Popen]:
+    """
+    Start a read-only command with its stdout as a binary pipe, so callers can stop
+    reading as soon as they have what they need. The process is terminated on exit.
+    Mutating commands are refused: streaming has no dry-run equivalent.
+    """
+    if not _is_readonly(command):
+        raise ValueError(f"open_command_stream only accepts read-only commands: {' '.join(command)}")
+
+    started = profiling.now()
+    proc = subprocess.Popen(
+        command,
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        yield proc
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        if proc.stdout:
+            proc.stdout.close()
+        proc.wait()
+        profiling.record_call(command, started, proc.returncode, cwd=cwd)
+
+
+def command_has_output(command: List[str], cwd: Optional[str] = None) -> Optional[bool]:
+    """
+    True as soon as the command writes its first byte (the process is then killed),
+    False if it exits cleanly without output, None if it fails.
+    """
+    with open_command_stream(command, cwd=cwd) as proc:
+        assert proc.stdout is not None
+        if proc.stdout.read(1):
+            return True
+        return False if proc.wait() == 0 else None
+
+
+# Commands that talk to a remote and therefore count against a per-host limit
+_NETWORK_GIT_SUBCOMMANDS = {"fetch", "pull", "push", "ls-remote", "clone"}
+_SCP_LIKE_URL_RE = re.compile(r"^(?:[^@/]+@)?(?P<host>[^:/]{2,}):(?!//)")
+
+_async_max_concurrency: int | None = None
+_async_max_per_host: int | None = None
+_async_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = weakref.WeakKeyDictionary()
+_remote_urls: dict[str, dict[str, str]] = {}
+
+
+def set_async_limits(max_concurrency: int | None = None, max_per_host: int | None = None) -> None:
+    """
+    Override DEVTOOLS_MAX_CONCURRENCY / DEVTOOLS_MAX_PER_HOST for async_run_command.
+    Takes effect for event loops that have not run a command yet.
+    """
+    global _async_max_concurrency, _async_max_per_host
+    if max_concurrency is not None:
+        _async_max_concurrency = max(1, max_concurrency)
+    if max_per_host is not None:
+        _async_max_per_host = max(1, max_per_host)
+
+
+@contextmanager
+def async_limits(max_concurrency: int | None = None, max_per_host: int | None = None) -> Iterator[None]:
+    """set_async_limits for the duration of the block; the previous limits are restored on exit."""
+    global _async_max_concurrency, _async_max_per_host
+    previous = (_async_max_concurrency, _async_max_per_host)
+    set_async_limits(max_concurrency, max_per_host)
+    try:
+        yield
+    finally:
+        _async_max_concurrency, _async_max_per_host = previous
+
+
+def _limits_for_running_loop() -> dict:
+    loop = asyncio.get_running_loop()
+    limits = _async_limits.get(loop)
+    if limits is None:
+        max_concurrency = _async_max_concurrency or env_int("DEVTOOLS_MAX_CONCURRENCY", 8, minimum=1)
+        limits = {
+            "global": asyncio.Semaphore(max_concurrency),
+            "per_host": _async_max_per_host or env_int("DEVTOOLS_MAX_PER_HOST", 4, minimum=1),
+            "hosts": {},
+        }
+        _async_limits[loop] = limits
+    return limits
+
+
+def remote_host(url: str) -> str:
+    """
+    Host part of a git remote URL ("git@github.com:o/r.git" -> "github.com").
+    Local paths map to "local".
+    """
+    url = (url or "").strip()
+    if "://" in url:
+        return (urlparse(url).hostname or "local").lower()
+    match = _SCP_LIKE_URL_RE.match(url)
+    if match:
+        return match.group("host").lower()
+    return "local"
+
+
+async def _remote_url_map(cwd: Optional[str]) -> dict[str, str]:
+    key = os.path.abspath(cwd or os.getcwd())
+    cached = _remote_urls.get(key)
+    if cached is not None:
+        return cached
+
+    command_list = ["git", "config", "--get-regexp", r"^remote\..*\.url$"]
+    # A process like any other: it takes one of the DEVTOOLS_MAX_CONCURRENCY slots
+    async with _limits_for_running_loop()["global"]:
+        started = profiling.now()
+        proc = await asyncio.create_subprocess_exec(
+            *command_list,
+            cwd=cwd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        out, _ = await proc.communicate()
+        profiling.record_call(command_list, started, proc.returncode, out, cwd=cwd)
+    urls: dict[str, str] = {}
+    for line in out.decode("utf-8", errors="replace").splitlines():
+        name, _, url = line.partition(" ")
+        if name.startswith("remote.") and name.endswith(".url"):
+            urls[name[len("remote."):-len(".url")]] = url
+    _remote_urls[key] = urls
+    return urls
+
+
+async def _command_hosts(command_list: list[str], cwd: Optional[str]) -> list[str]:
+    if command_list and command_list[0] == "gh":
+        return [os.getenv("GH_HOST", "github.com").lower()]
+    if len(command_list) < 2 or command_list[0] != "git" or command_list[1] not in _NETWORK_GIT_SUBCOMMANDS:
+        return []
+
+    urls = await _remote_url_map(cwd)
+    args = command_list[2:]
+    if "--all" in args:
+        remotes = list(urls)
+    else:
+        positional = [a for a in args if not a.startswith("-")]
+        if positional and (positional[0] in urls or "://" in positional[0] or _SCP_LIKE_URL_RE.match(positional[0])):
+            remotes = [positional[0]]
+        else:
+            remotes = ["origin"]
+
+    hosts = {remote_host(urls.get(r, r)) for r in remotes}
+    hosts.discard("local")
+    # Sorted so concurrent multi-host commands always acquire semaphores in the same order.
+    return sorted(hosts)
+
+
+async def async_run_command(
+    command: Union[List[str], str],
+    cwd: Optional[str] = None,
+    silent: bool = False,
+    text: bool = True,
+) -> subprocess.CompletedProcess:
+    """
+    asyncio counterpart of run_command with the same DRY_RUN rules and return contract.
+
+    At most DEVTOOLS_MAX_CONCURRENCY commands run at once per event loop, and at most
+    DEVTOOLS_MAX_PER_HOST of them may talk to the same remote host (fetch/pull/push/gh).
+    """
+    if isinstance(command, str):
+        command_list = command.split()
+    else:
+        command_list = command
+
+    cmd_str = " ".join(command_list)
+    readonly = _is_readonly(command_list)
+
+    if DRY_RUN:
+        if not readonly:
+            if not silent:
+                print(f"🌐 [DRY-RUN] Blocked (would execute): {cmd_str} in {cwd}")
+            return subprocess.CompletedProcess(
+                args=command_list,
+                returncode=_DRY_RUN_BLOCKED_RC,
+                stdout="" if text else b"",
+                stderr="DRY_RUN: blocked mutating command" if text else b"DRY_RUN: blocked mutating command",
+            )
+        if not silent:
+            print(f"🧪 [DRY-RUN/READ] Executing: {cmd_str} in {cwd}")
+
+    limits = _limits_for_running_loop()
+    hosts = await _command_hosts(command_list, cwd)
+
+    async with AsyncExitStack() as stack:
+        # Host slots first: waiting on a busy host must not hold one of the global slots.
+        for host in hosts:
+            sem = limits["hosts"].setdefault(host, asyncio.Semaphore(limits["per_host"]))
+            await stack.enter_async_context(sem)
+        await stack.enter_async_context(limits["global"])
+
+        started = profiling.now()
+        proc = await asyncio.create_subprocess_exec(
+            *command_list,
+            cwd=cwd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        out, err = await proc.communicate()
+        profiling.record_call(command_list, started, proc.returncode, out, err, cwd=cwd)
+
+    if not readonly:
+        invalidate_command_cache(cwd)
+
+    return subprocess.CompletedProcess(
+        args=command_list,
+        returncode=proc.returncode if proc.returncode is not None else 1,
+        stdout=out.decode("utf-8", errors="replace") if text else out,
+        stderr=err.decode("utf-8", errors="replace") if text else err,
+    )
+
+
 def env_int(name: str, default: int, minimum: int = 1) -> int:
     raw = os.getenv(name)
     if raw is None:
@@ -153,6 +497,22 @@ def env_int(name: str, default: int, minimum: int = 1) -> int:
     return value if value >= minimum else default
 
 
+def user_cache_dir(*parts: str) -> Path:
+    """
+    Per-user cache directory for dev-tools (created on demand).
+    DEVTOOLS_CACHE_DIR overrides; otherwise XDG_CACHE_HOME / LOCALAPPDATA / ~/.cache.
+    """
+    override = os.getenv("DEVTOOLS_CACHE_DIR")
+    if override:
+        base = Path(os.path.expanduser(override))
+    else:
+        xdg = os.getenv("XDG_CACHE_HOME") or (os.getenv("LOCALAPPDATA") if os.name == "nt" else None)
+        base = Path(xdg) / "dev-tools" if xdg else Path.home() / ".cache" / "dev-tools"
+    path = base.joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
 def trim_text_middle(text: str, max_chars: int) -> str:
     text = text or ""
     if max_chars <= 0 or len(text) <= max_chars:
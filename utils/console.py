@@ -1,9 +1,21 @@
 # utils/console.py
 
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator
+
 from rich.console import Console
+from rich.markup import escape
 
 console = Console()
 
+_SELECTION_RE = re.compile(r"^(\d+)(?:-(\d+))?$")
+
+# Set by collect_notices() in background work (commit prefetch) so its messages
+# wait for the main thread instead of landing in the middle of another prompt.
+_held_notices: ContextVar[list[str] | None] = ContextVar("held_notices", default=None)
+
 
 def ask_yes_no(question: str, default: str = "n") -> bool:
     """
@@ -28,3 +40,77 @@ def ask_yes_no(question: str, default: str = "n") -> bool:
         raw = default
 
     return raw == "y"
+
+
+def notice(message: str) -> None:
+    """Print message, or hold it when collect_notices() is active in this context."""
+    held = _held_notices.get()
+    if held is None:
+        print(message)
+    else:
+        held.append(message)
+
+
+@contextmanager
+def collect_notices() -> Iterator[list[str]]:
+    """Hold the notice() messages of the block in the yielded list."""
+    held: list[str] = []
+    token = _held_notices.set(held)
+    try:
+        yield held
+    finally:
+        _held_notices.reset(token)
+
+
+def parse_selection(raw: str, count: int) -> set[int] | None:
+    """
+    '1,3-5' -> {1, 3, 4, 5}; 'all' -> every index; '' / 'none' -> empty set.
+    None when the input is malformed or out of range.
+    """
+    raw = raw.strip().lower()
+    if raw in ("all", "a", "*"):
+        return set(range(1, count + 1))
+    if raw in ("", "none", "n"):
+        return set()
+
+    selected: set[int] = set()
+    for part in raw.replace(" ", "").split(","):
+        if not part:
+            continue
+        m = _SELECTION_RE.match(part)
+        if not m:
+            return None
+        start = int(m.group(1))
+        end = int(m.group(2) or start)
+        if start < 1 or end > count or start > end:
+            return None
+        selected.update(range(start, end + 1))
+    return selected
+
+
+def ask_selection(question: str, count: int) -> set[int]:
+    """Ask for a selection among `count` numbered items until the answer parses."""
+    while True:
+        console.print(
+            f"[white]{question}[/] [bold magenta](all / none / e.g. 1,3-5)[/]: ",
+            end="",
+        )
+        selected = parse_selection(input(), count)
+        if selected is not None:
+            return selected
+        console.print(f"⚠️  [yellow]Invalid selection, use numbers between 1 and {count}.[/]")
+
+
+def status_preview(status, label: str, width: int = 60) -> Callable[[str], None]:
+    """
+    Token callback for a console.status spinner: shows the label followed by the
+    last `width` characters received, on one line.
+    """
+    tail = ""
+
+    def on_token(token: str) -> None:
+        nonlocal tail
+        tail = (tail + token.replace("\n", " "))[-width:]
+        status.update(f"{label} [dim]{escape(tail)}[/]")
+
+    return on_token
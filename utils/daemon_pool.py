@@ -0,0 +1,42 @@
+# utils/daemon_pool.py
+"""
+Small executor on daemon threads: unlike ThreadPoolExecutor's, its workers are
+not joined at exit, so abandoned background work never delays quitting.
+"""
+
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable
+
+
+class DaemonPool:
+    def __init__(self, workers: int, name: str):
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"{name}_{idx}", daemon=True) for idx in range(max(1, workers))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _work(self) -> None:
+        while (item := self._queue.get()) is not None:
+            future, fn, args = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = fn(*args)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        future: Future = Future()
+        self._queue.put((future, fn, args))
+        return future
+
+    def shutdown(self) -> None:
+        """Workers stop after the work already queued; nothing waits for them."""
+        for _ in self._threads:
+            self._queue.put(None)
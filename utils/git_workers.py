@@ -0,0 +1,357 @@
+# utils/git_workers.py
+"""
+Optional run_command backend answering read-only ref/object lookups from
+long-lived per-repo git helpers instead of one git process per query.
+"""
+
+import atexit
+import fnmatch
+import os
+import re
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+DEFAULT_MAX_WORKERS = 16
+DEFAULT_SNAPSHOT_TTL = 60.0
+
+_VERSION_TAG_RE = re.compile(r"^(?P<prefix>\D*)(?P<numbers>(?:0|[1-9]\d*)(?:\.(?:0|[1-9]\d*))*)$")
+
+
+@dataclass(frozen=True)
+class RefEntry:
+    name: str
+    oid: str
+    symref: str
+    creatordate: int
+
+
+class _RepoWorker:
+    def __init__(self, repo_path: str, snapshot_ttl: float, counters: dict[str, int]):
+        self.repo_path = repo_path
+        self._snapshot_ttl = snapshot_ttl
+        self._counters = counters
+        self._lock = threading.Lock()
+        self._cat_file: subprocess.Popen | None = None
+        self._refs: dict[str, RefEntry] | None = None
+        self._refs_loaded_at = 0.0
+
+    # ---------------- helpers ----------------
+
+    def _start_cat_file(self) -> subprocess.Popen:
+        self._counters["helpers_spawned"] += 1
+        return subprocess.Popen(
+            ["git", "cat-file", "--batch-check"],
+            cwd=self.repo_path,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def resolve(self, rev: str) -> str | None:
+        """
+        Returns the object id for rev, or None when git reports it missing/ambiguous.
+        Raises OSError when the helper cannot be used (caller falls back).
+        """
+        if "\n" in rev or not rev:
+            raise OSError("unsupported revision")
+        with self._lock:
+            for _ in range(2):
+                if self._cat_file is None or self._cat_file.poll() is not None:
+                    self._cat_file = self._start_cat_file()
+                try:
+                    assert self._cat_file.stdin is not None and self._cat_file.stdout is not None
+                    self._cat_file.stdin.write(rev.encode("utf-8") + b"\n")
+                    self._cat_file.stdin.flush()
+                    line = self._cat_file.stdout.readline().decode("utf-8", errors="replace").rstrip("\n")
+                except (OSError, ValueError):
+                    self._close_cat_file()
+                    continue
+                if not line:
+                    self._close_cat_file()
+                    continue
+                parts = line.split()
+                if len(parts) == 3 and parts[1] not in ("missing", "ambiguous"):
+                    return parts[0]
+                return None
+        raise OSError("git cat-file helper unavailable")
+
+    def refs(self) -> dict[str, RefEntry]:
+        with self._lock:
+            fresh = self._refs is not None and (time.monotonic() - self._refs_loaded_at) < self._snapshot_ttl
+            if fresh:
+                return self._refs  # type: ignore[return-value]
+
+            self._counters["helpers_spawned"] += 1
+            res = subprocess.run(
+                [
+                    "git",
+                    "for-each-ref",
+                    "--format=%(refname)%00%(objectname)%00%(symref)%00%(creatordate:unix)",
+                ],
+                cwd=self.repo_path,
+                capture_output=True,
+            )
+            if res.returncode != 0:
+                raise OSError("git for-each-ref failed")
+
+            refs: dict[str, RefEntry] = {}
+            for line in res.stdout.decode("utf-8", errors="replace").splitlines():
+                parts = line.split("\0")
+                if len(parts) != 4:
+                    continue
+                name, oid, symref, date = parts
+                try:
+                    created = int(date or 0)
+                except ValueError:
+                    created = 0
+                refs[name] = RefEntry(name, oid, symref, created)
+
+            self._refs = refs
+            self._refs_loaded_at = time.monotonic()
+            return refs
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._refs = None
+            # cat-file re-reads loose refs on every lookup; restart it anyway so packed-refs
+            # rewrites and object writes are never served from a stale process.
+            self._close_cat_file()
+
+    def _close_cat_file(self) -> None:
+        proc = self._cat_file
+        self._cat_file = None
+        if proc is None:
+            return
+        try:
+            if proc.stdin:
+                proc.stdin.close()
+            proc.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_cat_file()
+            self._refs = None
+
+
+def _completed(command: list[str], returncode: int, stdout: str = "", stderr: str = "") -> subprocess.CompletedProcess:
+    return subprocess.CompletedProcess(args=command, returncode=returncode, stdout=stdout, stderr=stderr)
+
+
+def _split_flags(args: list[str], allowed: set[str]) -> tuple[set[str], list[str]] | None:
+    flags: set[str] = set()
+    positional: list[str] = []
+    for arg in args:
+        if arg.startswith("-"):
+            if arg not in allowed:
+                return None
+            flags.add(arg)
+        else:
+            positional.append(arg)
+    return flags, positional
+
+
+def _version_sorted(names: list[str], reverse: bool) -> list[str] | None:
+    """
+    Exact equivalent of git's v:refname ordering for tags sharing one prefix and made
+    of dot-separated integers without leading zeros (v1.2.3). None otherwise.
+    """
+    keyed: list[tuple[tuple[int, ...], str]] = []
+    prefix: str | None = None
+    for name in names:
+        m = _VERSION_TAG_RE.match(name)
+        if not m:
+            return None
+        if prefix is None:
+            prefix = m.group("prefix")
+        elif prefix != m.group("prefix"):
+            return None
+        keyed.append((tuple(int(n) for n in m.group("numbers").split(".")), name))
+    keyed.sort(reverse=reverse)
+    return [name for _, name in keyed]
+
+
+class GitWorkerPool:
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, snapshot_ttl: float = DEFAULT_SNAPSHOT_TTL):
+        self._max_workers = max(1, max_workers)
+        self._snapshot_ttl = snapshot_ttl
+        self._workers: OrderedDict[str, _RepoWorker] = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"served": 0, "fallback": 0, "helpers_spawned": 0}
+
+    def stats(self) -> dict[str, int]:
+        return dict(self._counters)
+
+    def _worker(self, cwd: str | None) -> _RepoWorker:
+        key = os.path.abspath(cwd or os.getcwd())
+        evicted: _RepoWorker | None = None
+        with self._lock:
+            worker = self._workers.get(key)
+            if worker is None:
+                worker = _RepoWorker(key, self._snapshot_ttl, self._counters)
+                self._workers[key] = worker
+                if len(self._workers) > self._max_workers:
+                    _, evicted = self._workers.popitem(last=False)
+            else:
+                self._workers.move_to_end(key)
+        if evicted is not None:
+            evicted.close()
+        return worker
+
+    def invalidate(self, cwd: str | None) -> None:
+        key = os.path.abspath(cwd or os.getcwd())
+        with self._lock:
+            worker = self._workers.get(key)
+        if worker is not None:
+            worker.invalidate()
+
+    def close(self) -> None:
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+        for worker in workers:
+            worker.close()
+
+    def try_run(self, command: list[str], cwd: str | None) -> subprocess.CompletedProcess | None:
+        """
+        Serve command from the helpers, or return None if its shape is not supported.
+        """
+        if len(command) < 2 or command[0] != "git":
+            return None
+
+        handler = {
+            "rev-parse": self._rev_parse,
+            "show-ref": self._show_ref,
+            "symbolic-ref": self._symbolic_ref,
+            "tag": self._tag_list,
+        }.get(command[1])
+        if handler is None:
+            return None
+
+        try:
+            result = handler(command, self._worker(cwd))
+        except OSError:
+            result = None
+
+        self._counters["served" if result is not None else "fallback"] += 1
+        return result
+
+    # ---------------- command emulation ----------------
+
+    def _rev_parse(self, command: list[str], worker: _RepoWorker) -> subprocess.CompletedProcess | None:
+        parsed = _split_flags(command[2:], {"--verify", "-q", "--quiet"})
+        if parsed is None:
+            return None
+        flags, revs = parsed
+        if len(revs) != 1:
+            return None
+        quiet = bool(flags & {"-q", "--quiet"})
+        verify = "--verify" in flags
+        if quiet and not verify:
+            return None
+
+        oid = worker.resolve(revs[0])
+        if oid is not None:
+            return _completed(command, 0, f"{oid}\n")
+        if verify:
+            return _completed(command, 1 if quiet else 128, "", "" if quiet else "fatal: Needed a single revision\n")
+        rev = revs[0]
+        return _completed(
+            command,
+            128,
+            f"{rev}\n",
+            f"fatal: ambiguous argument '{rev}': unknown revision or path not in the working tree.\n"
+            "Use '--' to separate paths from revisions, like this:\n"
+            "'git <command> [<revision>...] -- [<file>...]'\n",
+        )
+
+    def _show_ref(self, command: list[str], worker: _RepoWorker) -> subprocess.CompletedProcess | None:
+        parsed = _split_flags(command[2:], {"--verify", "-q", "--quiet"})
+        if parsed is None:
+            return None
+        flags, names = parsed
+        if "--verify" not in flags or len(names) != 1 or not names[0].startswith("refs/"):
+            return None
+        quiet = bool(flags & {"-q", "--quiet"})
+
+        entry = worker.refs().get(names[0])
+        if entry is not None:
+            return _completed(command, 0, "" if quiet else f"{entry.oid} {entry.name}\n")
+        if quiet:
+            return _completed(command, 1)
+        return _completed(command, 128, "", f"fatal: '{names[0]}' - not a valid ref\n")
+
+    def _symbolic_ref(self, command: list[str], worker: _RepoWorker) -> subprocess.CompletedProcess | None:
+        parsed = _split_flags(command[2:], {"-q", "--quiet"})
+        if parsed is None:
+            return None
+        flags, names = parsed
+        # HEAD is never part of for-each-ref output; leave it (and writes) to git.
+        if len(names) != 1 or not names[0].startswith("refs/"):
+            return None
+        quiet = bool(flags)
+
+        entry = worker.refs().get(names[0])
+        if entry is not None and entry.symref:
+            return _completed(command, 0, f"{entry.symref}\n")
+        if quiet:
+            return _completed(command, 1)
+        return _completed(command, 128, "", f"fatal: ref {names[0]} is not a symbolic ref\n")
+
+    def _tag_list(self, command: list[str], worker: _RepoWorker) -> subprocess.CompletedProcess | None:
+        args = command[2:]
+        sort: str | None = None
+        patterns: list[str] = []
+        for arg in args:
+            if arg in ("-l", "--list"):
+                continue
+            if arg.startswith("--sort="):
+                if sort is not None:
+                    return None
+                sort = arg.split("=", 1)[1]
+                continue
+            if arg.startswith("-"):
+                return None
+            patterns.append(arg)
+
+        # Without an explicit --sort, git honours tag.sort from config; only git knows that.
+        if sort not in ("refname", "-refname", "creatordate", "-creatordate", "v:refname", "-v:refname"):
+            return None
+
+        tags = [entry for name, entry in worker.refs().items() if name.startswith("refs/tags/")]
+        short = {entry.name: entry.name[len("refs/tags/"):] for entry in tags}
+        if patterns:
+            tags = [e for e in tags if any(fnmatch.fnmatchcase(short[e.name], p) for p in patterns)]
+
+        reverse = sort.startswith("-")
+        key = sort.lstrip("-")
+        if key == "refname":
+            names = sorted((short[e.name] for e in tags), reverse=reverse)
+        elif key == "creatordate":
+            # git breaks ties by refname ascending, whatever the sort direction.
+            ordered = sorted(tags, key=lambda e: (-e.creatordate if reverse else e.creatordate, e.name))
+            names = [short[e.name] for e in ordered]
+        else:
+            version_sorted = _version_sorted([short[e.name] for e in tags], reverse)
+            if version_sorted is None:
+                return None
+            names = version_sorted
+
+        return _completed(command, 0, "".join(f"{n}\n" for n in names))
+
+
+_POOL: GitWorkerPool | None = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_pool() -> GitWorkerPool:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = GitWorkerPool()
+            atexit.register(_POOL.close)
+        return _POOL
@@ -0,0 +1,272 @@
+# utils/profiling.py
+"""
+Opt-in command-level profiler (run.py --profile): a per-command summary and a
+Chrome trace of every git/gh/Ollama call.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+_ENABLED = False
+_origin = time.perf_counter()
+_records: list["CallRecord"] = []
+_stages: list[tuple[str, float, float]] = []
+_lock = threading.Lock()
+_stage = "main"
+_root_dirs: list[str] = []
+_repo: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("profiling_repo", default=None)
+
+
+@dataclass(frozen=True)
+class CallRecord:
+    tool: str
+    prefix: str
+    argv: str
+    repo: str
+    stage: str
+    start: float  # seconds since profiling was enabled
+    duration: float
+    returncode: int | None
+    stdout_bytes: int
+    stderr_bytes: int
+    thread: str
+
+
+def enable_profiling(root_dirs: list[str] | None = None) -> None:
+    """root_dirs label calls by repo path relative to its root, like repo discovery."""
+    global _ENABLED, _origin, _root_dirs
+    _ENABLED = True
+    _origin = time.perf_counter()
+    # Longest first, so a root nested in another one wins
+    _root_dirs = sorted((os.path.abspath(root) for root in root_dirs or []), key=len, reverse=True)
+
+
+def reset_profiling() -> None:
+    """Disable profiling and drop everything recorded."""
+    global _ENABLED, _root_dirs
+    _ENABLED = False
+    _root_dirs = []
+    with _lock:
+        _records.clear()
+        _stages.clear()
+
+
+def is_profiling() -> bool:
+    return _ENABLED
+
+
+def now() -> float:
+    return time.perf_counter()
+
+
+@contextmanager
+def profile_stage(name: str) -> Iterator[None]:
+    """Label every call made until the block exits (stages run one after another)."""
+    global _stage
+    previous = _stage
+    _stage = name
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stage = previous
+        if _ENABLED:
+            with _lock:
+                _stages.append((name, start - _origin, time.perf_counter() - start))
+
+
+@contextmanager
+def profile_repo(name: str) -> Iterator[None]:
+    """Attribute calls without a cwd (Ollama) to a repo, within the current thread."""
+    token = _repo.set(name)
+    try:
+        yield
+    finally:
+        _repo.reset(token)
+
+
+def command_prefix(argv: list[str]) -> str:
+    """'git -c x=y fetch --all' -> 'git fetch'; 'gh pr create ...' -> 'gh pr'."""
+    if not argv:
+        return "?"
+    words = [argv[0]]
+    skip_next = False
+    for arg in argv[1:]:
+        if skip_next:
+            skip_next = False
+            continue
+        if arg in ("-c", "-C"):
+            skip_next = True
+            continue
+        if arg.startswith("-"):
+            continue
+        words.append(arg)
+        break
+    return " ".join(words)
+
+
+def repo_label(cwd: str) -> str:
+    """Path of the repo at cwd relative to its root dir (the discovery name), else the absolute path."""
+    path = os.path.abspath(cwd)
+    for root in _root_dirs:
+        if path.startswith(root + os.sep):
+            return os.path.relpath(path, root)
+    return path
+
+
+def _size(output) -> int:
+    if output is None:
+        return 0
+    if isinstance(output, bytes):
+        return len(output)
+    return len(output.encode("utf-8", errors="replace"))
+
+
+def record_call(
+    argv: list[str],
+    start: float,
+    returncode: int | None,
+    stdout=None,
+    stderr=None,
+    cwd: str | None = None,
+    tool: str | None = None,
+    prefix: str | None = None,
+) -> None:
+    """start is a profiling.now() value taken before the call."""
+    if not _ENABLED:
+        return
+    end = time.perf_counter()
+    repo = _repo.get() or (repo_label(cwd) if cwd else "-")
+    record = CallRecord(
+        tool=tool or (argv[0] if argv else "?"),
+        prefix=prefix or command_prefix(argv),
+        argv=" ".join(argv),
+        repo=repo,
+        stage=_stage,
+        start=start - _origin,
+        duration=end - start,
+        returncode=returncode,
+        stdout_bytes=_size(stdout),
+        stderr_bytes=_size(stderr),
+        thread=threading.current_thread().name,
+    )
+    with _lock:
+        _records.append(record)
+
+
+def records() -> list[CallRecord]:
+    with _lock:
+        return list(_records)
+
+
+def _aggregate(key) -> list[tuple[str, int, float, float, int]]:
+    """(label, calls, total seconds, max seconds, failures) sorted by total time."""
+    groups: dict[str, list[CallRecord]] = defaultdict(list)
+    for rec in records():
+        groups[key(rec)].append(rec)
+    rows = [
+        (
+            label,
+            len(recs),
+            sum(r.duration for r in recs),
+            max(r.duration for r in recs),
+            sum(1 for r in recs if r.returncode not in (0, None)),
+        )
+        for label, recs in groups.items()
+    ]
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return rows
+
+
+def _table(title: str, label: str, rows, top: int, total: float) -> Table:
+    table = Table(title=title, title_justify="left")
+    table.add_column(label)
+    table.add_column("calls", justify="right")
+    table.add_column("total s", justify="right")
+    table.add_column("mean ms", justify="right")
+    table.add_column("max ms", justify="right")
+    table.add_column("%", justify="right")
+    table.add_column("failed", justify="right")
+    for name, calls, seconds, longest, failed in rows[:top]:
+        share = (seconds / total * 100) if total else 0.0
+        table.add_row(
+            name,
+            str(calls),
+            f"{seconds:.2f}",
+            f"{seconds / calls * 1000:.1f}",
+            f"{longest * 1000:.1f}",
+            f"{share:.1f}",
+            str(failed) if failed else "",
+        )
+    return table
+
+
+def print_report(top: int = 15) -> None:
+    recs = records()
+    if not recs:
+        console.print("📊 Profile: no commands recorded.")
+        return
+
+    total = sum(r.duration for r in recs)
+    console.print(f"\n📊 [bold]Profile[/]: {len(recs)} calls, {total:.2f}s cumulative command time\n")
+    console.print(_table(f"Top {top} command prefixes", "prefix", _aggregate(lambda r: r.prefix), top, total))
+    console.print(_table("Per stage and tool", "stage / tool", _aggregate(lambda r: f"{r.stage} / {r.tool}"), top, total))
+    console.print(_table(f"Top {top} repos", "repo / tool", _aggregate(lambda r: f"{r.repo} / {r.tool}"), top, total))
+
+
+def write_chrome_trace(path: str) -> str:
+    """
+    Chrome trace-event JSON ("X" complete events, microseconds). One track per
+    thread, plus a "stages" track spanning each run.py stage.
+    """
+    thread_ids: dict[str, int] = {"stages": 0}
+    events: list[dict] = []
+
+    with _lock:
+        recs = list(_records)
+        stages = list(_stages)
+
+    for name, start, duration in stages:
+        events.append({
+            "name": name, "cat": "stage", "ph": "X", "pid": 1, "tid": 0,
+            "ts": round(start * 1e6), "dur": round(duration * 1e6),
+        })
+
+    for rec in recs:
+        tid = thread_ids.setdefault(rec.thread, len(thread_ids))
+        events.append({
+            "name": rec.prefix,
+            "cat": rec.tool,
+            "ph": "X",
+            "pid": 1,
+            "tid": tid,
+            "ts": round(rec.start * 1e6),
+            "dur": round(rec.duration * 1e6),
+            "args": {
+                "argv": rec.argv,
+                "repo": rec.repo,
+                "stage": rec.stage,
+                "returncode": rec.returncode,
+                "stdout_bytes": rec.stdout_bytes,
+                "stderr_bytes": rec.stderr_bytes,
+            },
+        })
+
+    for thread, tid in thread_ids.items():
+        events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": thread}})
+
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, fh)
+    return path